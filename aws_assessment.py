@@ -3,126 +3,353 @@ This is the main file for the AWS Assessment CLI. It is responsible for parsing
 and calling the appropriate functions to perform the assessment.
 aws_assessment.py
 '''
+# boto3, requests and the individual checkers are imported on first use so that --help and
+# targeted runs don't pay for modules they never touch.
 import argparse
-from dataclasses import dataclass
-import boto3
+import os
+import sys
+import time
+from modules.assessment import AssessmentOptions, run_assessment
 from modules.config import config
-from modules.aws.account import validate_account, get_support_plan, get_billed_services, get_linked_accounts, get_regional_spend, get_account_id
-from modules.aws.iam import validate_iam
-from modules.aws.inspector import validate_inspector
-from modules.aws.organizations import validate_organizations, get_member_accounts, get_organization_info
-from modules.aws.controltower import validate_control_tower
-from modules.aws.config import validate_aws_config
-from modules.aws.securityhub import validate_security_hub
-from modules.aws.guardduty import validate_guardduty
+from modules.checks import CHECK_NAMES, TIERS, load_target, select_checks
+from modules.findings import NdjsonSink, route_stdout
 
-@dataclass
-class AssessmentOptions:
+NOTIFIERS = {
+    "slack": "modules.slack.slack:SlackNotifier",
+    "teams": "modules.o365.teams:TeamsNotifier"
+}
+
+def create_jira_sink(tier="deep"):
     '''
-    Data class to hold assessment options.
+    Build the Jira sink from config.yaml. The API token can also be supplied via the JIRA_API_TOKEN environment variable.
+
+    Args:
+        tier (str): Tier of the scan, gaps only reported by deeper scans are left open.
+
+    Returns:
+        JiraSink: The configured sink, or None if Jira is not configured.
     '''
-    session: boto3.Session
-    profile: str
-    region: str
-    is_management: bool
-    include_org_checks: bool = True
-    include_control_tower: bool = False
+    url = config.get("jira.url")
+    project = config.get("jira.project")
+    token = os.getenv("JIRA_API_TOKEN", config.get("jira.api_token"))
+    if not (url and project and token):
+        print("⚠ Jira tickets requested but jira.url, jira.project and jira.api_token are not all configured.")
+        return None
 
-def run_assessment(options: AssessmentOptions):
+    email = config.get("jira.email")
+    jira_sink = load_target("modules.jira.jira:JiraSink")
+    return jira_sink(
+        url,
+        project,
+        (email, token) if email else token,
+        issue_type=config.get("jira.issue_type", "Task"),
+        index_file=config.get("jira.index_file", ".aws-assess-jira.json"),
+        done_transition=config.get("jira.done_transition", "Done"),
+        search_path=config.get("jira.search_path", "/rest/api/2/search"),
+        tier=tier
+    )
+
+def create_sinks(args):
     '''
-    Runs the AWS assessment for a given profile.
+    Build the finding sinks requested on the command line.
 
     Args:
-        session (boto3.Session): Boto3 session object
-        profile (str): AWS profile name
-        region (str): AWS region
-        is_management (bool): True if the account is the management account, False otherwise.
-        include_org_checks (bool): True to include AWS Organizations checks, False otherwise.
-        include_control_tower (bool): True to include AWS Control Tower checks, False otherwise.
+        args (argparse.Namespace): Parsed command line arguments
+
+    Returns:
+        list: Finding sinks
+    '''
+    sinks = []
+    if args.ndjson:
+        sinks.append(NdjsonSink(args.ndjson))
+    for name, target in NOTIFIERS.items():
+        if not getattr(args, name):
+            continue
+        webhook_url = config.get(f"{name}.webhook_url")
+        if not webhook_url:
+            print(f"⚠ {name.title()} notifications requested but {name}.webhook_url is not configured.")
+            continue
+        notifier = load_target(target)
+        sinks.append(notifier(
+            webhook_url,
+            group_by=config.get("notifications.group_by", "account"),
+            min_status=config.get("notifications.min_status", "WARN")
+        ))
+    if args.jira:
+        jira_sink = create_jira_sink(scan_tier(args))
+        if jira_sink:
+            sinks.append(jira_sink)
+    if args.report:
+        maturity_matrix = load_target("modules.maturity:MaturityMatrix")
+        sinks.append(maturity_matrix())
+    history_path = args.history or config.get("history.path")
+    if history_path:
+        history_store = load_target("modules.history:HistoryStore")
+        sinks.append(history_store(history_path))
+    return sinks
+
+def write_maturity_report(sinks, path):
+    '''
+    Score the findings collected by the maturity matrix sink and write the report.
+
+    Args:
+        sinks (list): Finding sinks, including the MaturityMatrix
+        path (str): Output file
 
     Returns:
         None
     '''
-    aws_account_id = get_account_id(options.session)
-    print(f"\n🔍 Running assessment for profile: {options.profile}, {aws_account_id}, {options.region} \n")
-    validate_account(options.session)
-    print("\n🔍 AWS Support Plan Settings...")
-    get_support_plan(options.session)
-    print("\n🔍 Billed Services...")
-    get_billed_services(options.session)
-    print("\n🔍 Regional Spend...")
-    get_regional_spend(options.session)
-    print("\n🔍 Checking Accounts Relationships...")
-    get_linked_accounts(options.session)
-    print("\n🔍 Validating IAM Settings...")
-    validate_iam(options.session)
-    print("\n🔍 Validating AWS Config...")
-    validate_aws_config(options.session, options.is_management)
-    print("\n🔍 Validating AWS Security Hub...")
-    validate_security_hub(options.session)
-    print("\n🔍 Validating AWS Inspector...")
-    validate_inspector(options.session)
-    print("\n🔍 Validating AWS GuardDuty...")
-    validate_guardduty(options.session)
-
-    if options.include_org_checks:
-        print("\n🔍 Validating AWS Organizations...")
-        validate_organizations(options.session, options.profile)
-
-    if options.include_control_tower:
-        print("\n🔍 Validating AWS Control Tower...")
-        validate_control_tower(options.session)
+    maturity_matrix = load_target("modules.maturity:MaturityMatrix")
+    write_report = load_target("modules.maturity:write_report")
+    maturity_level = load_target("modules.maturity:maturity_level")
+    matrix = next(sink for sink in sinks if isinstance(sink, maturity_matrix))
+    scores = matrix.score()
+    write_report(scores, path)
+    print(f"\n✔ Maturity report for {len(scores.accounts)} accounts written to {path}: {maturity_level(scores.org_score)}")
 
-def main():
+def parse_checks(value):
     '''
-    Main function for the AWS Assessment CLI. It is responsible for parsing the command line arguments
-    and calling the appropriate functions to perform the assessment.
+    Parse and validate the --checks argument.
+
+    Args:
+        value (str): Comma separated check names
+
+    Returns:
+        list: Check names
     '''
-    parser = argparse.ArgumentParser(description="AWS Security Assessment Tool")
-    parser.add_argument("--simple", action="store_true", help="Perform the first phase of validation")
-    parser.add_argument("--follow", action="store_true", help="Perform validation across all member accounts if initial account is management")
-    args = parser.parse_args()
+    names = [name.strip() for name in value.split(",") if name.strip()]
+    try:
+        select_checks(names)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return names
+
+def scan_tier(args):
+    '''
+    The scan tier: --tier if given, otherwise essential for --simple and deep for everything else.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments
+
+    Returns:
+        str: "essential" or "deep"
+    '''
+    return args.tier or ("essential" if args.simple else "deep")
+
+def run_scan(args, archive, sinks):  # pylint: disable=R0914
+    '''
+    Run the assessment against the configured account and, if requested, every member account.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments
+        archive (ResponseArchive): Optional archive to record responses to or replay them from.
+        sinks (list): Finding sinks that receive each finding as soon as it is produced.
+
+    Returns:
+        None
+    '''
+    create_session = load_target("modules.aws.session:create_session")
+    get_organization_info = load_target("modules.aws.organizations:get_organization_info")
+    iter_member_accounts = load_target("modules.aws.organizations:iter_member_accounts")
+    get_account_ous = load_target("modules.aws.organizations:get_account_ous")
 
     # Load config
     profile = config.get("aws.profile")
     region = config.get("aws.region")
 
     # Setup boto session for initial connection
-    global_session = boto3.Session(profile_name=profile, region_name=region)
+    global_session = create_session(profile, region, archive)
+    shared_state = {}
+    run_budget = config.get("deadlines.run")
+    run_deadline = time.monotonic() + float(run_budget) if run_budget else None
 
-    if args.simple or args.follow:
+    if args.simple or args.follow or args.tier:
         # Determine if this is an Organization Management account
         # Determine if this is the management account
         org_id, management_account = get_organization_info(global_session)
         is_management = profile == management_account
 
+        # The maturity report groups accounts by OU
+        ou_sinks = [sink for sink in sinks if hasattr(sink, "set_account_ous")]
+        if ou_sinks and is_management:
+            account_ous = get_account_ous(global_session)
+            for sink in ou_sinks:
+                sink.set_account_ous(account_ous)
+
         options = AssessmentOptions(
             session=global_session,
             profile=profile,
             region=region,
             is_management=is_management,
             include_org_checks=True,
-            include_control_tower=True
+            include_control_tower=True,
+            sinks=sinks,
+            checks=args.checks,
+            shared_state=shared_state,
+            run_deadline=run_deadline,
+            tier=scan_tier(args)
         )
         run_assessment(options)
+        # A check that timed out leaves the account with a fresh session
+        global_session = options.session
 
         if args.follow and is_management:
             print(f"\n🔍 Management account detected for Org {org_id}. Following into member accounts...\n")
-            # get account list
-            accounts = get_member_accounts(global_session)
-            for account in accounts:
-                specific_session = boto3.Session(profile_name=account, region_name=region)
+            # Members skip Macie once the delegated administrator's view of them is collected, whatever the account order
+            if any(check.name == "macie" for check in select_checks(args.checks, scan_tier(args))):
+                prefetch_member_status = load_target("modules.aws.macie:prefetch_member_status")
+                prefetch_member_status(global_session, lambda account: create_session(account, region, archive), shared_state, scan_tier(args) == "deep")
+            # Accounts are streamed page by page so memory stays flat regardless of org size
+            for account in iter_member_accounts(global_session):
+                if run_deadline is not None and time.monotonic() >= run_deadline:
+                    print(f"\n⏱ Run time budget of {float(run_budget):.0f}s spent, remaining member accounts were not assessed")
+                    break
+                specific_session = create_session(account, region, archive)
                 options = AssessmentOptions(
                     session=specific_session,
                     profile=account,
                     region=region,
                     is_management=False,
                     include_org_checks=True,
-                    include_control_tower=False
+                    include_control_tower=False,
+                    sinks=sinks,
+                    checks=args.checks,
+                    shared_state=shared_state,
+                    run_deadline=run_deadline,
+                    tier=scan_tier(args)
                 )
                 run_assessment(options)
 
-    print("\n✅ Assessment completed.")
+def run_query(args):
+    '''
+    Answer a query against the history database.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments
+
+    Returns:
+        None
+    '''
+    history_path = args.history or config.get("history.path")
+    if not history_path:
+        print("❌ No history database given. Use --history FILE or set history.path in config.yaml.")
+        sys.exit(1)
+    if not os.path.exists(history_path):
+        print(f"❌ History database {history_path} does not exist.")
+        sys.exit(1)
+
+    connect = load_target("modules.history:connect")
+    parse_since = load_target("modules.history:parse_since")
+    try:
+        since = parse_since(args.since)
+        until = parse_since(getattr(args, "until", None))
+    except ValueError as e:
+        print(f"❌ Invalid time: {str(e)}")
+        sys.exit(1)
+
+    connection = connect(history_path)
+    try:
+        if args.query == "runs":
+            load_target("modules.history:print_runs")(connection, since, args.limit)
+            return
+        filters = {"account": args.account, "check": args.check, "region": args.region, "subject": args.subject}
+        if args.query == "trend":
+            load_target("modules.history:print_trend")(connection, since, **filters)
+        else:
+            load_target("modules.history:print_diff")(connection, since, until, **filters)
+    finally:
+        connection.close()
+
+def add_query_parser(subparsers):
+    '''
+    Add the query subcommand and its trend, diff and runs queries.
+
+    Args:
+        subparsers (argparse._SubParsersAction): Subcommands of the main parser
+
+    Returns:
+        None
+    '''
+    query_parser = subparsers.add_parser("query", help="Query the history database for trends and changes between runs")
+    queries = query_parser.add_subparsers(dest="query", required=True)
+
+    runs_parser = queries.add_parser("runs", help="List the most recent runs")
+    runs_parser.add_argument("--limit", type=int, default=20, help="Number of runs to list (default: 20)")
+
+    trend_parser = queries.add_parser("trend", help="Count findings per status for each run")
+    diff_parser = queries.add_parser("diff", help="Show what regressed, was resolved or changed between two points in time")
+    diff_parser.add_argument("--until", metavar="WHEN", help="Compare the findings before this time instead of the latest findings")
+
+    for query in (runs_parser, trend_parser, diff_parser):
+        # SUPPRESS keeps a --history given before the subcommand
+        query.add_argument("--history", metavar="FILE", default=argparse.SUPPRESS, help="SQLite history database (default: history.path in config.yaml)")
+        query.add_argument("--since", metavar="WHEN", help="Duration like 30d, 12h or 2w, or an ISO date. For diff, the baseline (default: the latest run)")
+    for query in (trend_parser, diff_parser):
+        query.add_argument("--account", metavar="ID", help="Account ID or profile name")
+        query.add_argument("--check", choices=CHECK_NAMES, help="Check name")
+        query.add_argument("--region", help="Region, e.g. us-east-1")
+        query.add_argument("--subject", metavar="TEXT", help="Only findings whose subject contains TEXT, e.g. 'S3 Protection'")
+
+def main():
+    '''
+    Main function for the AWS Assessment CLI. It is responsible for parsing the command line arguments
+    and calling the appropriate functions to perform the assessment.
+    '''
+    parser = argparse.ArgumentParser(description="AWS Security Assessment Tool")
+    parser.add_argument("--simple", action="store_true", help="Perform the first phase of validation (same as --tier essential)")
+    parser.add_argument("--follow", action="store_true", help="Perform validation across all member accounts if initial account is management")
+    archive_group = parser.add_mutually_exclusive_group()
+    archive_group.add_argument("--record", metavar="FILE", help="Record every AWS API response made during the run to a compressed archive")
+    archive_group.add_argument("--replay", metavar="FILE", help="Serve every AWS API response from a recorded archive with no network access")
+    parser.add_argument("--ndjson", metavar="FILE", help="Stream one JSON line per finding to FILE as each check completes ('-' for stdout)")
+    parser.add_argument("--slack", action="store_true", help="Send finding digests to the Slack webhook in config.yaml (slack.webhook_url)")
+    parser.add_argument("--teams", action="store_true", help="Send finding digests to the Teams webhook in config.yaml (teams.webhook_url)")
+    parser.add_argument("--jira", action="store_true", help="Create, update and close Jira issues for gaps using the jira settings in config.yaml")
+    parser.add_argument("--report", metavar="FILE", help="Write a maturity report scoring every account, OU and the organization (.html for HTML, otherwise Markdown)")
+    parser.add_argument("--daemon", action="store_true", help="Run continuously, scheduling each account's checks across the interval (combine with --follow for member accounts)")
+    parser.add_argument("--interval", type=float, metavar="SECONDS", help="Seconds between runs of each check in --daemon mode (default: daemon.interval in config.yaml)")
+    parser.add_argument("--tier", choices=TIERS, help="essential: stop at whether each service is enabled; deep: full gap report with the detailed checks (default: deep, essential with --simple)")
+    parser.add_argument("--checks", type=parse_checks, metavar="NAMES", help=f"Comma separated checks to run (default: all). Available: {', '.join(CHECK_NAMES)}")
+    parser.add_argument("--history", metavar="FILE", help="Record every finding to a SQLite history database (default: history.path in config.yaml)")
+    add_query_parser(parser.add_subparsers(dest="command", title="commands"))
+    args = parser.parse_args()
+
+    if args.command == "query":
+        run_query(args)
+        return
+    if args.daemon and args.record:
+        # The archive is only written on exit, a daemon would hold every response in memory until then
+        parser.error("--record cannot be combined with --daemon")
+
+    archive = None
+    if args.record or args.replay:
+        response_archive = load_target("modules.aws.replay:ResponseArchive")
+        archive = response_archive(args.record or args.replay, "record" if args.record else "replay")
+
+    sinks = create_sinks(args)
+
+    # Keep stdout clean for the NDJSON stream when it is being piped
+    human_output = sys.stderr if args.ndjson == "-" else sys.stdout
+
+    try:
+        with route_stdout(human_output):
+            if args.daemon:
+                assessment_daemon = load_target("modules.daemon:AssessmentDaemon")
+                assessment_daemon(archive, sinks, args.checks, args.follow, args.interval, scan_tier(args)).run()
+            else:
+                run_scan(args, archive, sinks)
+
+            if args.report:
+                write_maturity_report(sinks, args.report)
+
+            if args.record:
+                recorded = archive.save()
+                print(f"\n✔ Recorded {recorded} AWS API responses to {args.record}")
+
+            print("\n✅ Assessment completed.")
+    finally:
+        for sink in sinks:
+            sink.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,50 @@
+'''
+History store benchmark. Records a large scan and times the batched inserts and the commit at the end of the run.
+benchmarks/history.py
+'''
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# pylint: disable=C0413
+from modules.findings import Finding
+from modules.history import HistoryStore, connect, trend
+
+STATUSES = ("PASS", "PASS", "PASS", "REVIEW", "WARN", "ERROR")
+
+def main():
+    '''
+    Print how long recording and querying a large organization's scan takes.
+    '''
+    accounts = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    findings = int(sys.argv[2]) if len(sys.argv) > 2 else 60
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "history.db")
+        scan = [
+            Finding(
+                f"{account:012d}", f"account-{account}", f"check-{position % 14}",
+                STATUSES[(account + position) % len(STATUSES)], f"Setting {position}: value",
+                "us-east-1" if position % 2 else None
+            )
+            for account in range(accounts) for position in range(findings)
+        ]
+
+        start = time.perf_counter()
+        store = HistoryStore(path)
+        for finding in scan:
+            store.write(finding)
+        store.close()
+        elapsed = time.perf_counter() - start
+        print(f"Recorded {accounts * findings} findings for {accounts} accounts in {elapsed * 1000:.0f} ms")
+
+        connection = connect(path)
+        start = time.perf_counter()
+        trend(connection, check="check-3")
+        print(f"Trend for one check in {(time.perf_counter() - start) * 1000:.1f} ms")
+        connection.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+'''
+IAM policy analysis benchmark. Analyzes synthetic authorization details for many accounts sharing AWS managed policies.
+benchmarks/policy.py
+'''
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# pylint: disable=C0413
+from modules.aws.policy import analyze_account_policies
+
+ACTIONS = ("s3:GetObject", "s3:*", "ec2:Describe*", "iam:PassRole", "logs:PutLogEvents", "kms:Decrypt", "*")
+
+def _document(seed, statements=6):
+    return {"Version": "2012-10-17", "Statement": [
+        {
+            "Effect": "Allow",
+            "Action": [ACTIONS[(seed + i) % len(ACTIONS)], ACTIONS[(seed * 3 + i) % len(ACTIONS)]] if i % 2 else ACTIONS[(seed + i) % (len(ACTIONS) - 1)],
+            "Resource": "*" if i % 3 == 0 else [f"arn:aws:s3:::bucket-{seed}-{i}", f"arn:aws:s3:::bucket-{seed}-{i}/*"]
+        }
+        for i in range(statements)
+    ]}
+
+def _details(account, roles, aws_managed):
+    account_id = f"{account:012d}"
+    policies = [
+        {"Arn": f"arn:aws:iam::aws:policy/Managed{index}", "PolicyName": f"Managed{index}", "DefaultVersionId": "v1",
+         "PolicyVersionList": [{"Document": _document(index), "VersionId": "v1", "IsDefaultVersion": True}]}
+        for index in range(aws_managed)
+    ]
+    policies += [
+        {"Arn": f"arn:aws:iam::{account_id}:policy/Local{index}", "PolicyName": f"Local{index}", "DefaultVersionId": "v1",
+         "PolicyVersionList": [{"Document": _document(account + index), "VersionId": "v1", "IsDefaultVersion": True}]}
+        for index in range(10)
+    ]
+    role_list = [
+        {
+            "RoleName": f"role-{index}", "Path": "/",
+            "AssumeRolePolicyDocument": {"Statement": [{"Effect": "Allow", "Principal": {"AWS": f"arn:aws:iam::{index % 7:012d}:root"}, "Action": "sts:AssumeRole"}]},
+            "RolePolicyList": [{"PolicyName": "inline", "PolicyDocument": _document(index % 40)}],
+            "AttachedManagedPolicies": [{"PolicyArn": policies[(index * 7 + offset) % len(policies)]["Arn"]} for offset in range(3)]
+        }
+        for index in range(roles)
+    ]
+    return account_id, {"UserDetailList": [], "GroupDetailList": [], "RoleDetailList": role_list, "Policies": policies}
+
+def main():
+    '''
+    Print how long analyzing the policies of many accounts takes, cold and with the memoized analyses warm.
+    '''
+    accounts = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    roles = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    aws_managed = int(sys.argv[3]) if len(sys.argv) > 3 else 300
+    generated = [_details(account, roles, aws_managed) for account in range(accounts)]
+
+    for label in ("cold", "warm"):
+        start = time.perf_counter()
+        for account_id, details in generated:
+            analyze_account_policies(details, account_id)
+        elapsed = time.perf_counter() - start
+        print(f"{label}: {accounts} accounts x {roles} roles in {elapsed * 1000:.0f} ms ({elapsed * 1000 / accounts:.1f} ms per account)")
+
+if __name__ == "__main__":
+    main()
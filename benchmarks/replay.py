@@ -0,0 +1,139 @@
+'''
+Replay pipeline benchmark. Records synthetic AWS responses for many accounts into an archive, then times the
+processing pipeline (checkers, finding capture and sinks) replaying that archive with no network access.
+benchmarks/replay.py
+'''
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# pylint: disable=C0413
+from botocore.awsrequest import AWSResponse
+
+from modules.assessment import AssessmentOptions, run_assessment
+from modules.aws.replay import ResponseArchive
+from modules.aws.session import CachedSession, create_botocore_session, create_client_config, create_session
+from modules.findings import NdjsonSink, route_stdout
+from modules.maturity import MaturityMatrix
+
+REGION = "us-east-1"
+CHECKS = ["config", "securityhub", "guardduty", "macie", "accessanalyzer"]
+REGIONS = ("us-east-1", "us-east-2", "us-west-1", "us-west-2")
+
+CALLER_IDENTITY_XML = (
+    '<GetCallerIdentityResponse xmlns="https://sts.amazonaws.com/doc/2011-06-15/"><GetCallerIdentityResult>'
+    '<Account>{account}</Account><Arn>arn:aws:iam::{account}:role/audit</Arn><UserId>AROA</UserId>'
+    '</GetCallerIdentityResult><ResponseMetadata><RequestId>1</RequestId></ResponseMetadata></GetCallerIdentityResponse>'
+)
+REGIONS_XML = (
+    '<DescribeRegionsResponse xmlns="http://ec2.amazonaws.com/doc/2016-11-15/"><requestId>1</requestId><regionInfo>'
+    + "".join(f"<item><regionName>{region}</regionName><optInStatus>opt-in-not-required</optInStatus></item>" for region in REGIONS)
+    + '</regionInfo></DescribeRegionsResponse>'
+)
+JSON_RESPONSES = {
+    "ListDetectors": {"detectorIds": ["detector"]},
+    "GetDetector": {"status": "ENABLED", "findingPublishingFrequency": "FIFTEEN_MINUTES", "dataSources": {
+        "cloudTrail": {"status": "ENABLED"}, "dnsLogs": {"status": "ENABLED"}, "flowLogs": {"status": "ENABLED"},
+        "s3Logs": {"status": "DISABLED"}
+    }},
+    "DescribeHub": {"HubArn": "arn:aws:securityhub:us-east-1:111111111111:hub/default", "AutoEnableControls": True,
+                    "ControlFindingGenerator": "SECURITY_CONTROL"},
+    "GetMacieSession": {"status": "ENABLED"},
+    "ListAnalyzers": {"analyzers": [{"arn": "arn:aws:access-analyzer:us-east-1:111111111111:analyzer/account", "name": "account",
+                                     "type": "ACCOUNT", "status": "ACTIVE", "createdAt": "2024-01-01T00:00:00Z"}]}
+}
+
+class _Body:
+    # pylint: disable=R0903
+    def __init__(self, body):
+        self._body = body
+
+    def stream(self, **_kwargs):
+        '''
+        Yield the body in a single chunk.
+        '''
+        yield self._body
+
+def _stub(account):
+    '''
+    Answer every request of an account with a synthetic response instead of sending it.
+    '''
+    def before_send(request, event_name, **_kwargs):
+        operation = event_name.split(".")[-1]
+        if operation == "GetCallerIdentity":
+            body = CALLER_IDENTITY_XML.format(account=account)
+        elif operation == "DescribeRegions":
+            body = REGIONS_XML
+        else:
+            body = json.dumps(JSON_RESPONSES.get(operation, {}))
+        return AWSResponse(request.url, 200, {}, _Body(body.encode("utf-8")))
+    return before_send
+
+class CountingSink:
+    '''
+    Counts the findings written to it.
+    '''
+    def __init__(self):
+        self.count = 0
+
+    def write(self, _finding):
+        '''
+        Count a finding.
+        '''
+        self.count += 1
+
+    def close(self):
+        '''
+        Nothing to release.
+        '''
+
+def record(path, accounts):
+    '''
+    Run the checks of every account against the stub and record the responses.
+    '''
+    archive = ResponseArchive(path, "record")
+    for index in range(accounts):
+        account = f"{index:012d}"
+        session = CachedSession(aws_access_key_id="benchmark", aws_secret_access_key="benchmark", region_name=REGION,
+                                botocore_session=create_botocore_session(), client_config=create_client_config())
+        archive.attach(session, account)
+        session.events.register("before-send", _stub(account))
+        run_assessment(AssessmentOptions(session=session, profile=account, region=REGION, is_management=False, checks=CHECKS))
+    return archive.save()
+
+def replay(path, accounts):
+    '''
+    Run the pipeline for every account from the archive, returning the elapsed seconds and the findings produced.
+    '''
+    archive = ResponseArchive(path, "replay")
+    counter = CountingSink()
+    sinks = [counter, NdjsonSink(os.devnull), MaturityMatrix()]
+    start = time.perf_counter()
+    for index in range(accounts):
+        account = f"{index:012d}"
+        run_assessment(AssessmentOptions(session=create_session(account, REGION, archive), profile=account, region=REGION,
+                                         is_management=False, sinks=sinks, checks=CHECKS))
+    elapsed = time.perf_counter() - start
+    for sink in sinks:
+        sink.close()
+    return elapsed, counter.count
+
+def main():
+    '''
+    Print how long replaying the processing pipeline takes per account.
+    '''
+    accounts = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "responses.jsonl.gz")
+        with open(os.devnull, "w", encoding="utf-8") as devnull, route_stdout(devnull):
+            responses = record(path, accounts)
+            elapsed, findings = replay(path, accounts)
+    print(f"Recorded {responses} responses for {accounts} accounts")
+    print(f"Replayed {accounts} accounts in {elapsed * 1000:.0f} ms ({elapsed * 1000 / accounts:.1f} ms per account, {findings} findings)")
+
+if __name__ == "__main__":
+    main()
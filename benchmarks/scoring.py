@@ -0,0 +1,40 @@
+'''
+Maturity scoring benchmark. Fills an account x check matrix with random results and times score().
+benchmarks/scoring.py
+'''
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# pylint: disable=C0413
+from modules.maturity import MaturityMatrix, NOT_ASSESSED
+
+def main():
+    '''
+    Print how long scoring takes for a large organization.
+    '''
+    accounts = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    checks = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    rng = np.random.default_rng(0)
+
+    matrix = MaturityMatrix(accounts, checks)
+    matrix.accounts.extend(f"{i:012d}" for i in range(accounts))
+    matrix.checks.extend(f"check-{i}" for i in range(checks))
+    matrix.cells[:] = rng.integers(NOT_ASSESSED, 4, size=(accounts, checks), dtype=np.int8)
+    matrix.set_account_ous({account: f"ou-{i % 50}" for i, account in enumerate(matrix.accounts)})
+
+    timings = []
+    for _ in range(5):
+        start = time.perf_counter()
+        scores = matrix.score()
+        timings.append(time.perf_counter() - start)
+
+    print(f"Scored {accounts} accounts x {checks} checks in {min(timings) * 1000:.1f} ms (best of 5)")
+    print(f"Organization score: {scores.org_score * 100:.1f}% across {len(scores.ou_scores)} OUs")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+'''
+Per-account session cost benchmark. Creates a session per account and the clients a full scan uses, with botocore's
+default per-session loader and with the loader shared by create_session.
+benchmarks/session_cost.py
+'''
+import os
+import sys
+import time
+import tracemalloc
+
+import boto3
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# pylint: disable=C0413
+from modules.aws.session import create_botocore_session
+
+SERVICES = (
+    "sts", "iam", "support", "ce", "organizations", "config", "securityhub",
+    "inspector2", "guardduty", "macie2", "accessanalyzer", "controltower"
+)
+
+def default_session():
+    '''
+    A session with its own loader, as boto3.Session(profile_name=account) creates.
+    '''
+    return boto3.Session(aws_access_key_id="benchmark", aws_secret_access_key="benchmark", region_name="us-east-1")
+
+def shared_session():
+    '''
+    A session using the loader shared by every account.
+    '''
+    return boto3.Session(aws_access_key_id="benchmark", aws_secret_access_key="benchmark", region_name="us-east-1",
+                         botocore_session=create_botocore_session())
+
+def create_account(factory):
+    '''
+    Create a session and the clients a full scan uses.
+    '''
+    session = factory()
+    return [session.client(service) for service in SERVICES]
+
+def measure(factory, accounts):
+    '''
+    Time, then trace the memory of, creating a session and its clients for each account.
+    '''
+    # Warm up imports and anything cached per process
+    create_account(factory)
+    start = time.perf_counter()
+    for _ in range(accounts):
+        create_account(factory)
+    elapsed = time.perf_counter() - start
+
+    # Sessions are kept alive, as a --follow scan keeps each account's session for its checks
+    tracemalloc.start()
+    kept = [create_account(factory) for _ in range(accounts)]
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return elapsed / accounts, memory / accounts
+
+def main():
+    '''
+    Print the per-account cost of both approaches.
+    '''
+    accounts = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    for name, factory in (("per-session loader", default_session), ("shared loader", shared_session)):
+        seconds, memory = measure(factory, accounts)
+        print(f"{name:>18}: {seconds * 1000:6.1f} ms and {memory / 1024 / 1024:5.1f} MiB per account ({len(SERVICES)} clients)")
+
+if __name__ == "__main__":
+    main()
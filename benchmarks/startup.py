@@ -0,0 +1,56 @@
+'''
+Startup time benchmark for the AWS Assessment CLI. Compares a cold `--help` run against importing every
+checker and its dependencies up front, which is what every invocation used to pay for.
+benchmarks/startup.py
+'''
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+EAGER_IMPORTS = (
+    "import boto3, yaml, requests; "
+    "import modules.aws.account, modules.aws.iam, modules.aws.inspector, modules.aws.organizations, "
+    "modules.aws.controltower, modules.aws.config, modules.aws.securityhub, modules.aws.guardduty; "
+    "from modules.config import config; config.get('aws.profile')"
+)
+
+def time_command(command, runs):
+    '''
+    Run a command repeatedly in a fresh interpreter and return the wall clock time of each run.
+
+    Args:
+        command (list): The command to run
+        runs (int): Number of runs
+
+    Returns:
+        list: Seconds taken by each run
+    '''
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def main():
+    '''
+    Print the median cold start time for the lazy CLI and the eager baseline.
+    '''
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    lazy = time_command([sys.executable, "aws_assessment.py", "--help"], runs)
+    eager = time_command([sys.executable, "-c", EAGER_IMPORTS], runs)
+    interpreter = time_command([sys.executable, "-c", "pass"], runs)
+
+    lazy_ms = statistics.median(lazy) * 1000
+    eager_ms = statistics.median(eager) * 1000
+    print(f"Interpreter only:          {statistics.median(interpreter) * 1000:7.1f} ms")
+    print(f"aws_assessment.py --help:  {lazy_ms:7.1f} ms")
+    print(f"Eager imports (previous):  {eager_ms:7.1f} ms")
+    print(f"Cold start saved:          {eager_ms - lazy_ms:7.1f} ms ({(1 - lazy_ms / eager_ms) * 100:.0f}%)")
+
+if __name__ == "__main__":
+    main()
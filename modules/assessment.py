@@ -0,0 +1,179 @@
+'''
+This module is responsible for running the selected checks against a single account.
+modules/assessment.py
+'''
+import contextvars
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+from modules.checks import load_target, select_checks
+from modules.config import config
+from modules.findings import capture_findings
+
+DEFAULT_CHECK_BUDGET = 300
+DEFAULT_ACCOUNT_BUDGET = 1800
+
+if TYPE_CHECKING:
+    import boto3
+
+@dataclass
+class AssessmentOptions:
+    '''
+    Data class to hold assessment options.
+    '''
+    # pylint: disable=R0902
+    session: "boto3.Session"
+    profile: str
+    region: str
+    is_management: bool
+    include_org_checks: bool = True
+    include_control_tower: bool = False
+    sinks: list = field(default_factory=list)
+    checks: list = None
+    # State shared by every account in a run, e.g. member status collected by an administrator account
+    shared_state: dict = field(default_factory=dict)
+    account_id: str = None
+    # Monotonic time by which the whole run must finish, None for no limit
+    run_deadline: float = None
+    # "essential" stops at whether each service is enabled, "deep" adds the detailed checks
+    tier: str = "deep"
+
+    @property
+    def deep(self):
+        '''
+        True if the detailed checks should run.
+        '''
+        return self.tier == "deep"
+
+def _budget(name, default=None):
+    '''
+    Read a time budget in seconds from config.yaml, None or 0 meaning no limit.
+    '''
+    value = config.get(name, default)
+    return float(value) if value else None
+
+def _earliest(*deadlines):
+    deadlines = [deadline for deadline in deadlines if deadline is not None]
+    return min(deadlines) if deadlines else None
+
+def _run_with_deadline(func, arguments, deadline):
+    '''
+    Run a check in its own thread so it can be abandoned when its deadline passes.
+    The thread runs in a copy of the current context, so its output is still attributed to the running check.
+
+    Args:
+        func (callable): The check function
+        arguments (list): Arguments for the check
+        deadline (float): Monotonic time to give up at, None to wait as long as it takes.
+
+    Returns:
+        bool: True if the check finished in time, False if it was abandoned.
+    '''
+    outcome = {}
+
+    def target():
+        try:
+            func(*arguments)
+        except Exception as e:  # pylint: disable=W0718
+            outcome["error"] = e
+
+    thread = threading.Thread(target=contextvars.copy_context().run, args=(target,), name="check", daemon=True)
+    thread.start()
+    thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+    if thread.is_alive():
+        return False
+    if "error" in outcome:
+        raise outcome["error"]
+    return True
+
+def _skipped_calls(endpoint_health, profile):
+    '''
+    Describe the calls the endpoint health tracker answered without sending since the last check.
+    '''
+    for service, region, reason, calls in endpoint_health.drain_skipped(profile):
+        where = "all services" if service == "*" else service
+        yield f"Skipped {where} in {region}: {reason}, {calls} calls not sent", region
+
+def _print_skipped_calls(endpoint_health, profile):
+    '''
+    Print the calls skipped since the last check without attributing them to any check.
+    '''
+    for message, _ in _skipped_calls(endpoint_health, profile):
+        print(f"⏭ {message}")
+
+def run_assessment(options: AssessmentOptions):  # pylint: disable=R0914
+    '''
+    Runs the AWS assessment for a given profile.
+    Each check runs against a deadline: its own budget, capped by what is left of the account's and the run's budget.
+    A check that overruns is recorded as TIMEOUT with the findings it produced so far, and the next check starts on time.
+    A check that raises is recorded as ERROR and the next check runs as usual.
+
+    Args:
+        session (boto3.Session): Boto3 session object
+        profile (str): AWS profile name
+        region (str): AWS region
+        is_management (bool): True if the account is the management account, False otherwise.
+        include_org_checks (bool): True to include AWS Organizations checks, False otherwise.
+        include_control_tower (bool): True to include AWS Control Tower checks, False otherwise.
+        sinks (list): Finding sinks that receive each finding as soon as it is produced.
+        checks (list): Names of the checks to run. All checks run if not given.
+        shared_state (dict): State shared by every account in the run.
+        run_deadline (float): Monotonic time by which the whole run must finish.
+        tier (str): "essential" or "deep".
+
+    Returns:
+        None
+    '''
+    get_account_id = load_target("modules.aws.account:get_account_id")
+    endpoint_health = load_target("modules.aws.breaker:get_endpoint_health")()
+    check_budget = _budget("deadlines.check", DEFAULT_CHECK_BUDGET)
+    check_budgets = config.get("deadlines.checks", {}) or {}
+    account_budget = _budget("deadlines.account", DEFAULT_ACCOUNT_BUDGET)
+    account_deadline = _earliest(time.monotonic() + account_budget if account_budget else None, options.run_deadline)
+
+    options.session.deadline = account_deadline
+    aws_account_id = get_account_id(options.session)
+    options.account_id = aws_account_id
+    print(f"\n🔍 Running assessment for profile: {options.profile}, {aws_account_id}, {options.region} \n")
+    # Calls skipped before the first check, e.g. while discovering the organization, belong to no check
+    _print_skipped_calls(endpoint_health, options.profile)
+
+    for check in select_checks(options.checks, options.tier):
+        if check.condition and not getattr(options, check.condition):
+            continue
+        if check.label:
+            print(f"\n🔍 {check.label}...")
+
+        budget = float(check_budgets[check.name]) if check_budgets.get(check.name) else check_budget
+        deadline = _earliest(time.monotonic() + budget if budget else None, account_deadline)
+        with capture_findings(aws_account_id, options.profile, check.name, options.sinks) as capture:
+            if deadline is not None and deadline <= time.monotonic():
+                completed = False
+                capture.emit("TIMEOUT", f"{check.name}: not started, the account or run time budget is spent")
+            else:
+                func = check.load()
+                options.session.deadline = deadline
+                started = time.monotonic()
+                try:
+                    completed = _run_with_deadline(func, [getattr(options, argument) for argument in check.arguments], deadline)
+                except Exception as e:  # pylint: disable=W0718
+                    # An unexpected response or a bug in one check must not stop the checks after it
+                    completed = True
+                    capture.emit("ERROR", f"{check.name}: failed with {type(e).__name__}: {str(e)}")
+                if not completed:
+                    capture.emit("TIMEOUT", f"{check.name}: timed out after {time.monotonic() - started:.0f}s, findings so far are kept")
+                    # The abandoned check keeps the old session and fails on its next request
+                    options.session = options.session.renew()
+                options.session.deadline = account_deadline
+
+            if completed:
+                _print_skipped_calls(endpoint_health, options.profile)
+            else:
+                for message, region in _skipped_calls(endpoint_health, options.profile):
+                    capture.emit("SKIPPED", message, region)
+                # Anything the abandoned check prints from now on is dropped
+                capture.close()
+        if not completed:
+            print(f"⏱ {check.name} did not finish within its time budget")
+    options.session.deadline = None
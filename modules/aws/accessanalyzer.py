@@ -0,0 +1,108 @@
+'''
+This module is responsible for validating IAM Access Analyzer settings across all enabled regions.
+modules/aws/accessanalyzer.py
+'''
+from concurrent.futures import ThreadPoolExecutor
+import botocore.exceptions
+from modules.aws.regions import get_enabled_regions
+
+EXTERNAL_ACCESS_TYPES = ("ACCOUNT", "ORGANIZATION")
+UNUSED_ACCESS_TYPES = ("ACCOUNT_UNUSED_ACCESS", "ORGANIZATION_UNUSED_ACCESS")
+
+def count_active_findings(client, analyzer_arn):
+    '''
+    Count an analyzer's active findings. The status filter is applied server side so only active finding IDs are returned.
+    '''
+    paginator = client.get_paginator("list_findings_v2")
+    pages = paginator.paginate(
+        analyzerArn=analyzer_arn,
+        filter={"status": {"eq": ["ACTIVE"]}},
+        PaginationConfig={"PageSize": 100}
+    )
+    return sum(len(page.get("findings", [])) for page in pages)
+
+def get_region_analyzers(session, region, deep=True):
+    '''
+    Retrieve every analyzer in a region, with its archive rules and active finding count in a deep scan.
+
+    Returns:
+        tuple: (region, list of analyzer dicts, error message or None)
+    '''
+    client = session.client("accessanalyzer", region_name=region)
+
+    try:
+        analyzers = []
+        for page in client.get_paginator("list_analyzers").paginate():
+            analyzers.extend(page.get("analyzers", []))
+
+        for analyzer in analyzers if deep else []:
+            rules = []
+            for page in client.get_paginator("list_archive_rules").paginate(analyzerName=analyzer["name"]):
+                rules.extend(rule["ruleName"] for rule in page.get("archiveRules", []))
+            analyzer["archiveRules"] = rules
+            analyzer["activeFindings"] = count_active_findings(client, analyzer["arn"]) if analyzer.get("status") == "ACTIVE" else 0
+        return region, analyzers, None
+    except botocore.exceptions.ClientError as e:
+        return region, [], e.response["Error"]["Message"]
+    except botocore.exceptions.BotoCoreError as e:
+        return region, [], str(e)
+
+def print_analyzer(analyzer, region):
+    '''
+    Print the configuration of a single analyzer.
+    '''
+    status = analyzer.get("status", "UNKNOWN")
+    unused = analyzer.get("configuration", {}).get("unusedAccess", {})
+    line = f"{status}, {analyzer['activeFindings']} active findings"
+    if unused:
+        line += f", unused access age {unused.get('unusedAccessAge', 'Unknown')} days"
+    # The status and counts follow the colon so the setting name stays the same when they change
+    print(f"{'✔' if status == 'ACTIVE' else '⚠'} {analyzer['name']} in {region} ({analyzer['type']}): {line}")
+
+    if analyzer["type"] in UNUSED_ACCESS_TYPES:
+        exclusions = unused.get("analysisRule", {}).get("exclusions", [])
+        excluded_accounts = sorted({account for exclusion in exclusions for account in exclusion.get("accountIds", [])})
+        excluded_tags = [tag for exclusion in exclusions for tag in exclusion.get("resourceTags", [])]
+        print(f"  - Excluded Accounts: {len(excluded_accounts)}")
+        for account in excluded_accounts:
+            print(f"    - {account}")
+        print(f"  - Excluded IAM Users and Roles (by tag): {len(excluded_tags)}")
+    rules = analyzer["archiveRules"]
+    print(f"  - Archive rules: {len(rules)}")
+    for rule in sorted(rules):
+        print(f"    - {rule}")
+
+def validate_access_analyzer(session, deep=True, max_workers=8):
+    '''
+    Validate IAM Access Analyzer external and unused access monitoring in every enabled region.
+    Regions are queried concurrently and reported once all have completed. Each analyzer's archive rules
+    and active findings are only retrieved in a deep scan.
+    '''
+    regions = get_enabled_regions(session)
+    # Create clients up front, client creation is not thread safe
+    for region in regions:
+        session.client("accessanalyzer", region_name=region)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(lambda region: get_region_analyzers(session, region, deep), regions))
+
+    failed = [(region, error) for region, _, error in results if error]
+    external = [(region, analyzer) for region, analyzers, _ in results for analyzer in analyzers if analyzer["type"] in EXTERNAL_ACCESS_TYPES]
+    unused = [(region, analyzer) for region, analyzers, _ in results for analyzer in analyzers if analyzer["type"] in UNUSED_ACCESS_TYPES]
+
+    external_regions = {region for region, _ in external}
+    missing = [region for region, _, error in results if not error and region not in external_regions]
+    # Regions that could not be queried are not verified, so they count against the total rather than passing
+    print(f"{'✔' if len(external_regions) == len(regions) else '⚠'} External Access monitoring enabled in {len(external_regions)}/{len(regions)} regions")
+    if missing:
+        print(f"  - Not enabled: {', '.join(missing)}")
+    if failed:
+        print(f"  - Not verified: {', '.join(region for region, _ in failed)}")
+    print(f"{'✔' if unused else '⚠'} Unused Access monitoring enabled: {bool(unused)}")
+
+    for region, error in failed:
+        print(f"❌ AWS API error (Access Analyzer - {region}): {error}")
+    if not deep:
+        return
+    for region, analyzer in sorted(external + unused, key=lambda item: (item[0], item[1]["name"])):
+        print_analyzer(analyzer, region)
@@ -37,12 +37,12 @@ def validate_account(session):
         account_info = client.get_contact_information()
         if "ContactInformation" in account_info:
             contact = account_info["ContactInformation"]
-            print(f"✔ Account Contact Found - Full Name: {contact.get('FullName', 'N/A')}")
+            print(f"✔ Account Contact Information: {contact.get('FullName', 'N/A')}")
             print(f"  Company: {contact.get('CompanyName', 'N/A')}")
             print(f"  Address: {contact.get('AddressLine1', 'N/A')} {contact.get('AddressLine2', '')}, {contact.get('City', 'N/A')}, {contact.get('StateOrRegion', 'N/A')}, {contact.get('CountryCode', 'N/A')}, {contact.get('PostalCode', 'N/A')}")
             print(f"  Phone: {contact.get('PhoneNumber', 'N/A')}")
         else:
-            print("❌ Account Contact Information not found.")
+            print("❌ Account Contact Information: not found")
 
         # Fetch Alternate Contact Types
         contact_types = ["BILLING", "OPERATIONS", "SECURITY"]
@@ -0,0 +1,261 @@
+'''
+This module is responsible for remembering dead endpoints so scans skip them instead of paying for every request.
+A negative cache holds results that will not change soon, such as a service that is not subscribed or a region that
+is not enabled, and a circuit breaker stops calling an endpoint after repeated connection or access failures.
+modules/aws/breaker.py
+'''
+import threading
+import time
+from collections import defaultdict
+
+import botocore.exceptions
+from botocore.awsrequest import AWSResponse
+
+from modules.config import config
+
+# Error codes meaning the service is not available to the account in that region, whatever the operation
+UNAVAILABLE_SERVICE_CODES = {
+    "InvalidAccessException": "not subscribed",
+    "SubscriptionRequiredException": "subscription required"
+}
+# Error codes returned by every service in an opt-in region that is not enabled for the account. AWS also returns them
+# for invalid or expired credentials, so they are only trusted once EC2 confirms the region is not opted in.
+DISABLED_REGION_CODES = {
+    "UnrecognizedClientException": "region not enabled",
+    "InvalidClientTokenId": "region not enabled",
+    "AuthFailure": "region not enabled",
+    "OptInRequired": "opt-in required"
+}
+# Error codes counted by the circuit breaker. IAM denies single operations, so these only open the circuit of
+# the operation that was denied, while connection errors open the circuit of the whole endpoint.
+ACCESS_FAILURE_CODES = ("AccessDenied", "AccessDeniedException")
+CONNECTION_ERRORS = (
+    botocore.exceptions.EndpointConnectionError,
+    botocore.exceptions.ConnectTimeoutError,
+    botocore.exceptions.ReadTimeoutError,
+    botocore.exceptions.ConnectionClosedError
+)
+ANY_SERVICE = "*"
+CONTEXT_KEY = "aws_assess_endpoint"
+NOT_OPTED_IN = "not-opted-in"
+
+DEFAULT_NEGATIVE_TTL = 3600
+DEFAULT_FAILURE_THRESHOLD = 3
+DEFAULT_COOLDOWN = 300
+
+class EndpointHealth:
+    '''
+    Tracks the health of every (account, service, region) endpoint across all sessions in the run.
+    Calls to a known-dead endpoint are answered immediately from a dictionary lookup with the same error AWS
+    returned, so the checkers handle them exactly as before. Skipped calls are counted so they can be reported.
+    '''
+    # pylint: disable=R0902
+    def __init__(self, negative_ttl=DEFAULT_NEGATIVE_TTL, failure_threshold=DEFAULT_FAILURE_THRESHOLD, cooldown=DEFAULT_COOLDOWN):
+        '''
+        Initialize an empty cache.
+
+        Args:
+            negative_ttl (float): Seconds a not subscribed or not enabled result is trusted for.
+            failure_threshold (int): Consecutive connection or access failures that open the circuit.
+            cooldown (float): Seconds an open circuit waits before letting a single trial call through.
+
+        Returns:
+            None
+        '''
+        self.negative_ttl = negative_ttl
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        # (profile, service, region) to (expires at, error code, message)
+        self._negative = {}
+        # (profile, service, region) for connection failures, or (profile, service, region, operation) for access
+        # failures, to consecutive failures
+        self._failures = defaultdict(int)
+        # Same keys to (retry at, error code or None for a connection error, message)
+        self._open = {}
+        # (profile, service, region) to [reason, skipped calls]
+        self._skipped = {}
+        # Profile to (expires at, regions not opted in)
+        self._opted_out = {}
+        self._lock = threading.Lock()
+        self._opt_in_lock = threading.Lock()
+        self._looking_up = threading.local()
+
+    def attach(self, session, profile):
+        '''
+        Register the handlers on a boto3 session. Must be called before clients are created, and before any
+        record/replay archive is attached so skipped calls are never recorded.
+
+        Args:
+            session (boto3.Session): Boto3 session object
+            profile (str): AWS profile name the endpoints belong to
+
+        Returns:
+            None
+        '''
+        def before_call(params, model, context, **_kwargs):
+            key = (str(profile), model.service_model.service_name, context.get("client_region"))
+            response = self._short_circuit(key, params.get("url"), model)
+            if response is None:
+                context[CONTEXT_KEY] = (key, model.name)
+            return response
+
+        def after_call(http_response, parsed, context, **_kwargs):
+            # Skipped calls carry no endpoint key, there is nothing new to learn from them
+            if CONTEXT_KEY not in context or http_response is None:
+                return
+            key, operation = context[CONTEXT_KEY]
+            error = parsed.get("Error", {}) if http_response.status_code >= 300 else {}
+            code = error.get("Code")
+            if code in DISABLED_REGION_CODES and key[2] not in self._regions_not_opted_in(session, key[0]):
+                # Most likely bad credentials rather than a disabled region, which must not block the region
+                return
+            self._record(key, operation, code, error.get("Message", ""))
+
+        def after_call_error(exception, context, **_kwargs):
+            if CONTEXT_KEY in context and isinstance(exception, CONNECTION_ERRORS):
+                self._record_connection_failure(context[CONTEXT_KEY][0], exception)
+
+        session.events.register("before-call", before_call)
+        session.events.register("after-call", after_call)
+        session.events.register("after-call-error", after_call_error)
+
+    def _regions_not_opted_in(self, session, profile):
+        '''
+        The opt-in regions the account has not enabled, from the OptInStatus of EC2 DescribeRegions.
+        Looked up once per profile and trusted for negative_ttl. Empty if the regions cannot be listed, in which case
+        the lookup is retried after cooldown.
+        '''
+        # The lookup is itself a call through this tracker, it must not start another lookup
+        if getattr(self._looking_up, "active", False):
+            return frozenset()
+        with self._opt_in_lock:
+            entry = self._opted_out.get(profile)
+            if entry is not None and entry[0] > time.monotonic():
+                return entry[1]
+            self._looking_up.active = True
+            try:
+                regions = session.client("ec2").describe_regions(AllRegions=True).get("Regions", [])
+                opted_out = frozenset(region["RegionName"] for region in regions if region.get("OptInStatus") == NOT_OPTED_IN)
+                ttl = self.negative_ttl
+            except (botocore.exceptions.ClientError, botocore.exceptions.BotoCoreError):
+                opted_out, ttl = frozenset(), self.cooldown
+            finally:
+                self._looking_up.active = False
+            self._opted_out[profile] = (time.monotonic() + ttl, opted_out)
+            return opted_out
+
+    def _short_circuit(self, key, url, model):
+        '''
+        Answer a call to a dead endpoint without sending it.
+        '''
+        profile, _, region = key
+        now = time.monotonic()
+        with self._lock:
+            for cache_key in (key, (profile, ANY_SERVICE, region)):
+                entry = self._negative.get(cache_key)
+                if entry is None:
+                    continue
+                if entry[0] <= now:
+                    del self._negative[cache_key]
+                    continue
+                code = entry[1]
+                reason = UNAVAILABLE_SERVICE_CODES.get(code) or DISABLED_REGION_CODES.get(code)
+                self._count_skip(cache_key, f"{reason} ({code})")
+                return _error_response(url, entry[1], entry[2])
+
+            for circuit_key in (key, key + (model.name,)):
+                circuit = self._open.get(circuit_key)
+                if circuit is None:
+                    continue
+                if circuit[0] <= now:
+                    # Half open: let this call through as a trial and hold the others back for another cooldown
+                    self._open[circuit_key] = (now + self.cooldown, circuit[1], circuit[2])
+                    return None
+                failures = "failures" if circuit_key == key else f"access denials of {model.name}"
+                self._count_skip(circuit_key, f"circuit open after {self.failure_threshold} {failures}")
+                break
+            else:
+                return None
+
+        if isinstance(circuit[1], str):
+            return _error_response(url, circuit[1], circuit[2])
+        raise botocore.exceptions.EndpointConnectionError(endpoint_url=url or model.name)
+
+    def _count_skip(self, key, reason):
+        skipped = self._skipped.setdefault(key, [reason, 0])
+        skipped[0] = reason
+        skipped[1] += 1
+
+    def _record(self, key, operation, code, message):
+        '''
+        Learn from a response: cache dead services and regions, count access failures of the operation and reset on
+        anything else.
+        '''
+        profile, _, region = key
+        with self._lock:
+            if code in UNAVAILABLE_SERVICE_CODES:
+                self._negative[key] = (time.monotonic() + self.negative_ttl, code, message)
+            elif code in DISABLED_REGION_CODES:
+                self._negative[(profile, ANY_SERVICE, region)] = (time.monotonic() + self.negative_ttl, code, message)
+            elif code in ACCESS_FAILURE_CODES:
+                self._fail(key + (operation,), code, message)
+            else:
+                # Any other answer means the endpoint is reachable and the operation is allowed
+                for circuit_key in (key, key + (operation,)):
+                    self._failures.pop(circuit_key, None)
+                    self._open.pop(circuit_key, None)
+
+    def _record_connection_failure(self, key, exception):
+        with self._lock:
+            self._fail(key, exception, str(exception))
+
+    def _fail(self, key, error, message):
+        self._failures[key] += 1
+        if self._failures[key] >= self.failure_threshold:
+            self._open[key] = (time.monotonic() + self.cooldown, error if isinstance(error, str) else None, message)
+
+    def drain_skipped(self, profile):
+        '''
+        Return and forget the calls skipped for an account since the last drain.
+
+        Args:
+            profile (str): AWS profile name
+
+        Returns:
+            list: (service, region, reason, skipped calls) tuples
+        '''
+        with self._lock:
+            keys = [key for key in self._skipped if key[0] == str(profile)]
+            return [(key[1], key[2], *self._skipped.pop(key)) for key in sorted(keys, key=str)]
+
+def _error_response(url, code, message):
+    '''
+    Build a response botocore turns into the same ClientError the service returned.
+    '''
+    http_response = AWSResponse(url, 400, {}, None)
+    parsed = {
+        "Error": {"Code": code, "Message": message},
+        "ResponseMetadata": {"HTTPStatusCode": 400, "HTTPHeaders": {}, "RetryAttempts": 0}
+    }
+    return http_response, parsed
+
+_endpoint_health = None  # pylint: disable=C0103
+
+def get_endpoint_health():
+    '''
+    Return the endpoint health tracker shared by every session, configured from the breaker settings in config.yaml.
+
+    Args:
+        None
+
+    Returns:
+        EndpointHealth: The shared tracker
+    '''
+    global _endpoint_health  # pylint: disable=W0603
+    if _endpoint_health is None:
+        _endpoint_health = EndpointHealth(
+            negative_ttl=float(config.get("breaker.negative_ttl", DEFAULT_NEGATIVE_TTL)),
+            failure_threshold=int(config.get("breaker.failure_threshold", DEFAULT_FAILURE_THRESHOLD)),
+            cooldown=float(config.get("breaker.cooldown", DEFAULT_COOLDOWN))
+        )
+    return _endpoint_health
@@ -35,7 +35,7 @@ def validate_aws_config(session, is_management_account=True):
                 aggregator_name = org_aggregators[0].get("ConfigurationAggregatorName", "Unknown")
                 print(f"✔ AWS Config Aggregator Found: {aggregator_name} (Organization-level)")
             else:
-                print("⚠ No AWS Config Aggregator found with organization-level aggregation")
+                print("⚠ No AWS Config Aggregator found: organization-level aggregation is not configured")
 
     except botocore.exceptions.ClientError as e:
         print(f"❌ AWS API Client error (Config): {e.response['Error']['Message']}")
@@ -2,7 +2,13 @@
 This module is responsible for validating AWS Control Tower settings in the management account.
 modules/aws/controltower.py
 '''
+from concurrent.futures import ThreadPoolExecutor
 import botocore.exceptions
+from modules.aws.organizations import get_ou_tree
+from modules.aws.policy import trusted_accounts
+
+# Identifier of the AWSControlTowerBaseline, enabled on every OU registered with Control Tower
+CONTROL_TOWER_BASELINE_ID = "17BSJV3IGJ2QSGA2"
 
 def check_controltower_service_enabled(session):
     '''
@@ -15,25 +21,12 @@ def check_controltower_service_enabled(session):
 
     try:
         # Check if the AWSControlTowerExecution role exists
-        iam.get_role(RoleName="AWSControlTowerExecution")
+        role = iam.get_role(RoleName="AWSControlTowerExecution")["Role"]
         print("✔ AWSControlTowerExecution role found.")
 
-        # Check trust policy to find managing account
-        trust_policy = iam.get_role(RoleName="AWSControlTowerExecution")["Role"]["AssumeRolePolicyDocument"]
-        # print(f"DEBUG: Trust Policy: {trust_policy}")
-
-        statements = trust_policy.get("Statement", [])
-        for stmt in statements:
-            principal = stmt.get("Principal", {})
-            if isinstance(principal, dict) and "AWS" in principal:
-                arn = principal["AWS"]
-                if isinstance(arn, str) and ":iam::" in arn:
-                    # Extract AWS account ID from ARN
-                    parts = arn.split(":")
-                    if len(parts) > 4:
-                        return True, parts[4]
-
-        return True, None
+        # The trust policy names the managing account
+        accounts = trusted_accounts(role["AssumeRolePolicyDocument"])
+        return True, accounts[0] if accounts else None
 
     except iam.exceptions.NoSuchEntityException:
         return False, None
@@ -47,29 +40,43 @@ def check_controltower_service_enabled(session):
 def get_landing_zone_info(client):
     '''
     Retrieve Control Tower landing zone information.
+
+    Returns:
+        tuple: (landing zone ARN, home region, landing zone details), or (None, None, None) if there is no landing zone.
     '''
-    landing_zones = client.list_landing_zones()
-    if not landing_zones.get("LandingZones"):
+    landing_zones = client.list_landing_zones().get("landingZones", [])
+    if not landing_zones:
         return None, None, None
-    landing_zone = landing_zones["LandingZones"][0]
-    return landing_zone["LandingZoneIdentifier"], landing_zone.get("HomeRegion", "UNKNOWN"), landing_zone.get("RootId", None)
+    landing_zone_arn = landing_zones[0]["arn"]
+    landing_zone = client.get_landing_zone(landingZoneIdentifier=landing_zone_arn).get("landingZone", {})
+    return landing_zone_arn, landing_zone_arn.split(":")[3], landing_zone
 
-def get_enrolled_accounts(ou_client):
+def get_registered_ous(client):
     '''
-    Retrieve enrolled AWS accounts.
+    Retrieve the ARNs of the OUs registered with Control Tower, i.e. those with the AWSControlTowerBaseline enabled.
     '''
-    accounts = ou_client.list_accounts()
-    enrolled_accounts = [acc for acc in accounts["Accounts"] if acc["Status"] == "ACTIVE"]
-    return len(enrolled_accounts), len(accounts["Accounts"])
-
-def get_control_settings(client, landing_zone_id):
+    registered = set()
+    for page in client.get_paginator("list_enabled_baselines").paginate():
+        for baseline in page.get("enabledBaselines", []):
+            if baseline.get("baselineIdentifier", "").endswith(f"baseline/{CONTROL_TOWER_BASELINE_ID}"):
+                registered.add(baseline["targetIdentifier"])
+    return registered
+
+def get_enabled_controls(client, target_arns, max_workers=8):
     '''
-    Retrieve various control settings.
+    Retrieve the enabled controls of every target OU, listing the targets concurrently.
+
+    Returns:
+        dict: OU ARN to a list of enabled control identifiers.
     '''
-    landing_zone_regions = client.list_landing_zone_regions(LandingZoneIdentifier=landing_zone_id)
-    controls = client.list_enabled_controls(LandingZoneIdentifier=landing_zone_id)
-    region_deny_enabled = any(control["ControlIdentifier"] == "AWS-REGIONS_DENY" for control in controls["EnabledControls"])
-    return len(landing_zone_regions['Regions']), region_deny_enabled
+    def list_controls(target_arn):
+        controls = []
+        for page in client.get_paginator("list_enabled_controls").paginate(targetIdentifier=target_arn):
+            controls.extend(control["controlIdentifier"] for control in page.get("enabledControls", []))
+        return target_arn, controls
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(executor.map(list_controls, target_arns))
 
 def check_security_services(session):
     '''
@@ -89,9 +96,10 @@ def check_security_services(session):
 
     return cloudtrail_enabled, identity_center_enabled, backup_enabled
 
-def validate_control_tower(session):
+def validate_control_tower(session, deep=True):
     '''
     Validate AWS Control Tower settings.
+    An essential scan stops at the landing zone; a deep scan also crawls the OUs, their controls and the security services.
     '''
     print("\n🔍 Validating AWS Control Tower...")
 
@@ -104,57 +112,69 @@ def validate_control_tower(session):
     if managing_account:
         print(f"✔ This account is managed by Control Tower management account: {managing_account}")
 
-    # Validate landing zones
     client = session.client("controltower")
 
     try:
-        response = client.list_landing_zones()
-        landing_zones = response.get("landingZones", [])
-        if landing_zones:
-            print(f"✔ Landing Zones found: {len(landing_zones)}")
-        else:
-            print("⚠ No Landing Zones found in Control Tower.")
+        landing_zone_arn, home_region, landing_zone = get_landing_zone_info(client)
+        if not landing_zone_arn:
+            print("⚠ Control Tower Landing Zone Identifier: no Landing Zones found")
+            return
+
+        print(f"✔ Control Tower Landing Zone Identifier: {landing_zone_arn}")
+        print(f"✔ Control Tower Home Region: {home_region}")
+        print(f"{'✔' if landing_zone.get('status') == 'ACTIVE' else '⚠'} Landing Zone Version: {landing_zone.get('version', 'Unknown')} ({landing_zone.get('status', 'Unknown')})")
+        print(f"{'✔' if landing_zone.get('driftStatus', {}).get('status') == 'IN_SYNC' else '⚠'} Landing Zone Drift Status: {landing_zone.get('driftStatus', {}).get('status', 'Unknown')}")
+
+        # Baselines and controls are only served from the home region
+        if home_region != session.region_name:
+            client = session.client("controltower", region_name=home_region)
+
+        governed_regions = landing_zone.get("manifest", {}).get("governedRegions", [])
+        print(f"✔ Governed Regions: {len(governed_regions)}")
+        for region in sorted(governed_regions):
+            print(f"  - {region}")
+        if not deep:
+            return
+
+        validate_organizational_units(session, client)
+
+        cloudtrail_enabled, identity_center_enabled, backup_enabled = check_security_services(session)
+        print(f"{'✔' if cloudtrail_enabled else '⚠'} AWS CloudTrail Enabled: {cloudtrail_enabled}")
+        print(f"{'✔' if identity_center_enabled else '⚠'} AWS IAM Identity Center Enabled: {identity_center_enabled}")
+        print(f"{'✔' if backup_enabled else '⚠'} AWS Backup Enabled: {backup_enabled}")
+
     except botocore.exceptions.ClientError as e:
         print(f"❌ AWS API Client error (Control Tower): {e.response['Error']['Message']}")
     except botocore.exceptions.BotoCoreError as e:
         print(f"❌ BotoCore error (Control Tower): {str(e)}")
 
-# pylint: disable=R0914
-# def validate_control_tower(session):
-#     '''
-#     Validate AWS Control Tower settings.
-#     '''
-#     client = session.client("controltower")
-#     try:
-#         if not check_controltower_service_enabled(session):
-#             print("⚠ AWS Control Tower Service is NOT Enabled")
-#             return
-#         print("✔ AWS Control Tower Service is Enabled")
-
-#         landing_zone_id, home_region, root_id = get_landing_zone_info(client)
-#         if not landing_zone_id:
-#             print("⚠ No Landing Zones found in Control Tower.")
-#             return
-
-#         print(f"✔ Control Tower Landing Zone Identifier: {landing_zone_id}")
-#         print(f"✔ Control Tower Home Region: {home_region}")
-
-#         ou_client = session.client("organizations")
-#         registered_ous = ou_client.list_organizational_units_for_parent(ParentId=root_id)
-#         enrolled_count, total_accounts = get_enrolled_accounts(ou_client)
-#         managed_regions, region_deny_enabled = get_control_settings(client, landing_zone_id)
-#         cloudtrail_enabled, identity_center_enabled, backup_enabled = check_security_services(session)
-
-#         print(f"✔ Registered Organizational Units (OUs): {len(registered_ous['OrganizationalUnits'])}")
-#         print(f"✔ Enrolled Accounts: {enrolled_count}/{total_accounts}")
-#         print(f"✔ Managed Landing Zone Regions: {managed_regions}")
-#         print(f"✔ Region Deny Control Enabled: {region_deny_enabled}")
-#         print(f"✔ AWS CloudTrail Enabled: {cloudtrail_enabled}")
-#         print(f"✔ AWS IAM Identity Center Enabled: {identity_center_enabled}")
-#         print(f"✔ AWS Backup Enabled: {backup_enabled}")
-
-#     except botocore.exceptions.ClientError as e:
-#         print(f"❌ AWS API Client error (Control Tower): {e.response['Error']['Message']}")
-#         print(f"DEBUG: Full error response: {e.response}")
-#     except botocore.exceptions.BotoCoreError as e:
-#         print(f"❌ BotoCore error: {str(e)}")
+def validate_organizational_units(session, client):
+    '''
+    Report OU registration, enrolled accounts and enabled controls from a single in-memory OU tree.
+    '''
+    root_id, nodes = get_ou_tree(session)
+    if not root_id:
+        return
+
+    units = [node for node in nodes.values() if node["Id"] != root_id]
+    registered_arns = get_registered_ous(client)
+    registered = [node for node in units if node["Arn"] in registered_arns]
+    controls = get_enabled_controls(client, [node["Arn"] for node in registered])
+
+    # Accounts directly under Root, the management account among them, cannot be enrolled so they are not counted
+    all_accounts = [account for node in units for account in node["Accounts"] if account.get("Status") == "ACTIVE"]
+    enrolled = {node["Id"]: [account for account in node["Accounts"] if account.get("Status") == "ACTIVE"] for node in registered}
+    enrolled_count = sum(len(accounts) for accounts in enrolled.values())
+    region_deny_enabled = any(control.endswith("REGION_DENY") for ou_controls in controls.values() for control in ou_controls)
+
+    print(f"{'✔' if len(registered) == len(units) else '⚠'} Registered Organizational Units (OUs): {len(registered)}/{len(units)}")
+    for node in sorted(registered, key=lambda n: n["Name"] or ""):
+        print(f"  - {node['Name']}: {len(enrolled[node['Id']])} accounts, {len(controls.get(node['Arn'], []))} enabled controls")
+    unregistered = [node for node in units if node["Arn"] not in registered_arns]
+    if unregistered:
+        print("  Organizational Units not registered with Control Tower:")
+        for node in sorted(unregistered, key=lambda n: n["Name"] or ""):
+            print(f"  - {node['Name']} ({node['Id']})")
+
+    print(f"{'✔' if enrolled_count == len(all_accounts) else '⚠'} Enrolled Accounts: {enrolled_count}/{len(all_accounts)}")
+    print(f"{'✔' if region_deny_enabled else '⚠'} Region Deny Control Enabled: {region_deny_enabled}")
@@ -4,6 +4,25 @@ modules/aws/guardduty.py
 '''
 # import json
 import botocore.exceptions
+from modules.findings import set_region
+
+# Data source path in GetDetector to the name the protection is reported under
+PROTECTIONS = (
+    (("CloudTrail",), "CloudTrail Monitoring"),
+    (("DNSLogs",), "DNS Logs Monitoring"),
+    (("FlowLogs",), "VPC Flow Logs Monitoring"),
+    (("S3Logs",), "S3 Protection"),
+    (("Kubernetes", "AuditLogs"), "EKS Protection"),
+    (("MalwareProtection", "ScanEc2InstanceWithFindings", "EbsVolumes"), "Malware Protection")
+)
+
+def _protection_status(coverage, path):
+    '''
+    Status of one data source in the detector's DataSources, DISABLED if it is not reported.
+    '''
+    for name in path:
+        coverage = coverage.get(name, {})
+    return coverage.get("Status", "DISABLED")
 
 def validate_guardduty(session):
     '''
@@ -15,11 +34,12 @@ def validate_guardduty(session):
     checked_regions = set()
 
     def perform_check(region_to_check):
+        set_region(region_to_check)
         try:
             client = session.client("guardduty", region_name=region_to_check)
             detectors = client.list_detectors()["DetectorIds"]
             if not detectors:
-                print(f"⚠ No GuardDuty detectors found in {region_to_check}.")
+                print(f"⚠ GuardDuty is NOT Enabled in {region_to_check}: no detectors found")
                 return
 
             detector_id = detectors[0]
@@ -32,15 +52,11 @@ def validate_guardduty(session):
             frequency = response.get("FindingPublishingFrequency", "UNKNOWN")
             print(f"✔ Consolidation (Enable): {frequency}")
 
-            # Service coverage check
+            # Service coverage check, one finding per protection so each can be tracked across runs
             coverage = response.get("DataSources", {})
-            print("✔ GuardDuty Service Coverage:")
-            print(f"  - CloudTrail: {coverage.get('CloudTrail', {}).get('Status', 'DISABLED')}")
-            print(f"  - DNSLogs: {coverage.get('DNSLogs', {}).get('Status', 'DISABLED')}")
-            print(f"  - FlowLogs: {coverage.get('FlowLogs', {}).get('Status', 'DISABLED')}")
-            print(f"  - S3Logs: {coverage.get('S3Logs', {}).get('Status', 'DISABLED')}")
-            print(f"  - Kubernetes: {coverage.get('Kubernetes', {}).get('AuditLogs', {}).get('Status', 'DISABLED')}")
-            print(f"  - MalwareProtection: {coverage.get('MalwareProtection', {}).get('ScanEc2InstanceWithFindings', {}).get('EbsVolumes', {}).get('Status', 'DISABLED')}")
+            for path, name in PROTECTIONS:
+                status = _protection_status(coverage, path)
+                print(f"{'✔' if status == 'ENABLED' else '⚠'} GuardDuty {name}: {status}")
 
         except botocore.exceptions.ClientError as e:
             print(f"❌ AWS API Client error (GuardDuty - {region_to_check}): {e.response['Error']['Message']}")
@@ -55,5 +71,6 @@ def validate_guardduty(session):
     for r in us_regions:
         if r not in checked_regions:
             perform_check(r)
+    set_region(None)
 
     session = None
@@ -29,7 +29,7 @@ def check_password_policy(client):
             else:
                 print(f"👀 Password Expiration: {expire_days} days (Should be 90)")
         else:
-            print("⚠ Password Expiration is not enforced!")
+            print("⚠ Password Expiration: not enforced")
 
         reuse_prevention = policy.get("PasswordReusePrevention", 0)
         print(f"{'✔' if reuse_prevention >= 24 else '⚠'} Password Reuse Prevention: {reuse_prevention} passwords")
@@ -0,0 +1,218 @@
+'''
+This module is responsible for validating Amazon Macie settings. When run from the Macie administrator account it
+collects every member's status at once, so member account scans can skip Macie entirely.
+modules/aws/macie.py
+'''
+from concurrent.futures import ThreadPoolExecutor
+import botocore.exceptions
+from modules.aws.organizations import get_delegated_admins
+from modules.aws.regions import get_enabled_regions
+from modules.findings import set_region
+
+SERVICE_PRINCIPAL = "macie.amazonaws.com"
+
+def list_all(client, operation, key, **kwargs):
+    '''
+    Retrieve every item of a paginated Macie operation.
+    '''
+    items = []
+    for page in client.get_paginator(operation).paginate(**kwargs):
+        items.extend(page.get(key, []))
+    return items
+
+def get_region_status(session, region, deep=True):
+    '''
+    Retrieve the Macie configuration of a region. Organization settings and members are only
+    available to the Macie administrator account and are left empty otherwise.
+    Automated sensitive data discovery is only retrieved in a deep scan and is left as None otherwise.
+
+    Returns:
+        dict: Macie status for the region
+    '''
+    client = session.client("macie2", region_name=region)
+    result = {"region": region, "enabled": False, "error": None, "auto_enable": None, "discovery": {} if deep else None, "members": None,
+              "member_discovery": {} if deep else None}
+
+    try:
+        result["status"] = client.get_macie_session().get("status", "UNKNOWN")
+        result["enabled"] = True
+    except botocore.exceptions.ClientError as e:
+        # Macie answers AccessDenied with "Macie is not enabled" in a region where it is off, any other error
+        # means the region could not be checked
+        message = e.response["Error"]["Message"]
+        if "not enabled" not in message.lower():
+            result["error"] = message
+        return result
+    except botocore.exceptions.BotoCoreError as e:
+        result["error"] = str(e)
+        return result
+
+    if deep:
+        try:
+            result["discovery"] = client.get_automated_discovery_configuration()
+        except botocore.exceptions.ClientError:
+            pass
+
+    try:
+        result["auto_enable"] = client.describe_organization_configuration().get("autoEnable", False)
+        members = list_all(client, "list_members", "members", onlyAssociated="true")
+        result["members"] = {member["accountId"]: member.get("relationshipStatus", "Unknown") for member in members}
+        if deep:
+            accounts = list_all(client, "list_automated_discovery_accounts", "items")
+            result["member_discovery"] = {account["accountId"]: account.get("status", "Unknown") for account in accounts}
+    except botocore.exceptions.ClientError:
+        # Not the Macie administrator account
+        pass
+    except botocore.exceptions.BotoCoreError as e:
+        print(f"❌ BotoCore error (Macie - {region}): {str(e)}")
+
+    return result
+
+def print_member_status(account_id, member_status):
+    '''
+    Print a member account's Macie status as collected from the administrator account.
+    '''
+    administrator = member_status["administrator"]
+    for region, (relationship, discovery) in sorted(member_status["regions"].items()):
+        enabled = relationship == "Enabled"
+        print(f"{'✔' if enabled else '⚠'} Macie in {region}: {relationship} (from administrator account {administrator})")
+        if discovery is not None:
+            print(f"  - Automated sensitive data discovery: {discovery}")
+    missing = sorted(set(member_status["all_regions"]) - set(member_status["regions"]))
+    if missing:
+        print(f"⚠ Account {account_id} is not a Macie member in {len(missing)} regions")
+        for region in missing:
+            print(f"  - {region}")
+
+def print_region_status(result, deep=True):
+    '''
+    Print the Macie status of one enabled region, with the organization settings and members when the
+    account is the administrator.
+
+    Args:
+        result (dict): Region status from get_region_status
+        deep (bool): Also print automated sensitive data discovery
+
+    Returns:
+        None
+    '''
+    region = result["region"]
+    discovery = result["discovery"]
+    set_region(region)
+    print(f"✔ Macie is Enabled in {region} ({result['status']})")
+    if deep:
+        print(f"{'✔' if discovery.get('status') == 'ENABLED' else '⚠'} Automated sensitive data discovery: {discovery.get('status', 'Unknown')}")
+    if result["members"] is None:
+        return
+
+    print(f"{'✔' if result['auto_enable'] else '⚠'} New Accounts: Macie enabled automatically: {result['auto_enable']}")
+    if deep:
+        auto_discovery = discovery.get("autoEnableOrganizationMembers", "NONE")
+        print(f"{'✔' if auto_discovery != 'NONE' else '⚠'} New Accounts: Automated sensitive data discovery enabled automatically: {auto_discovery}")
+    active = [member for member, relationship in result["members"].items() if relationship == "Enabled"]
+    print(f"{'✔' if len(active) == len(result['members']) else '⚠'} Macie Member Accounts Enabled in {region}: {len(active)}/{len(result['members'])}")
+    for member, relationship in sorted(result["members"].items()):
+        if relationship != "Enabled":
+            print(f"  - {member}: {relationship}")
+
+def _record_members(members, result, account_id, regions):
+    member_discovery = result["member_discovery"]
+    for member, relationship in result["members"].items():
+        member_status = members.setdefault(member, {"administrator": account_id, "all_regions": regions, "regions": {}})
+        member_status["regions"][result["region"]] = (relationship, None if member_discovery is None else member_discovery.get(member, "Unknown"))
+
+def collect_region_status(session, account_id, shared_state, deep=True, max_workers=8):
+    '''
+    Query Macie in every enabled region, with regions queried concurrently. When the account is the Macie
+    administrator, each member's status is recorded in shared_state for the member scans.
+
+    Args:
+        session (boto3.Session): Boto3 session object
+        account_id (str): AWS account ID of the session
+        shared_state (dict): State shared by every account in the run
+        deep (bool): Also retrieve automated sensitive data discovery.
+        max_workers (int): Maximum regions queried at the same time
+
+    Returns:
+        tuple: (enabled regions, list of region status dicts)
+    '''
+    regions = get_enabled_regions(session)
+    for region in regions:
+        session.client("macie2", region_name=region)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(lambda region: get_region_status(session, region, deep), regions))
+
+    members = shared_state.setdefault("macie_members", {})
+    for result in results:
+        if result["members"] is not None:
+            _record_members(members, result, account_id, regions)
+    return regions, results
+
+def prefetch_member_status(session, create_session, shared_state, deep=True):
+    '''
+    Collect every member's Macie status from the organization's delegated administrator before the member accounts
+    are scanned, so their scans skip Macie whichever order the accounts are scanned in. The administrator's own
+    results are kept for its scan, which does not repeat the calls.
+
+    Args:
+        session (boto3.Session): Boto3 session of the management account
+        create_session (callable): Returns a session for an account ID
+        shared_state (dict): State shared by every account in the run
+        deep (bool): Also retrieve automated sensitive data discovery.
+
+    Returns:
+        None
+    '''
+    members = shared_state.get("macie_members", {})
+    for administrator in get_delegated_admins(session, SERVICE_PRINCIPAL):
+        # Already scanned in this run, e.g. the management account is the administrator
+        if any(status["administrator"] == administrator for status in members.values()):
+            continue
+        try:
+            collected = collect_region_status(create_session(administrator), administrator, shared_state, deep)
+        except (botocore.exceptions.BotoCoreError, botocore.exceptions.ClientError) as e:
+            print(f"⚠ Unable to collect Macie member status from administrator account {administrator}: {str(e)}")
+            continue
+        shared_state.setdefault("macie_administrators", {})[administrator] = collected
+
+def validate_macie(session, account_id=None, shared_state=None, deep=True, max_workers=8):
+    '''
+    Validate Amazon Macie across every enabled region, with regions queried concurrently.
+
+    Args:
+        session (boto3.Session): Boto3 session object
+        account_id (str): AWS account ID of the session
+        shared_state (dict): State shared by every account in the run, used to hand member status from the administrator to member scans.
+        deep (bool): Also check automated sensitive data discovery.
+        max_workers (int): Maximum regions queried at the same time
+
+    Returns:
+        None
+    '''
+    shared_state = shared_state if shared_state is not None else {}
+    members = shared_state.get("macie_members", {})
+    if account_id in members:
+        print_member_status(account_id, members[account_id])
+        return
+
+    # Results collected up front from the delegated administrator are used once, later scans query again
+    collected = shared_state.get("macie_administrators", {}).pop(account_id, None)
+    _, results = collected or collect_region_status(session, account_id, shared_state, deep, max_workers)
+
+    enabled = [result for result in results if result["enabled"]]
+    print(f"{'✔' if len(enabled) == len(results) else '⚠'} Macie is Enabled in {len(enabled)}/{len(results)} regions")
+    disabled = [result["region"] for result in results if not result["enabled"] and not result["error"]]
+    if disabled:
+        print("  Macie is NOT Enabled in:")
+        for region in disabled:
+            print(f"  - {region}")
+    failed = [result for result in results if result["error"]]
+    if failed:
+        print(f"  - Not verified: {', '.join(result['region'] for result in failed)}")
+
+    for result in enabled:
+        print_region_status(result, deep)
+    set_region(None)
+    for result in failed:
+        print(f"❌ AWS API error (Macie - {result['region']}): {result['error']}")
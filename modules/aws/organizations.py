@@ -2,6 +2,7 @@
 AWS Organizations Validation
 modules/aws/organizations.py
 '''
+from concurrent.futures import ThreadPoolExecutor
 import botocore.exceptions
 
 def get_organization_info(session):
@@ -92,24 +93,126 @@ def validate_delegated_admins(session):
     finally:
         session = None
 
-def get_member_accounts(session):
+def get_delegated_admins(session, service_principal):
     '''
-    Retrieve a list of active AWS member account IDs with pagination.
+    Retrieve the accounts delegated to administer a service for the organization.
+
+    Args:
+        session (boto3.Session): Boto3 session of the management account
+        service_principal (str): Service principal, e.g. "macie.amazonaws.com"
+
+    Returns:
+        list: Delegated administrator account IDs, empty if there are none or they cannot be listed.
+    '''
+    client = session.client("organizations")
+
+    try:
+        paginator = client.get_paginator("list_delegated_administrators")
+        return [
+            admin["Id"]
+            for page in paginator.paginate(ServicePrincipal=service_principal)
+            for admin in page.get("DelegatedAdministrators", [])
+        ]
+    except botocore.exceptions.ClientError as e:
+        print(f"❌ AWS API Client error (Organizations - get_delegated_admins): {e.response['Error']['Message']}")
+    except botocore.exceptions.BotoCoreError as e:
+        print(f"❌ BotoCore error: {str(e)}")
+    return []
+
+def iter_member_accounts(session):
+    '''
+    Yield active AWS member account IDs one page at a time, so callers never need the full list in memory.
     '''
     client = session.client("organizations")
-    active_accounts = []
 
     try:
         paginator = client.get_paginator("list_accounts")
         for page in paginator.paginate():
-            active_accounts.extend(
-                [account["Id"] for account in page.get("Accounts", []) if account["Status"] == "ACTIVE"]
-            )
+            for account in page.get("Accounts", []):
+                if account["Status"] == "ACTIVE":
+                    yield account["Id"]
     except botocore.exceptions.ClientError as e:
         print(f"❌ AWS API Client error (Organizations - get_member_accounts): {e.response['Error']['Message']}")
-        return []
     except botocore.exceptions.BotoCoreError as e:
         print(f"❌ BotoCore error: {str(e)}")
-        return []
 
-    return active_accounts
+def get_member_accounts(session):
+    '''
+    Retrieve a list of active AWS member account IDs with pagination.
+    '''
+    return list(iter_member_accounts(session))
+
+def list_children(client, parent_id):
+    '''
+    Retrieve every OU and account directly under a parent, following pagination for both.
+
+    Args:
+        client (botocore.client.Organizations): Organizations client
+        parent_id (str): Root or OU ID
+
+    Returns:
+        tuple: (parent_id, list of OU dicts, list of account dicts)
+    '''
+    units = []
+    for page in client.get_paginator("list_organizational_units_for_parent").paginate(ParentId=parent_id):
+        units.extend(page.get("OrganizationalUnits", []))
+    accounts = []
+    for page in client.get_paginator("list_accounts_for_parent").paginate(ParentId=parent_id):
+        accounts.extend(page.get("Accounts", []))
+    return parent_id, units, accounts
+
+def get_ou_tree(session, max_workers=8):
+    '''
+    Crawl the whole OU hierarchy into memory. Each level is listed concurrently, one request stream per parent.
+
+    Args:
+        session (boto3.Session): Boto3 session object
+        max_workers (int): Maximum parents listed at the same time
+
+    Returns:
+        tuple: (root_id, dict of node ID to {"Id", "Name", "Arn", "ParentId", "Children", "Accounts"}), or (None, {}) on error
+    '''
+    client = session.client("organizations")
+
+    try:
+        root = client.list_roots()["Roots"][0]
+        nodes = {root["Id"]: {"Id": root["Id"], "Name": root.get("Name", "Root"), "Arn": root.get("Arn"), "ParentId": None, "Children": [], "Accounts": []}}
+        level = [root["Id"]]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while level:
+                next_level = []
+                for parent_id, units, accounts in executor.map(lambda parent: list_children(client, parent), level):
+                    nodes[parent_id]["Accounts"] = accounts
+                    for unit in units:
+                        nodes[unit["Id"]] = {"Id": unit["Id"], "Name": unit.get("Name"), "Arn": unit.get("Arn"), "ParentId": parent_id, "Children": [], "Accounts": []}
+                        nodes[parent_id]["Children"].append(unit["Id"])
+                        next_level.append(unit["Id"])
+                level = next_level
+        return root["Id"], nodes
+    except botocore.exceptions.ClientError as e:
+        print(f"❌ AWS API Client error (Organizations - get_ou_tree): {e.response['Error']['Message']}")
+        return None, {}
+    except botocore.exceptions.BotoCoreError as e:
+        print(f"❌ BotoCore error: {str(e)}")
+        return None, {}
+
+def get_account_ous(session):
+    '''
+    Map every account in the organization to the path of the OU it sits in, e.g. "Root/Workloads/Prod".
+
+    Args:
+        session (boto3.Session): Boto3 session object
+
+    Returns:
+        dict: Account ID to OU path
+    '''
+    _, nodes = get_ou_tree(session)
+    paths = {}
+
+    def path(node_id):
+        if node_id not in paths:
+            node = nodes[node_id]
+            paths[node_id] = node["Name"] if node["ParentId"] is None else f"{path(node['ParentId'])}/{node['Name']}"
+        return paths[node_id]
+
+    return {account["Id"]: path(node_id) for node_id, node in nodes.items() for account in node["Accounts"]}
@@ -0,0 +1,448 @@
+'''
+This module is responsible for analyzing the IAM policies of an account for risky grants and trust relationships.
+Every policy document is normalized once, its wildcard patterns are compiled into regular expressions, and the
+analysis of each policy version is memoized so the same policy is never analyzed twice in a run.
+modules/aws/policy.py
+'''
+import fnmatch
+import functools
+import hashlib
+import json
+import re
+import threading
+import urllib.parse
+from dataclasses import dataclass
+
+import botocore.exceptions
+
+# Granting any of these on every resource lets a principal grant itself anything else
+ESCALATION_ACTIONS = (
+    "iam:AttachGroupPolicy",
+    "iam:AttachRolePolicy",
+    "iam:AttachUserPolicy",
+    "iam:CreatePolicyVersion",
+    "iam:PutGroupPolicy",
+    "iam:PutRolePolicy",
+    "iam:PutUserPolicy",
+    "iam:UpdateAssumeRolePolicy"
+)
+# Action name prefixes that only read. Any other action granted on Resource "*" is reported as an unscoped write
+READ_ONLY_PREFIXES = ("get", "list", "describe", "batchget", "search", "lookup", "view", "query", "scan", "select", "simulate")
+# Actions listed per policy in the unscoped write report
+MAX_LISTED_ACTIONS = 10
+AUTHORIZATION_DETAILS_FILTER = ["User", "Role", "Group", "LocalManagedPolicy", "AWSManagedPolicy"]
+SERVICE_ROLE_PATH = "/aws-service-role/"
+ACCOUNT_ID_PATTERN = re.compile(r"^\d{12}$")
+
+_analysis_cache = {}
+_analysis_lock = threading.Lock()
+
+@dataclass(frozen=True)
+class Statement:
+    '''
+    Data class to hold a normalized policy statement. Every list element is a tuple, whatever form the document used.
+    '''
+    effect: str
+    actions: tuple
+    not_actions: tuple
+    resources: tuple
+    not_resources: tuple
+    # (principal type, principal) pairs, only present in trust policies
+    principals: tuple
+    conditional: bool
+
+@dataclass(frozen=True)
+class PolicyRisk:
+    '''
+    Data class to hold the result of analyzing a single policy.
+    '''
+    admin: bool
+    escalation_actions: tuple
+    wildcard_actions: tuple
+    # Write or permissions management actions granted on every resource without a condition
+    unscoped_writes: tuple = ()
+    # "*" or escalation actions granted on every resource but covered by a Deny that only applies under a condition
+    conditionally_denied: tuple = ()
+
+    @property
+    def admin_equivalent(self):
+        '''
+        True if the policy grants every action, or can be used to grant itself every action.
+        '''
+        return self.admin or bool(self.escalation_actions)
+
+def _as_tuple(value):
+    if value is None:
+        return ()
+    if isinstance(value, (list, tuple)):
+        return tuple(value)
+    return (value,)
+
+def parse_document(document):
+    '''
+    Return a policy document as a dictionary, decoding it if it is still URL-encoded JSON.
+    '''
+    if isinstance(document, str):
+        return json.loads(urllib.parse.unquote(document))
+    return document or {}
+
+def normalize_policy(document):
+    '''
+    Normalize a policy document into a tuple of statements.
+
+    Args:
+        document (dict or str): The policy document
+
+    Returns:
+        tuple: Statement objects
+    '''
+    statements = []
+    for statement in _as_tuple(parse_document(document).get("Statement")):
+        principal = statement.get("Principal")
+        if principal == "*":
+            principals = (("AWS", "*"),)
+        else:
+            principals = tuple((kind, value) for kind, values in (principal or {}).items() for value in _as_tuple(values))
+        statements.append(Statement(
+            effect=statement.get("Effect", "Allow"),
+            actions=_as_tuple(statement.get("Action")),
+            not_actions=_as_tuple(statement.get("NotAction")),
+            resources=_as_tuple(statement.get("Resource")),
+            not_resources=_as_tuple(statement.get("NotResource")),
+            principals=principals,
+            conditional=bool(statement.get("Condition"))
+        ))
+    return tuple(statements)
+
+@functools.lru_cache(maxsize=None)
+def compile_patterns(patterns, ignore_case=False):
+    '''
+    Compile IAM wildcard patterns (* and ?) into one regular expression matching any of them.
+
+    Args:
+        patterns (tuple): The patterns
+        ignore_case (bool): True for actions, which IAM matches case-insensitively. Resources are case-sensitive.
+
+    Returns:
+        re.Pattern: The compiled matcher
+    '''
+    return re.compile("|".join(fnmatch.translate(pattern) for pattern in patterns) or r"(?!)", re.IGNORECASE if ignore_case else 0)
+
+def _matches(patterns, value, ignore_case=False):
+    return bool(patterns) and compile_patterns(patterns, ignore_case).match(value) is not None
+
+def is_read_only(action):
+    '''
+    True if an action pattern only covers read actions, e.g. "s3:Get*" but not "s3:*" or "s3:PutObject".
+    '''
+    name = action.partition(":")[2].lower()
+    return name.startswith(READ_ONLY_PREFIXES)
+
+def statement_applies(statement, action, resource="*"):
+    '''
+    True if a statement covers an action on a resource, honouring NotAction and NotResource.
+
+    Args:
+        statement (Statement): The statement
+        action (str): Action, e.g. "iam:PutRolePolicy"
+        resource (str): Resource ARN, "*" meaning every resource
+
+    Returns:
+        bool: True if the statement applies
+    '''
+    if statement.actions:
+        action_match = _matches(statement.actions, action, True)
+    else:
+        action_match = bool(statement.not_actions) and not _matches(statement.not_actions, action, True)
+    if not action_match:
+        return False
+    if statement.resources:
+        return _matches(statement.resources, resource)
+    return bool(statement.not_resources) and not _matches(statement.not_resources, resource)
+
+def policy_allows(statements, action, resource="*"):
+    '''
+    True if the statements unconditionally allow an action on a resource and do not unconditionally deny it.
+    A Deny with a condition does not cancel the Allow, see policy_may_deny.
+
+    Args:
+        statements (tuple): Normalized statements
+        action (str): Action, e.g. "iam:PutRolePolicy"
+        resource (str): Resource ARN, "*" meaning every resource
+
+    Returns:
+        bool: True if the action is allowed
+    '''
+    allowed = False
+    for statement in statements:
+        if statement.conditional:
+            continue
+        if statement.effect == "Deny":
+            if statement_applies(statement, action, resource):
+                return False
+        elif not allowed:
+            allowed = statement_applies(statement, action, resource)
+    return allowed
+
+def policy_may_deny(statements, action, resource="*"):
+    '''
+    True if a Deny with a condition covers an action on a resource, so whether it is denied depends on the request.
+
+    Args:
+        statements (tuple): Normalized statements
+        action (str): Action, e.g. "iam:PutRolePolicy"
+        resource (str): Resource ARN, "*" meaning every resource
+
+    Returns:
+        bool: True if a conditional Deny applies
+    '''
+    return any(
+        statement.effect == "Deny" and statement.conditional and statement_applies(statement, action, resource)
+        for statement in statements
+    )
+
+def analyze_statements(statements):
+    '''
+    Analyze normalized statements for admin access, privilege escalation, service-wide wildcard grants and write
+    actions granted on every resource.
+
+    Args:
+        statements (tuple): Normalized statements
+
+    Returns:
+        PolicyRisk: The risks found
+    '''
+    # Whether each Deny of every action on every resource has a condition
+    denies_everything = [
+        statement.conditional for statement in statements
+        if statement.effect == "Deny" and "*" in statement.actions and "*" in statement.resources
+    ]
+    grants_everything = any(
+        statement.effect == "Allow" and not statement.conditional and {"*", "*:*"} & set(statement.actions) and "*" in statement.resources
+        for statement in statements
+    )
+    admin = grants_everything and not denies_everything
+    # A Deny with a condition may or may not apply to a request, so the grants it covers are left for review
+    if grants_everything:
+        escalation = ()
+        conditionally_denied = ("*",) if denies_everything and all(denies_everything) else ()
+    else:
+        allowed = [action for action in ESCALATION_ACTIONS if policy_allows(statements, action)]
+        conditionally_denied = tuple(action for action in allowed if policy_may_deny(statements, action))
+        escalation = tuple(action for action in allowed if action not in conditionally_denied)
+    wildcard_actions = sorted({
+        action for statement in statements if statement.effect == "Allow"
+        for action in statement.actions if action in ("*", "*:*") or action.endswith(":*")
+    })
+    # Conditions usually scope a grant to tagged or named resources, so only unconditional grants are reported.
+    # NotAction grants everything but the listed actions, which always includes writes.
+    unscoped = [statement for statement in statements if statement.effect == "Allow" and not statement.conditional and (
+        "*" in statement.resources or (not statement.resources and statement.not_resources)
+    )]
+    unscoped_writes = sorted({action for statement in unscoped for action in statement.actions if not is_read_only(action)}, key=str.lower)
+    unscoped_writes += sorted({"NotAction " + ", ".join(statement.not_actions) for statement in unscoped if statement.not_actions})
+    return PolicyRisk(admin, escalation, tuple(wildcard_actions), tuple(unscoped_writes), conditionally_denied)
+
+def analyze_policy(document, key=None):
+    '''
+    Analyze a policy document, memoized per policy version.
+
+    Args:
+        document (dict or str): The policy document
+        key (tuple): Identifies the policy version, e.g. (policy ARN, version ID). Defaults to a digest of the document.
+
+    Returns:
+        PolicyRisk: The risks found
+    '''
+    if key is None:
+        key = hashlib.sha1(json.dumps(parse_document(document), sort_keys=True).encode("utf-8")).hexdigest()
+    risk = _analysis_cache.get(key)
+    if risk is None:
+        risk = analyze_statements(normalize_policy(document))
+        with _analysis_lock:
+            _analysis_cache[key] = risk
+    return risk
+
+def trusted_principals(document):
+    '''
+    List the AWS principals a trust policy allows to assume the role.
+
+    Args:
+        document (dict or str): The AssumeRolePolicyDocument
+
+    Returns:
+        list: (principal, conditional) tuples for every AWS principal in an Allow statement
+    '''
+    return [
+        (principal, statement.conditional)
+        for statement in normalize_policy(document) if statement.effect == "Allow"
+        for kind, principal in statement.principals if kind == "AWS"
+    ]
+
+def principal_account(principal):
+    '''
+    Return the account ID of an AWS principal given as an ARN or a bare account ID, or None for "*".
+    '''
+    if ACCOUNT_ID_PATTERN.match(principal):
+        return principal
+    parts = principal.split(":")
+    if len(parts) > 4 and parts[2] in ("iam", "sts") and ACCOUNT_ID_PATTERN.match(parts[4]):
+        return parts[4]
+    return None
+
+def trusted_accounts(document):
+    '''
+    List the accounts a trust policy allows to assume the role.
+
+    Args:
+        document (dict or str): The AssumeRolePolicyDocument
+
+    Returns:
+        list: Sorted account IDs
+    '''
+    accounts = {principal_account(principal) for principal, _ in trusted_principals(document)}
+    return sorted(account for account in accounts if account)
+
+def get_authorization_details(client):
+    '''
+    Retrieve every user, group, role and managed policy of the account with paginated authorization details.
+
+    Returns:
+        dict: "UserDetailList", "GroupDetailList", "RoleDetailList" and "Policies" lists
+    '''
+    details = {"UserDetailList": [], "GroupDetailList": [], "RoleDetailList": [], "Policies": []}
+    for page in client.get_paginator("get_account_authorization_details").paginate(Filter=AUTHORIZATION_DETAILS_FILTER):
+        for name, items in details.items():
+            items.extend(page.get(name, []))
+    return details
+
+def _managed_policies(policies):
+    '''
+    Map each managed policy ARN to its name and the analysis of its default version.
+    '''
+    managed = {}
+    for policy in policies:
+        version_id = policy.get("DefaultVersionId")
+        document = next((version["Document"] for version in policy.get("PolicyVersionList", []) if version.get("IsDefaultVersion")), None)
+        if document is not None:
+            managed[policy["Arn"]] = (policy["PolicyName"], analyze_policy(document, (policy["Arn"], version_id)))
+    return managed
+
+def _principal_risks(entity, inline_key, managed, inline_policies, group_risks=()):
+    '''
+    Collect the (policy name, risk) pairs that apply to a user, group or role.
+    Inline policies are also added to inline_policies, so each is analyzed once per account.
+    '''
+    name = entity.get("RoleName") or entity.get("UserName") or entity.get("GroupName")
+    risks = [(policy["PolicyName"], analyze_policy(policy["PolicyDocument"])) for policy in entity.get(inline_key, [])]
+    inline_policies += [(f"{name}/{policy_name}", risk) for policy_name, risk in risks]
+    risks += [managed[policy["PolicyArn"]] for policy in entity.get("AttachedManagedPolicies", []) if policy["PolicyArn"] in managed]
+    return risks + list(group_risks)
+
+def _admin_via(risks):
+    return ", ".join(sorted({name for name, risk in risks if risk.admin_equivalent}))
+
+def _conditional_admin_via(risks):
+    return ", ".join(sorted({name for name, risk in risks if risk.conditionally_denied}))
+
+def _list_actions(actions):
+    listed = ", ".join(actions[:MAX_LISTED_ACTIONS])
+    return listed if len(actions) <= MAX_LISTED_ACTIONS else f"{listed} and {len(actions) - MAX_LISTED_ACTIONS} more"
+
+def _print_names(items):
+    for name, detail in sorted(items):
+        print(f"  - {name}: {detail}")
+
+def analyze_account_policies(details, account_id):
+    '''
+    Analyze the policies and trust relationships of every principal in an account.
+
+    Args:
+        details (dict): Authorization details from get_authorization_details
+        account_id (str): AWS account ID, trust in any other account is reported as cross-account
+
+    Returns:
+        dict: "admin_users", "admin_roles", "conditional_admin", "wildcard_policies", "unscoped_write_policies",
+              "external_trust" and "public_trust" lists of (name, detail)
+    '''
+    managed = _managed_policies(details["Policies"])
+    inline_policies = []
+    groups = {group["GroupName"]: _principal_risks(group, "GroupPolicyList", managed, inline_policies) for group in details["GroupDetailList"]}
+
+    result = {
+        "admin_users": [], "admin_roles": [], "conditional_admin": [], "wildcard_policies": [], "unscoped_write_policies": [],
+        "external_trust": [], "public_trust": []
+    }
+    for user in details["UserDetailList"]:
+        group_risks = [risk for group in user.get("GroupList", []) for risk in groups.get(group, [])]
+        risks = _principal_risks(user, "UserPolicyList", managed, inline_policies, group_risks)
+        via = _admin_via(risks)
+        if via:
+            result["admin_users"].append((user["UserName"], via))
+        elif _conditional_admin_via(risks):
+            result["conditional_admin"].append((user["UserName"], f"user, via {_conditional_admin_via(risks)}"))
+
+    for role in details["RoleDetailList"]:
+        if role.get("Path", "").startswith(SERVICE_ROLE_PATH):
+            continue
+        risks = _principal_risks(role, "RolePolicyList", managed, inline_policies)
+        via = _admin_via(risks)
+        if via:
+            result["admin_roles"].append((role["RoleName"], via))
+        elif _conditional_admin_via(risks):
+            result["conditional_admin"].append((role["RoleName"], f"role, via {_conditional_admin_via(risks)}"))
+
+        principals = trusted_principals(role.get("AssumeRolePolicyDocument"))
+        if any(principal == "*" and not conditional for principal, conditional in principals):
+            result["public_trust"].append((role["RoleName"], "any AWS principal"))
+        external = sorted({principal_account(principal) for principal, _ in principals} - {account_id, None})
+        if external:
+            result["external_trust"].append((role["RoleName"], ", ".join(external)))
+
+    # Wildcards are only reported for policies written in this account, AWS managed policies are out of its control
+    customer_policies = [(name, risk) for arn, (name, risk) in managed.items() if not arn.startswith("arn:aws:iam::aws:")]
+    result["wildcard_policies"] = [
+        (name, ", ".join(risk.wildcard_actions)) for name, risk in customer_policies + inline_policies if risk.wildcard_actions
+    ]
+    result["unscoped_write_policies"] = [
+        (name, _list_actions(risk.unscoped_writes)) for name, risk in customer_policies + inline_policies if risk.unscoped_writes
+    ]
+    return result
+
+def validate_policies(session, account_id=None):
+    '''
+    Flag admin-equivalent users and roles, customer policies granting service-wide wildcard actions or write actions
+    on every resource, and roles that can be assumed from other accounts or by anyone.
+
+    Args:
+        session (boto3.Session): Boto3 session object
+        account_id (str): AWS account ID of the session
+
+    Returns:
+        None
+    '''
+    client = session.client("iam")
+    try:
+        details = get_authorization_details(client)
+    except botocore.exceptions.ClientError as e:
+        print(f"❌ AWS API Client error (IAM Policies): {e.response['Error']['Message']}")
+        return
+    except botocore.exceptions.BotoCoreError as e:
+        print(f"❌ BotoCore error (IAM Policies): {str(e)}")
+        return
+
+    result = analyze_account_policies(details, account_id)
+    print(f"{'⚠' if result['admin_users'] else '✔'} IAM Users with admin-equivalent access: {len(result['admin_users'])}")
+    _print_names(result["admin_users"])
+    print(f"{'👀' if result['admin_roles'] else '✔'} IAM Roles with admin-equivalent access: {len(result['admin_roles'])}")
+    _print_names(result["admin_roles"])
+    print(f"{'👀' if result['conditional_admin'] else '✔'} IAM Users and Roles with admin-equivalent access unless a conditional Deny applies: {len(result['conditional_admin'])}")
+    _print_names(result["conditional_admin"])
+    print(f"{'⚠' if result['wildcard_policies'] else '✔'} Customer policies granting service-wide wildcard actions: {len(result['wildcard_policies'])}")
+    _print_names(result["wildcard_policies"])
+    print(f"{'⚠' if result['unscoped_write_policies'] else '✔'} Customer policies granting write actions on every resource: {len(result['unscoped_write_policies'])}")
+    _print_names(result["unscoped_write_policies"])
+    print(f"{'👀' if result['external_trust'] else '✔'} IAM Roles trusting other accounts: {len(result['external_trust'])}")
+    _print_names(result["external_trust"])
+    print(f"{'❌' if result['public_trust'] else '✔'} IAM Roles that any AWS principal can assume: {len(result['public_trust'])}")
+    _print_names(result["public_trust"])
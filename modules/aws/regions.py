@@ -0,0 +1,27 @@
+'''
+This module is responsible for discovering the regions a regional check should cover.
+modules/aws/regions.py
+'''
+import botocore.exceptions
+
+def get_enabled_regions(session):
+    '''
+    Retrieve the regions enabled for the account (default regions plus any opted-in regions).
+    Falls back to the session's region if the regions cannot be listed.
+
+    Args:
+        session (boto3.Session): Boto3 session object
+
+    Returns:
+        list: Sorted region names
+    '''
+    client = session.client("ec2")
+
+    try:
+        regions = client.describe_regions(AllRegions=False).get("Regions", [])
+        return sorted(region["RegionName"] for region in regions)
+    except botocore.exceptions.ClientError as e:
+        print(f"⚠ Unable to list enabled regions, checking {session.region_name} only: {e.response['Error']['Message']}")
+    except botocore.exceptions.BotoCoreError as e:
+        print(f"⚠ Unable to list enabled regions, checking {session.region_name} only: {str(e)}")
+    return [session.region_name]
@@ -0,0 +1,198 @@
+'''
+This module is responsible for recording AWS API responses to an archive and replaying them without network access.
+modules/aws/replay.py
+'''
+import base64
+import gzip
+import hashlib
+import json
+import threading
+from collections import defaultdict
+
+import botocore.exceptions
+from botocore.awsrequest import AWSResponse
+from botocore.parsers import create_parser
+
+CONTEXT_KEY = "aws_assess_replay"
+
+class ReplayMissError(botocore.exceptions.BotoCoreError):
+    '''
+    Raised when a request has no recorded response in the replay archive.
+    '''
+    fmt = "No recorded response for {operation_name} at {endpoint_url}"
+
+class _ReplayBody:
+    '''
+    Minimal raw body object so a recorded response can be wrapped in an AWSResponse.
+    '''
+    # pylint: disable=R0903
+    def __init__(self, body):
+        self._body = body
+
+    def stream(self, **_kwargs):
+        '''
+        Yield the recorded body in a single chunk.
+        '''
+        yield self._body
+
+def _request_key(params):
+    '''
+    Build a stable digest for a serialized request so identical calls map to the same recording.
+
+    Args:
+        params (dict): The botocore request dict passed to the before-call event.
+
+    Returns:
+        str: A hex digest identifying the request.
+    '''
+    body = params.get("body")
+    if isinstance(body, bytes):
+        body = body.decode("utf-8", errors="replace")
+    material = json.dumps(
+        [params.get("method"), params.get("url"), params.get("query_string"), body],
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+class ResponseArchive:
+    '''
+    Captures every botocore response made through the attached sessions into a gzip compressed
+    JSON lines archive (--record), or serves those responses back with no network I/O (--replay).
+    '''
+    def __init__(self, path, mode):
+        '''
+        Initialize the archive.
+
+        Args:
+            path (str): Path to the archive file.
+            mode (str): Either "record" or "replay".
+
+        Returns:
+            None
+        '''
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown archive mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self._records = []
+        self._exact = defaultdict(list)
+        self._fallback = defaultdict(list)
+        self._served = defaultdict(int)
+        self._lock = threading.Lock()
+        if mode == "replay":
+            self._load()
+
+    @property
+    def replaying(self):
+        '''
+        True if responses are being served from the archive.
+        '''
+        return self.mode == "replay"
+
+    def attach(self, session, profile):
+        '''
+        Register record or replay handlers on a boto3 session. Must be called before clients are created.
+
+        Args:
+            session (boto3.Session): Boto3 session object
+            profile (str): AWS profile name used to keep recordings for different accounts apart
+
+        Returns:
+            None
+        '''
+        def before_call(params, model, context, **_kwargs):
+            # REST protocols put parameters in the query string, which only the digest should depend on
+            key = (str(profile), model.service_model.service_name, model.name, (params.get("url") or "").split("?", 1)[0])
+            digest = _request_key(params)
+            if self.replaying:
+                return self._serve(key, digest, model)
+            context[CONTEXT_KEY] = (key, digest)
+            return None
+
+        def after_call(http_response, context, **_kwargs):
+            if CONTEXT_KEY in context and http_response is not None:
+                key, digest = context[CONTEXT_KEY]
+                self._record(key, digest, http_response)
+
+        session.events.register("before-call", before_call)
+        if not self.replaying:
+            session.events.register("after-call", after_call)
+
+    def _record(self, key, digest, http_response):
+        '''
+        Append one response to the in-memory recording.
+        '''
+        profile, service, operation, url = key
+        with self._lock:
+            self._records.append({
+                "profile": profile,
+                "service": service,
+                "operation": operation,
+                "url": url,
+                "digest": digest,
+                "status": http_response.status_code,
+                "headers": dict(http_response.headers.items()),
+                "body": base64.b64encode(http_response.content or b"").decode("ascii")
+            })
+
+    def _serve(self, key, digest, model):
+        '''
+        Look up a recorded response and parse it exactly as botocore would have.
+
+        Requests are matched on their full serialized form first. Requests whose parameters change
+        between runs (e.g. date ranges) fall back to the recordings for the same operation and endpoint.
+        Repeated identical calls are served in recorded order, repeating the last one once exhausted.
+        '''
+        with self._lock:
+            candidates = self._exact.get((key, digest)) or self._fallback.get(key)
+            if not candidates:
+                raise ReplayMissError(operation_name=model.name, endpoint_url=key[3])
+            served_key = (key, digest) if (key, digest) in self._exact else key
+            index = min(self._served[served_key], len(candidates) - 1)
+            self._served[served_key] += 1
+            record = candidates[index]
+
+        body = base64.b64decode(record["body"])
+        http_response = AWSResponse(record["url"], record["status"], record["headers"], _ReplayBody(body))
+        protocol = getattr(model.service_model, "resolved_protocol", None) or model.metadata["protocol"]
+        response_dict = {
+            "headers": http_response.headers,
+            "status_code": http_response.status_code,
+            "body": body,
+            "context": {"operation_name": model.name}
+        }
+        parsed = create_parser(protocol).parse(response_dict, model.output_shape)
+        return http_response, parsed
+
+    def _load(self):
+        '''
+        Load and index a previously recorded archive.
+        '''
+        with gzip.open(self.path, "rt", encoding="utf-8") as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                key = (record["profile"], record["service"], record["operation"], record["url"])
+                self._exact[(key, record["digest"])].append(record)
+                self._fallback[key].append(record)
+
+    def save(self):
+        '''
+        Write the recorded responses to the archive. Does nothing when replaying.
+
+        Args:
+            None
+
+        Returns:
+            int: The number of responses written.
+        '''
+        if self.replaying:
+            return 0
+        with self._lock:
+            records = list(self._records)
+        with gzip.open(self.path, "wt", encoding="utf-8") as file:
+            for record in records:
+                file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        return len(records)
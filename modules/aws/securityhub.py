@@ -3,6 +3,7 @@ This module is responsible for validating AWS Security Hub settings.
 modules/aws/securityhub.py
 '''
 import botocore.exceptions
+from modules.findings import set_region
 
 def check_automation_rules(client):
     '''
@@ -14,9 +15,9 @@ def check_automation_rules(client):
     except botocore.exceptions.ClientError as e:
         error_code = e.response["Error"]["Code"]
         if error_code == "ValidationException":
-            print("⚠ Security Hub Automations are not supported in this account.")
+            print("⚠ Security Hub Automations: not supported in this account")
         elif error_code == "AccessDeniedException":
-            print("⚠ Access denied: Security Hub Automations are only available in the Delegated Admin account.")
+            print("⚠ Security Hub Automations: access denied, only available in the Delegated Admin account")
         else:
             print(f"❌ AWS API Client error (Security Hub Automations): {e.response['Error']['Message']}")
     except botocore.exceptions.BotoCoreError as e:
@@ -50,9 +51,11 @@ def get_security_hub_integrations(client):
     else:
         print("⚠ No Security Hub Integrations found.")
 
-def validate_security_hub(session):
+def validate_security_hub(session, deep=True):
     '''
     Validate AWS Security Hub settings.
+    An essential scan stops at whether Security Hub is enabled and its hub settings; a deep scan also
+    reports standards, integrations, automation rules and aggregation.
     '''
     region = session.region_name
 
@@ -61,16 +64,20 @@ def validate_security_hub(session):
 
     def perform_check(region_to_check):
         try:
+            set_region(region_to_check)
             temp_client = session.client("securityhub", region_name=region_to_check)
             hub_status = temp_client.describe_hub()
             print(f"✔ AWS Security Hub is Enabled in {region_to_check}")
 
-            get_security_hub_standards(temp_client)
-            get_security_hub_integrations(temp_client)
-            check_automation_rules(temp_client)
+            if deep:
+                get_security_hub_standards(temp_client)
+                get_security_hub_integrations(temp_client)
+                check_automation_rules(temp_client)
 
             print(f"✔ Auto-enable new controls: {hub_status.get('AutoEnableControls', False)}")
             print(f"✔ Consolidated Control Findings: {hub_status.get('ControlFindingGenerator', 'NOT SET')}")
+            if not deep:
+                return
 
             finding_aggregators = temp_client.list_finding_aggregators().get("FindingAggregators", [])
             if finding_aggregators:
@@ -100,5 +107,6 @@ def validate_security_hub(session):
     for r in us_regions:
         if r not in checked_regions:
             perform_check(r)
+    set_region(None)
 
     session = None
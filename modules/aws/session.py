@@ -0,0 +1,167 @@
+'''
+This module is responsible for creating the boto3 sessions used by the assessment.
+modules/aws/session.py
+'''
+import functools
+import os
+import threading
+import time
+import boto3
+import botocore.exceptions
+import botocore.loaders
+import botocore.session
+from botocore.config import Config
+
+from modules.aws.breaker import get_endpoint_health
+from modules.config import config
+
+DEFAULT_CONNECT_TIMEOUT = 5
+DEFAULT_READ_TIMEOUT = 30
+DEFAULT_MAX_ATTEMPTS = 3
+
+_shared_loader = None  # pylint: disable=C0103
+_loader_lock = threading.Lock()
+
+class _UniquePaths(list):
+    '''
+    Search path list that ignores paths it already holds. boto3 appends its data directory to the loader every time
+    a session is created, which would otherwise grow the shared loader's search path with every account.
+    '''
+    def append(self, path):
+        if path not in self:
+            super().append(path)
+
+def get_shared_loader(data_path=None):
+    '''
+    Return the botocore data loader shared by every session. Service models and endpoint data are parsed once per
+    process and cached by the loader, instead of once per account.
+
+    Args:
+        data_path (str): Extra model search paths (AWS_DATA_PATH), used when the loader is first created.
+
+    Returns:
+        botocore.loaders.Loader: The shared loader
+    '''
+    global _shared_loader  # pylint: disable=W0603
+    with _loader_lock:
+        if _shared_loader is None:
+            # Same search paths as botocore's own loader
+            paths = _UniquePaths(os.path.expanduser(os.path.expandvars(path)) for path in (data_path or "").split(os.pathsep) if path)
+            _shared_loader = botocore.loaders.Loader(extra_search_paths=paths)
+        return _shared_loader
+
+def create_botocore_session():
+    '''
+    Create a botocore session that uses the shared data loader. Only credentials and configuration are per session.
+
+    Args:
+        None
+
+    Returns:
+        botocore.session.Session: The botocore session
+    '''
+    botocore_session = botocore.session.get_session()
+    botocore_session.register_component("data_loader", get_shared_loader(botocore_session.get_config_variable("data_path")))
+    return botocore_session
+
+class DeadlineExceededError(botocore.exceptions.BotoCoreError):
+    '''
+    Raised instead of sending a request once the time budget of the running check is spent.
+    '''
+    fmt = "Time budget exhausted before calling {operation_name}"
+
+class CachedSession(boto3.Session):
+    '''
+    Boto3 session that hands out one client per service and region instead of building a new one on every call.
+    Clients are thread safe, so checks running concurrently can share them; creation itself is serialized.
+    Every request is refused once the session's deadline has passed or the session has been cancelled.
+    '''
+    def __init__(self, *args, client_config=None, factory=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._clients = {}
+        self._client_lock = threading.Lock()
+        self._client_config = client_config
+        self._factory = factory
+        # Monotonic time after which requests are refused, set for each check
+        self.deadline = None
+        self.cancelled = False
+        self.events.register("before-call", self._enforce_deadline)
+
+    def _enforce_deadline(self, model, **_kwargs):
+        if self.cancelled or (self.deadline is not None and time.monotonic() >= self.deadline):
+            raise DeadlineExceededError(operation_name=model.name)
+
+    def client(self, service_name, region_name=None, **kwargs):  # pylint: disable=W0221
+        '''
+        Return a cached client, creating it on first use. Clients with custom arguments are never cached.
+        '''
+        with self._client_lock:
+            if kwargs:
+                if self._client_config is not None:
+                    kwargs["config"] = self._client_config.merge(kwargs["config"]) if kwargs.get("config") else self._client_config
+                return super().client(service_name, region_name=region_name, **kwargs)
+            key = (service_name, region_name or self.region_name)
+            if key not in self._clients:
+                self._clients[key] = super().client(service_name, region_name=region_name, config=self._client_config)
+            return self._clients[key]
+
+    def renew(self):
+        '''
+        Cancel this session and return a fresh one for the same account. Work abandoned after a timeout keeps
+        this session and fails on its next request, while later checks carry on with the new session.
+
+        Args:
+            None
+
+        Returns:
+            CachedSession: The new session
+        '''
+        self.cancelled = True
+        if self._factory is None:
+            raise ValueError("Session was not created by create_session and cannot be renewed")
+        return self._factory()
+
+def create_client_config():
+    '''
+    Build the client configuration shared by every client, bounding how long a single request can take.
+
+    Args:
+        None
+
+    Returns:
+        botocore.config.Config: Client configuration with connect and read timeouts and standard retries
+    '''
+    return Config(
+        connect_timeout=float(config.get("deadlines.connect_timeout", DEFAULT_CONNECT_TIMEOUT)),
+        read_timeout=float(config.get("deadlines.read_timeout", DEFAULT_READ_TIMEOUT)),
+        retries={"total_max_attempts": int(config.get("deadlines.max_attempts", DEFAULT_MAX_ATTEMPTS)), "mode": "standard"}
+    )
+
+def create_session(profile, region, archive=None):
+    '''
+    Create a boto3 session for a profile, wired up to the shared endpoint health tracker and to a record/replay
+    archive if one is in use.
+
+    Args:
+        profile (str): AWS profile name
+        region (str): AWS region
+        archive (ResponseArchive): Optional archive to record responses to or replay them from.
+
+    Returns:
+        boto3.Session: Boto3 session object
+    '''
+    client_config = create_client_config()
+    factory = functools.partial(create_session, profile, region, archive)
+    if archive and archive.replaying:
+        # Replayed calls never reach AWS, so there is no need to resolve the profile's real credentials.
+        session = CachedSession(aws_access_key_id="replay", aws_secret_access_key="replay", region_name=region,
+                                botocore_session=create_botocore_session(), client_config=client_config, factory=factory)
+    else:
+        session = CachedSession(profile_name=profile, region_name=region, botocore_session=create_botocore_session(),
+                                client_config=client_config, factory=factory)
+
+    # Dead endpoints are answered before the archive sees the call, so skipped calls are never recorded
+    get_endpoint_health().attach(session, profile)
+    if archive:
+        archive.attach(session, profile)
+    return session
@@ -0,0 +1,89 @@
+'''
+This module is responsible for describing the available checks so they can be selected and imported only when needed.
+modules/checks.py
+'''
+import importlib
+from dataclasses import dataclass
+
+@dataclass(frozen=True)
+class Check:
+    '''
+    Data class to describe a single check.
+    '''
+    name: str
+    label: str
+    # "module:function", imported the first time the check runs
+    target: str
+    # AssessmentOptions attributes passed to the function, in order
+    arguments: tuple = ("session",)
+    # AssessmentOptions attribute that must be true for the check to run
+    condition: str = None
+    # "essential" checks run in every scan, "deep" checks only in a full gap report
+    tier: str = "essential"
+
+    def load(self):
+        '''
+        Import the module implementing the check and return its function.
+
+        Args:
+            None
+
+        Returns:
+            callable: The check function
+        '''
+        return load_target(self.target)
+
+TIERS = ("essential", "deep")
+
+CHECKS = (
+    Check("account", None, "modules.aws.account:validate_account"),
+    Check("support", "AWS Support Plan Settings", "modules.aws.account:get_support_plan"),
+    Check("billing", "Billed Services", "modules.aws.account:get_billed_services", tier="deep"),
+    Check("spend", "Regional Spend", "modules.aws.account:get_regional_spend", tier="deep"),
+    Check("linked_accounts", "Checking Accounts Relationships", "modules.aws.account:get_linked_accounts", tier="deep"),
+    Check("iam", "Validating IAM Settings", "modules.aws.iam:validate_iam"),
+    Check("policies", "Analyzing IAM Policies", "modules.aws.policy:validate_policies", ("session", "account_id"), tier="deep"),
+    Check("config", "Validating AWS Config", "modules.aws.config:validate_aws_config", ("session", "is_management")),
+    Check("securityhub", "Validating AWS Security Hub", "modules.aws.securityhub:validate_security_hub", ("session", "deep")),
+    Check("inspector", "Validating AWS Inspector", "modules.aws.inspector:validate_inspector"),
+    Check("guardduty", "Validating AWS GuardDuty", "modules.aws.guardduty:validate_guardduty"),
+    Check("macie", "Validating Amazon Macie", "modules.aws.macie:validate_macie", ("session", "account_id", "shared_state", "deep")),
+    Check("accessanalyzer", "Validating IAM Access Analyzer", "modules.aws.accessanalyzer:validate_access_analyzer", ("session", "deep")),
+    Check("organizations", "Validating AWS Organizations", "modules.aws.organizations:validate_organizations", ("session", "profile"), "include_org_checks"),
+    Check("controltower", "Validating AWS Control Tower", "modules.aws.controltower:validate_control_tower", ("session", "deep"), "include_control_tower"),
+)
+
+CHECK_NAMES = tuple(check.name for check in CHECKS)
+
+def load_target(target):
+    '''
+    Import "module:attribute" and return the attribute.
+
+    Args:
+        target (str): Dotted module path and attribute name separated by a colon.
+
+    Returns:
+        any: The attribute
+    '''
+    module_name, attribute = target.split(":", 1)
+    return getattr(importlib.import_module(module_name), attribute)
+
+def select_checks(names=None, tier="deep"):
+    '''
+    Return the checks to run, in their registry order.
+
+    Args:
+        names (iterable): Check names to include, whatever their tier. All checks of the tier are included if not given.
+        tier (str): "essential" for the essential checks only, "deep" for every check.
+
+    Returns:
+        list: The selected Check objects
+    '''
+    if tier not in TIERS:
+        raise ValueError(f"Unknown tier: {tier}. Available: {', '.join(TIERS)}")
+    if not names:
+        return [check for check in CHECKS if tier == "deep" or check.tier == "essential"]
+    unknown = set(names) - set(CHECK_NAMES)
+    if unknown:
+        raise ValueError(f"Unknown checks: {', '.join(sorted(unknown))}. Available: {', '.join(CHECK_NAMES)}")
+    return [check for check in CHECKS if check.name in names]
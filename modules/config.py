@@ -3,7 +3,6 @@ This module is responsible for loading the configuration file and providing a wa
 modules/config.py
 '''
 import os
-import yaml
 
 class ConfigLoader:
     '''
@@ -21,7 +20,21 @@ class ConfigLoader:
         '''
         # Allow overriding the config file via an environment variable
         self.config_file = os.getenv("AWS_ASSESS_CONFIG", config_file)
-        self.config = self._load_config()
+        # Parsed on first access, so importing the module (e.g. for --help) costs nothing
+        self._config = None
+
+    @property
+    def config(self):
+        '''
+        The configuration values, loaded from the file the first time they are needed.
+        '''
+        if self._config is None:
+            self._config = self._load_config()
+        return self._config
+
+    @config.setter
+    def config(self, value):
+        self._config = value
 
     def _load_config(self):
         '''
@@ -33,6 +46,8 @@ class ConfigLoader:
         Returns:
             dict: The configuration values from the file
         '''
+        import yaml  # pylint: disable=C0415
+
         try:
             with open(self.config_file, "r", encoding="utf-8") as file:
                 return yaml.safe_load(file) or {}
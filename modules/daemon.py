@@ -0,0 +1,281 @@
+'''
+This module is responsible for running the assessment continuously, spreading each account's checks across the interval.
+modules/daemon.py
+'''
+import heapq
+import os
+import random
+import signal
+import threading
+import time
+from dataclasses import dataclass, field
+
+import botocore.exceptions
+
+from modules.assessment import AssessmentOptions, run_assessment
+from modules.aws.macie import prefetch_member_status
+from modules.aws.organizations import get_organization_info, iter_member_accounts
+from modules.aws.session import create_session
+from modules.checks import select_checks
+from modules.config import config
+
+DEFAULT_INTERVAL = 3600
+DEFAULT_JITTER = 0.1
+# How often config.yaml is checked for changes while idle
+CONFIG_POLL_SECONDS = 5
+# First retry delay after a failed discovery, doubled on each further failure up to the interval
+DISCOVERY_RETRY_SECONDS = 60
+
+@dataclass
+class AccountState:
+    '''
+    Data class to hold the schedule of a single account.
+    '''
+    profile: str
+    is_management: bool
+    include_control_tower: bool
+    next_due: float = 0.0
+    # Check name to the monotonic time it is next due
+    check_due: dict = field(default_factory=dict)
+
+class AssessmentDaemon:
+    '''
+    Keeps sessions and clients warm between runs and schedules each account's checks on their own cadence.
+    New accounts are spread evenly across the interval and every reschedule is jittered, so API load stays
+    flat instead of spiking at the top of the hour. Changes to config.yaml are picked up without a restart.
+    '''
+    # pylint: disable=R0902,R0913,R0917
+    def __init__(self, archive=None, sinks=None, checks=None, follow=False, interval=None, tier="deep"):
+        '''
+        Initialize the daemon.
+
+        Args:
+            archive (ResponseArchive): Optional archive to record responses to or replay them from.
+            sinks (list): Finding sinks that receive each finding as soon as it is produced.
+            checks (list): Names of the checks to run. All checks run if not given.
+            follow (bool): Also assess every member account when the configured account is the management account.
+            interval (float): Seconds between runs of each check, overriding daemon.interval in config.yaml.
+            tier (str): "essential" or "deep".
+
+        Returns:
+            None
+        '''
+        self.archive = archive
+        self.sinks = sinks or []
+        self.checks = checks
+        self.follow = follow
+        self.tier = tier
+        self._interval_override = interval
+        self._stop = threading.Event()
+        self._reload_requested = threading.Event()
+        self._sessions = {}
+        self._shared_state = {}
+        self._accounts = {}
+        self._heap = []
+        self._next_discovery = 0.0
+        self._discovery_failures = 0
+        self._config_mtime = self._config_file_mtime()
+        self._apply_config()
+
+    def _apply_config(self):
+        self.profile = config.get("aws.profile")
+        self.region = config.get("aws.region")
+        self.interval = float(self._interval_override or config.get("daemon.interval", DEFAULT_INTERVAL))
+        self.jitter = float(config.get("daemon.jitter", DEFAULT_JITTER))
+        self.cadence = {name: float(seconds) for name, seconds in (config.get("daemon.cadence", {}) or {}).items()}
+
+    def cadence_for(self, check_name):
+        '''
+        Seconds between runs of a check, from daemon.cadence in config.yaml or the default interval.
+        '''
+        return self.cadence.get(check_name, self.interval)
+
+    def _jittered(self, seconds):
+        return seconds * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def stop(self, *_args):
+        '''
+        Ask the daemon to finish the current account and exit.
+        '''
+        self._stop.set()
+
+    def request_reload(self, *_args):
+        '''
+        Ask the daemon to reload config.yaml before the next account runs.
+        '''
+        self._reload_requested.set()
+
+    def run(self):
+        '''
+        Run until stopped by SIGINT or SIGTERM. SIGHUP reloads config.yaml.
+
+        Args:
+            None
+
+        Returns:
+            None
+        '''
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        if hasattr(signal, "SIGHUP"):
+            signal.signal(signal.SIGHUP, self.request_reload)
+
+        print(f"🔁 Continuous assessment started, interval {self.interval:.0f}s with {self.jitter:.0%} jitter")
+        while not self._stop.is_set():
+            wake = self._step()
+            if wake is not None:
+                self._stop.wait(max(0.0, wake - time.monotonic()))
+        print("🔁 Continuous assessment stopped.")
+
+    def _step(self):
+        '''
+        Do the next piece of due work: reload config.yaml if it changed, discover accounts or run one account.
+
+        Returns:
+            float: Monotonic time to sleep until when nothing was due, None to step again straight away.
+        '''
+        self._reload_if_changed()
+        now = time.monotonic()
+
+        if now >= self._next_discovery:
+            if self._discover(now):
+                self._discovery_failures = 0
+                self._next_discovery = now + self.interval
+            else:
+                # Retry soon rather than leaving the daemon idle for a whole interval
+                self._next_discovery = now + min(self.interval, DISCOVERY_RETRY_SECONDS * 2 ** self._discovery_failures)
+                self._discovery_failures += 1
+            return None
+
+        if self._heap and self._heap[0][0] <= now:
+            due, profile = heapq.heappop(self._heap)
+            state = self._accounts.get(profile)
+            # Entries for removed or rescheduled accounts are left in the heap and skipped here
+            if state is not None and state.next_due == due:
+                self._run_account(state)
+            return None
+
+        return min([self._next_discovery, now + CONFIG_POLL_SECONDS] + ([self._heap[0][0]] if self._heap else []))
+
+    def _session(self, profile):
+        if profile not in self._sessions:
+            self._sessions[profile] = create_session(profile, self.region, self.archive)
+        return self._sessions[profile]
+
+    def _discover(self, now):
+        '''
+        Refresh the set of accounts to assess and place new ones evenly across the interval.
+
+        Returns:
+            bool: False if the accounts could not be discovered.
+        '''
+        try:
+            session = self._session(self.profile)
+            org_id, management_account = get_organization_info(session)
+            is_management = self.profile == management_account
+            found = {self.profile: (is_management, True)}
+            if self.follow and is_management:
+                for account in iter_member_accounts(session):
+                    found.setdefault(account, (False, False))
+        except (botocore.exceptions.BotoCoreError, botocore.exceptions.ClientError) as e:
+            print(f"❌ Unable to discover accounts: {str(e)}")
+            return False
+
+        for profile in set(self._accounts) - set(found):
+            del self._accounts[profile]
+            self._sessions.pop(profile, None)
+
+        # Members skip Macie once the delegated administrator's view of them is collected
+        if self.follow and is_management and any(check.name == "macie" for check in select_checks(self.checks, self.tier)):
+            prefetch_member_status(session, self._session, self._shared_state, self.tier == "deep")
+
+        new_profiles = sorted(set(found) - set(self._accounts))
+        if not new_profiles:
+            return True
+        print(f"🔁 Scheduling {len(new_profiles)} new accounts{f' in Org {org_id}' if org_id else ''}")
+
+        slot = self.interval / len(new_profiles)
+        for position, profile in enumerate(new_profiles):
+            state = AccountState(profile, *found[profile])
+            # One slot per account, with a random offset inside the slot
+            first_run = now + slot * (position + random.random())
+            state.check_due = {check.name: first_run for check in select_checks(self.checks, self.tier)}
+            self._accounts[profile] = state
+            self._schedule(state)
+        return True
+
+    def _schedule(self, state):
+        state.next_due = min(state.check_due.values())
+        heapq.heappush(self._heap, (state.next_due, state.profile))
+
+    def _run_account(self, state):
+        '''
+        Run every check that is due for an account and schedule the next run of each.
+        '''
+        now = time.monotonic()
+        # Checks due within the same second are batched into one run
+        due = [name for name, when in state.check_due.items() if when <= now + 1]
+        options = AssessmentOptions(
+            session=self._session(state.profile),
+            profile=state.profile,
+            region=self.region,
+            is_management=state.is_management,
+            include_org_checks=True,
+            include_control_tower=state.include_control_tower,
+            sinks=self.sinks,
+            checks=due,
+            shared_state=self._shared_state,
+            tier=self.tier
+        )
+        try:
+            run_assessment(options)
+        except Exception as e:  # pylint: disable=W0718
+            # One account failing must not end the long-running process, it is retried on its next due time
+            print(f"❌ Assessment failed for profile {state.profile}: {str(e)}")
+        # A check that timed out leaves the account with a fresh session
+        self._sessions[state.profile] = options.session
+
+        # Sinks that work per run, like the history store and Jira, end a run after each account pass
+        for sink in self.sinks:
+            if hasattr(sink, "flush"):
+                sink.flush()
+
+        finished = time.monotonic()
+        for name in due:
+            state.check_due[name] = finished + self._jittered(self.cadence_for(name))
+        self._schedule(state)
+
+    def _config_file_mtime(self):
+        try:
+            return os.path.getmtime(config.config_file)
+        except OSError:
+            return None
+
+    def _reload_if_changed(self):
+        mtime = self._config_file_mtime()
+        if mtime == self._config_mtime and not self._reload_requested.is_set():
+            return
+        self._config_mtime = mtime
+        self._reload_requested.clear()
+
+        previous = (self.profile, self.region)
+        config.reload_config()
+        self._apply_config()
+
+        if (self.profile, self.region) != previous:
+            # A different entry point or region means every session and schedule is stale
+            self._sessions.clear()
+            self._shared_state.clear()
+            self._accounts.clear()
+            self._heap.clear()
+            self._next_discovery = 0.0
+            return
+
+        # Pull in anything now scheduled further out than its new cadence allows
+        now = time.monotonic()
+        for state in self._accounts.values():
+            for name, when in state.check_due.items():
+                cadence = self.cadence_for(name)
+                if when - now > cadence:
+                    state.check_due[name] = now + cadence * random.random()
+            self._schedule(state)
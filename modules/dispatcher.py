@@ -0,0 +1,173 @@
+'''
+This module is responsible for delivering findings to chat webhooks in the background, coalesced into digest messages.
+modules/dispatcher.py
+'''
+import queue
+import random
+import threading
+import time
+from collections import defaultdict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Order used to decide which findings are worth notifying about, a check that ran out of time is as bad as one that failed
+STATUS_RANK = {"PASS": 0, "REVIEW": 1, "WARN": 2, "ERROR": 3, "TIMEOUT": 3}
+
+_STOP = object()
+
+class DigestDispatcher:
+    '''
+    Finding sink that queues findings and posts them from a background thread as per-account or per-severity digests.
+    Writing a finding never blocks the scan. Posting respects the platform's rate limit and backs off on throttling.
+    Subclasses provide the payload format and the platform's rate limit.
+    '''
+    # pylint: disable=R0902
+    name = "webhook"
+    # Requests per second allowed by the platform
+    rate_limit = 1.0
+
+    # pylint: disable=R0913,R0917
+    def __init__(self, webhook_url, group_by="account", min_status="WARN", max_batch=25, flush_interval=5.0, max_retries=5, queue_size=10000):
+        '''
+        Initialize the dispatcher and start its worker thread.
+
+        Args:
+            webhook_url (str): Incoming webhook URL to post digests to.
+            group_by (str): "account" or "severity", how findings are coalesced into messages.
+            min_status (str): Lowest finding status to notify about (PASS, REVIEW, WARN, ERROR), TIMEOUT ranks with ERROR.
+            max_batch (int): Maximum findings in a single message.
+            flush_interval (float): Seconds to wait for more findings before sending a partial digest.
+            max_retries (int): Attempts per message before giving up on it.
+            queue_size (int): Findings held in memory before new ones are dropped.
+
+        Returns:
+            None
+        '''
+        if group_by not in ("account", "severity"):
+            raise ValueError(f"Unknown digest grouping: {group_by}")
+        self.webhook_url = webhook_url
+        self.group_by = group_by
+        self.min_rank = STATUS_RANK.get(min_status, STATUS_RANK["WARN"])
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._next_slot = 0.0
+        self._http = requests.Session()
+        self._http.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        self._http.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        self._thread = threading.Thread(target=self._run, name=f"{self.name}-dispatcher", daemon=True)
+        self._thread.start()
+
+    def format_digest(self, title, findings):
+        '''
+        Build the JSON payload for one digest message. Implemented by each platform.
+        '''
+        raise NotImplementedError
+
+    def write(self, finding):
+        '''
+        Queue a finding for delivery without waiting on the network.
+        '''
+        if STATUS_RANK.get(finding.status, 0) < self.min_rank:
+            return
+        try:
+            self._queue.put_nowait(finding)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self, timeout=60):
+        '''
+        Send everything still queued and stop the worker thread.
+
+        Args:
+            timeout (float): Seconds to wait for outstanding messages to be delivered.
+
+        Returns:
+            None
+        '''
+        deadline = time.monotonic() + timeout
+        while self._thread.is_alive():
+            try:
+                self._queue.put(_STOP, timeout=0.5)
+                break
+            except queue.Full:
+                if time.monotonic() >= deadline:
+                    break
+        self._thread.join(max(0.0, deadline - time.monotonic()))
+        self._http.close()
+        if self.failed or self.dropped:
+            print(f"⚠ {self.name}: {self.sent} digests sent, {self.failed} failed, {self.dropped} findings dropped")
+
+    def _group(self, finding):
+        if self.group_by == "severity":
+            return finding.status
+        return f"{finding.profile} ({finding.account_id})"
+
+    def _run(self):
+        pending = defaultdict(list)
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                self._flush(pending)
+                return
+
+            if item is not None:
+                group = self._group(item)
+                pending[group].append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+                if len(pending[group]) >= self.max_batch:
+                    self._send(group, pending.pop(group))
+
+            if deadline is not None and time.monotonic() >= deadline:
+                self._flush(pending)
+                deadline = None
+
+    def _flush(self, pending):
+        for group in list(pending):
+            self._send(group, pending.pop(group))
+
+    def _wait_for_slot(self):
+        now = time.monotonic()
+        if now < self._next_slot:
+            time.sleep(self._next_slot - now)
+        self._next_slot = max(now, self._next_slot) + 1.0 / self.rate_limit
+
+    def _send(self, group, findings):
+        payload = self.format_digest(group, findings)
+        for attempt in range(self.max_retries):
+            self._wait_for_slot()
+            try:
+                response = self._http.post(self.webhook_url, json=payload, timeout=10)
+            except requests.RequestException:
+                response = None
+
+            if response is not None and response.status_code < 300:
+                self.sent += 1
+                return
+
+            if response is not None and response.status_code < 500 and response.status_code != 429:
+                # Not retryable, the payload or webhook itself is rejected
+                break
+
+            retry_after = response.headers.get("Retry-After") if response is not None else None
+            try:
+                delay = float(retry_after)
+            except (TypeError, ValueError):
+                delay = min(30.0, 2 ** attempt) + random.uniform(0, 1)
+            # Hold every later request back too, not just this one
+            self._next_slot = max(self._next_slot, time.monotonic() + delay)
+
+        self.failed += 1
@@ -0,0 +1,299 @@
+'''
+This module is responsible for turning the assessment output into structured findings and streaming them to sinks.
+modules/findings.py
+'''
+import contextlib
+import contextvars
+import datetime
+import json
+import re
+import sys
+import threading
+from dataclasses import dataclass, field, asdict
+
+# Leading markers used by the checkers' output, mapped to a finding status
+STATUS_MARKERS = {
+    "✔": "PASS",
+    "⚠": "WARN",
+    "❌": "ERROR",
+    "👀": "REVIEW",
+    "⏭": "SKIPPED"
+}
+
+REGION_PATTERN = re.compile(r"\b[a-z]{2}(?:-gov)?-[a-z]+-\d\b")
+
+# Words describing the state of a setting rather than the setting itself, dropped from setting names
+STATE_WORDS = frozenset(("is", "are", "not", "no", "enabled", "disabled", "found", "in", "configured", "none"))
+_SETTING_WORD = re.compile(r"[a-z0-9]+(?:[._'-][a-z0-9]+)*")
+
+_active_capture = contextvars.ContextVar("aws_assess_capture", default=None)
+
+def setting_name(message):
+    '''
+    Normalize the subject of a message into a setting name, dropping state words, counts and region names.
+
+    Args:
+        message (str): Finding message
+
+    Returns:
+        str: Lowercase setting name
+    '''
+    words = _SETTING_WORD.findall(message.split(":", 1)[0].lower())
+    return " ".join(
+        word for word in words
+        if word not in STATE_WORDS and not word.isdigit() and not REGION_PATTERN.fullmatch(word)
+    )
+
+@dataclass
+class Finding:
+    '''
+    Data class to hold a single finding produced by a check.
+    '''
+    # pylint: disable=R0902
+    account_id: str
+    profile: str
+    check: str
+    status: str
+    message: str
+    region: str = None
+    details: list = field(default_factory=list)
+    timestamp: str = field(default_factory=lambda: datetime.datetime.now(datetime.timezone.utc).isoformat())
+
+    @property
+    def subject(self):
+        '''
+        The part of the message that identifies what was checked, without the observed value.
+        '''
+        return self.message.split(":", 1)[0].strip()
+
+    @property
+    def setting(self):
+        '''
+        Normalized name of the setting that was checked, the same whatever its state.
+        "AWS Config is Enabled" and "AWS Config is NOT Enabled" are both "aws config".
+        '''
+        return setting_name(self.message)
+
+    def to_dict(self):
+        '''
+        Return the finding as a plain dictionary.
+        '''
+        return asdict(self)
+
+class FindingCapture:
+    '''
+    Parses the lines printed by a single check into findings and hands each one to the sinks as soon as it is complete.
+    A finding is a marker line (✔, ⚠, ❌, 👀) plus any unmarked detail lines printed after it.
+    '''
+    # pylint: disable=R0902
+    def __init__(self, account_id, profile, check, sinks):
+        '''
+        Initialize the capture for one check in one account.
+
+        Args:
+            account_id (str): AWS account ID
+            profile (str): AWS profile name
+            check (str): Name of the check being run
+            sinks (list): Objects with write(finding) and close() methods
+
+        Returns:
+            None
+        '''
+        self.account_id = account_id
+        self.profile = profile
+        self.check = check
+        self.sinks = sinks
+        self.closed = False
+        self._buffer = ""
+        self._pending = None
+        self._region = None
+        self._lock = threading.Lock()
+
+    def feed(self, text):
+        '''
+        Consume printed text, parsing each complete line.
+        '''
+        with self._lock:
+            if self.closed:
+                return
+            self._buffer += text
+            while "\n" in self._buffer:
+                line, self._buffer = self._buffer.split("\n", 1)
+                self._parse_line(line)
+
+    def emit(self, status, message, region=None):
+        '''
+        Record a finding directly, without going through printed output.
+        '''
+        with self._lock:
+            if self.closed:
+                return
+            self._flush_pending()
+            self._pending = Finding(self.account_id, self.profile, self.check, status, message, region)
+
+    def set_region(self, region):
+        '''
+        Attribute the lines parsed from now on to a region, or to none.
+        '''
+        with self._lock:
+            self._region = region
+            self._flush_pending()
+
+    def _parse_line(self, line):
+        stripped = line.strip()
+        if not stripped or stripped.startswith("🔍"):
+            return
+
+        marker = next((m for m in STATUS_MARKERS if stripped.startswith(m)), None)
+        if marker is None:
+            if self._pending is not None:
+                self._pending.details.append(stripped.lstrip("-").strip())
+            return
+
+        self._flush_pending()
+        message = stripped[len(marker):].strip()
+        # A line naming a region belongs to it, other lines to the regional pass the check is in, if any
+        match = REGION_PATTERN.search(message)
+        region = match.group(0) if match else self._region
+        self._pending = Finding(self.account_id, self.profile, self.check, STATUS_MARKERS[marker], message, region)
+
+    def _flush_pending(self):
+        if self._pending is None:
+            return
+        finding, self._pending = self._pending, None
+        for sink in self.sinks:
+            sink.write(finding)
+
+    def close(self):
+        '''
+        Flush any remaining output and stop accepting more.
+        '''
+        with self._lock:
+            if self.closed:
+                return
+            if self._buffer:
+                self._parse_line(self._buffer)
+                self._buffer = ""
+            self._flush_pending()
+            self.closed = True
+
+class _StdoutRouter:
+    '''
+    Stands in for sys.stdout, passing text through to the real stream and to the capture of the check currently running.
+    '''
+    def __init__(self, stream):
+        self._stream = stream
+
+    def write(self, text):
+        '''
+        Write text to the underlying stream and the active capture.
+        '''
+        capture = _active_capture.get()
+        if capture is not None:
+            if capture.closed:
+                return len(text)
+            capture.feed(text)
+        return self._stream.write(text)
+
+    def flush(self):
+        '''
+        Flush the underlying stream.
+        '''
+        self._stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+def set_region(region=None):
+    '''
+    Attribute the findings the running check prints from now on to a region. Regional checks call it at the start
+    of each regional pass and with no region once the pass is over, so the region of a finding never depends on
+    lines printed before it.
+
+    Args:
+        region (str): AWS region, None for findings that are not regional
+
+    Returns:
+        None
+    '''
+    capture = _active_capture.get()
+    if capture is not None:
+        capture.set_region(region)
+
+@contextlib.contextmanager
+def route_stdout(stream=None):
+    '''
+    Route printed output through the finding parser for the duration of the block.
+
+    Args:
+        stream (file): Where human readable output should go. Defaults to the current sys.stdout.
+
+    Returns:
+        None
+    '''
+    original = sys.stdout
+    sys.stdout = _StdoutRouter(stream or original)
+    try:
+        yield
+    finally:
+        sys.stdout.flush()
+        sys.stdout = original
+
+@contextlib.contextmanager
+def capture_findings(account_id, profile, check, sinks):
+    '''
+    Attribute everything printed inside the block to a check and stream the resulting findings to the sinks.
+
+    Args:
+        account_id (str): AWS account ID
+        profile (str): AWS profile name
+        check (str): Name of the check being run
+        sinks (list): Objects with write(finding) and close() methods
+
+    Returns:
+        FindingCapture: The capture for the block
+    '''
+    capture = FindingCapture(account_id, profile, check, sinks)
+    token = _active_capture.set(capture)
+    try:
+        yield capture
+    finally:
+        _active_capture.reset(token)
+        capture.close()
+
+class NdjsonSink:
+    '''
+    Writes one JSON object per finding per line, flushing after each so downstream tools can consume results mid-scan.
+    '''
+    def __init__(self, path):
+        '''
+        Open the output.
+
+        Args:
+            path (str): File to write to, or "-" for stdout.
+
+        Returns:
+            None
+        '''
+        self._owns_stream = path != "-"
+        self._stream = open(path, "w", encoding="utf-8") if self._owns_stream else sys.stdout  # pylint: disable=R1732
+        self._lock = threading.Lock()
+
+    def write(self, finding):
+        '''
+        Write a single finding.
+        '''
+        line = json.dumps(finding.to_dict(), ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            self._stream.write(line + "\n")
+            self._stream.flush()
+
+    def close(self):
+        '''
+        Close the output if this sink opened it.
+        '''
+        with self._lock:
+            if self._owns_stream:
+                self._stream.close()
+            else:
+                self._stream.flush()
@@ -0,0 +1,365 @@
+'''
+This module is responsible for keeping the findings of every run in a local SQLite database and querying them for trends.
+modules/history.py
+'''
+import datetime
+import json
+import re
+import sqlite3
+import threading
+
+SCHEMA = (
+    '''
+    CREATE TABLE IF NOT EXISTS runs (
+        id INTEGER PRIMARY KEY,
+        started_at TEXT NOT NULL,
+        finished_at TEXT,
+        accounts INTEGER NOT NULL DEFAULT 0,
+        findings INTEGER NOT NULL DEFAULT 0
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS findings (
+        id INTEGER PRIMARY KEY,
+        run_id INTEGER NOT NULL REFERENCES runs (id),
+        account_id TEXT,
+        profile TEXT,
+        check_name TEXT NOT NULL,
+        region TEXT,
+        subject TEXT NOT NULL,
+        setting TEXT NOT NULL,
+        status TEXT NOT NULL,
+        message TEXT NOT NULL,
+        details TEXT,
+        timestamp TEXT NOT NULL
+    )
+    ''',
+    "CREATE INDEX IF NOT EXISTS idx_runs_started_at ON runs (started_at)",
+    "CREATE INDEX IF NOT EXISTS idx_findings_run ON findings (run_id, status)",
+    "CREATE INDEX IF NOT EXISTS idx_findings_account ON findings (account_id, check_name, region, setting)",
+    "CREATE INDEX IF NOT EXISTS idx_findings_check ON findings (check_name, region)",
+    "CREATE INDEX IF NOT EXISTS idx_findings_region ON findings (region)",
+    "CREATE INDEX IF NOT EXISTS idx_findings_timestamp ON findings (timestamp)"
+)
+
+INSERT_FINDING = (
+    "INSERT INTO findings (run_id, account_id, profile, check_name, region, subject, setting, status, message, details, timestamp) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+BATCH_SIZE = 500
+
+STATUSES = ("PASS", "REVIEW", "WARN", "ERROR")
+GAP_STATUSES = ("WARN", "ERROR")
+
+_DURATION = re.compile(r"^(\d+)([mhdw])$")
+_DURATION_UNITS = {"m": "minutes", "h": "hours", "d": "days", "w": "weeks"}
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+def connect(path):
+    '''
+    Open the history database, creating the tables and indexes if needed.
+
+    Args:
+        path (str): Path of the SQLite database file.
+
+    Returns:
+        sqlite3.Connection: The open connection
+    '''
+    connection = sqlite3.connect(path, check_same_thread=False)
+    connection.row_factory = sqlite3.Row
+    # WAL lets queries read while a daemon is writing, and NORMAL sync is durable enough for a history
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    with connection:
+        for statement in SCHEMA:
+            connection.execute(statement)
+    return connection
+
+def parse_since(value):
+    '''
+    Turn a relative duration (30d, 12h, 2w, 90m) or an ISO date into a UTC ISO timestamp.
+
+    Args:
+        value (str): Duration or date
+
+    Returns:
+        str: ISO timestamp, or None if no value was given
+    '''
+    if not value:
+        return None
+    match = _DURATION.match(value.strip())
+    if match:
+        delta = datetime.timedelta(**{_DURATION_UNITS[match.group(2)]: int(match.group(1))})
+        return (datetime.datetime.now(datetime.timezone.utc) - delta).isoformat()
+    moment = datetime.datetime.fromisoformat(value.strip())
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=datetime.timezone.utc)
+    return moment.astimezone(datetime.timezone.utc).isoformat()
+
+class HistoryStore:
+    '''
+    Finding sink that records every finding in the history database.
+    A run is one transaction: it is opened by the first finding, findings are inserted in batches as they arrive
+    and it is committed by flush(), so recording a large scan costs one commit and memory stays flat whatever the
+    size of the organization. A run is everything written between two flushes: the whole scan, or one account pass
+    in --daemon mode.
+    '''
+    # pylint: disable=R0902
+    def __init__(self, path, batch_size=BATCH_SIZE):
+        '''
+        Open the database.
+
+        Args:
+            path (str): Path of the SQLite database file.
+            batch_size (int): Findings held in memory before they are inserted.
+
+        Returns:
+            None
+        '''
+        self.path = path
+        self.batch_size = batch_size
+        self.runs = 0
+        self._connection = connect(path)
+        self._rows = []
+        self._run_id = None
+        self._findings = 0
+        # Failures while writing are reported by flush(), a sink must not print from write()
+        self._errors = []
+        self._lock = threading.Lock()
+
+    def write(self, finding):
+        '''
+        Record a finding in the current run, inserting a batch once enough findings have arrived.
+        '''
+        row = (
+            finding.account_id, finding.profile, finding.check, finding.region, finding.subject, finding.setting,
+            finding.status, finding.message, json.dumps(finding.details) if finding.details else None, finding.timestamp
+        )
+        with self._lock:
+            try:
+                if self._run_id is None:
+                    # Opens the run's transaction, committed by flush()
+                    cursor = self._connection.execute("INSERT INTO runs (started_at) VALUES (?)", (finding.timestamp,))
+                    self._run_id = cursor.lastrowid
+                self._rows.append(row)
+                if len(self._rows) >= self.batch_size:
+                    self._insert_rows()
+            except sqlite3.Error as e:
+                self._abandon_run(e)
+
+    def _insert_rows(self):
+        rows, self._rows = self._rows, []
+        self._connection.executemany(INSERT_FINDING, ((self._run_id,) + row for row in rows))
+        self._findings += len(rows)
+
+    def _abandon_run(self, error):
+        self._errors.append(f"❌ History error, {self._findings + len(self._rows)} findings not recorded: {str(error)}")
+        self._connection.rollback()
+        self._rows, self._run_id, self._findings = [], None, 0
+
+    def flush(self):
+        '''
+        Insert the remaining findings and commit the current run.
+
+        Args:
+            None
+
+        Returns:
+            int: ID of the run written, or None if there was nothing to write.
+        '''
+        with self._lock:
+            run_id, findings = self._run_id, 0
+            if run_id is not None:
+                try:
+                    self._insert_rows()
+                    accounts = self._connection.execute(
+                        "SELECT COUNT(DISTINCT account_id) FROM findings WHERE run_id = ?", (run_id,)
+                    ).fetchone()[0]
+                    self._connection.execute(
+                        "UPDATE runs SET finished_at = ?, accounts = ?, findings = ? WHERE id = ?",
+                        (_now(), accounts, self._findings, run_id)
+                    )
+                    self._connection.commit()
+                    findings = self._findings
+                except sqlite3.Error as e:
+                    self._abandon_run(e)
+                    run_id = None
+                self._run_id, self._findings = None, 0
+            errors, self._errors = self._errors, []
+        for error in errors:
+            print(error)
+        if run_id is None:
+            return None
+        self.runs += 1
+        print(f"✔ History: run {run_id} with {findings} findings recorded in {self.path}")
+        return run_id
+
+    def close(self):
+        '''
+        Commit the current run and close the database.
+        '''
+        try:
+            self.flush()
+        finally:
+            self._connection.close()
+
+def _filters(account=None, check=None, region=None, subject=None):
+    '''
+    Build the WHERE clause shared by the queries.
+    '''
+    clauses, parameters = [], []
+    if account:
+        clauses.append("(f.account_id = ? OR f.profile = ?)")
+        parameters += [account, account]
+    if check:
+        clauses.append("f.check_name = ?")
+        parameters.append(check)
+    if region:
+        clauses.append("f.region = ?")
+        parameters.append(region)
+    if subject:
+        clauses.append("f.subject LIKE ?")
+        parameters.append(f"%{subject}%")
+    return clauses, parameters
+
+def list_runs(connection, since=None, limit=20):
+    '''
+    List the most recent runs.
+
+    Args:
+        connection (sqlite3.Connection): Open history database
+        since (str): Only include runs started at or after this ISO timestamp.
+        limit (int): Maximum number of runs.
+
+    Returns:
+        list: Run rows, newest first
+    '''
+    return connection.execute(
+        "SELECT id, started_at, finished_at, accounts, findings FROM runs WHERE started_at >= ? ORDER BY id DESC LIMIT ?",
+        (since or "", limit)
+    ).fetchall()
+
+def trend(connection, since=None, **filters):
+    '''
+    Count findings per status for each run.
+
+    Args:
+        connection (sqlite3.Connection): Open history database
+        since (str): Only include runs started at or after this ISO timestamp.
+        filters: account, check, region and subject filters.
+
+    Returns:
+        list: (run ID, started at, accounts, {status: count}) tuples, oldest first
+    '''
+    clauses, parameters = _filters(**filters)
+    clauses.append("r.started_at >= ?")
+    parameters.append(since or "")
+    counts = ", ".join(f"SUM(f.status = '{status}') AS {status}" for status in STATUSES)
+    rows = connection.execute(
+        f"SELECT r.id, r.started_at, COUNT(DISTINCT f.account_id) AS accounts, {counts} "
+        "FROM findings f JOIN runs r ON r.id = f.run_id "
+        f"WHERE {' AND '.join(clauses)} GROUP BY r.id ORDER BY r.id",
+        parameters
+    ).fetchall()
+    return [(row["id"], row["started_at"], row["accounts"], {status: row[status] for status in STATUSES}) for row in rows]
+
+def latest_status(connection, until=None, **filters):
+    '''
+    The most recent finding for every account, check, region and setting before a point in time.
+    Findings are matched on the setting name, so a setting that changed state is still the same setting.
+
+    Args:
+        connection (sqlite3.Connection): Open history database
+        until (str): Ignore findings recorded at or after this ISO timestamp.
+        filters: account, check, region and subject filters.
+
+    Returns:
+        dict: (account ID, check, region, setting) to the finding row
+    '''
+    clauses, parameters = _filters(**filters)
+    if until:
+        clauses.append("f.timestamp < ?")
+        parameters.append(until)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    rows = connection.execute(
+        "SELECT * FROM ("
+        "SELECT f.account_id, f.profile, f.check_name, f.region, f.subject, f.setting, f.status, f.message, f.timestamp, "
+        "ROW_NUMBER() OVER (PARTITION BY f.account_id, f.check_name, f.region, f.setting "
+        "ORDER BY f.timestamp DESC, f.id DESC) AS position "
+        f"FROM findings f {where}) WHERE position = 1",
+        parameters
+    ).fetchall()
+    return {(row["account_id"], row["check_name"], row["region"], row["setting"]): row for row in rows}
+
+def diff(connection, since=None, until=None, **filters):
+    '''
+    Compare the posture at two points in time.
+    Only settings assessed at both points are compared, so a check that did not run is not reported as resolved.
+
+    Args:
+        connection (sqlite3.Connection): Open history database
+        since (str): ISO timestamp of the baseline. Defaults to the start of the latest run.
+        until (str): ISO timestamp to compare against the baseline. Defaults to the latest findings.
+        filters: account, check, region and subject filters.
+
+    Returns:
+        dict: "regressed", "resolved" and "changed" lists of (before, after) finding rows
+    '''
+    if since is None:
+        latest = connection.execute("SELECT started_at FROM runs ORDER BY id DESC LIMIT 1").fetchone()
+        since = latest["started_at"] if latest else ""
+    before = latest_status(connection, since, **filters)
+    after = latest_status(connection, until, **filters)
+    result = {"regressed": [], "resolved": [], "changed": []}
+    for key in sorted(before.keys() & after.keys(), key=lambda item: tuple(part or "" for part in item)):
+        old, new = before[key], after[key]
+        if old["status"] == new["status"]:
+            continue
+        if new["status"] in GAP_STATUSES and old["status"] not in GAP_STATUSES:
+            result["regressed"].append((old, new))
+        elif old["status"] in GAP_STATUSES and new["status"] not in GAP_STATUSES:
+            result["resolved"].append((old, new))
+        else:
+            result["changed"].append((old, new))
+    return result
+
+def print_runs(connection, since=None, limit=20):
+    '''
+    Print the most recent runs.
+    '''
+    runs = list_runs(connection, since, limit)
+    if not runs:
+        print("⚠ No runs recorded")
+        return
+    print(f"{'Run':>6}  {'Started':<19}  {'Accounts':>8}  {'Findings':>8}")
+    for run in runs:
+        print(f"{run['id']:>6}  {run['started_at'][:19]:<19}  {run['accounts']:>8}  {run['findings']:>8}")
+
+def print_trend(connection, since=None, **filters):
+    '''
+    Print the findings per status for each run.
+    '''
+    runs = trend(connection, since, **filters)
+    if not runs:
+        print("⚠ No findings recorded for this selection")
+        return
+    print(f"{'Run':>6}  {'Started':<19}  {'Accounts':>8}  " + "  ".join(f"{status:>6}" for status in STATUSES))
+    for run_id, started_at, accounts, counts in runs:
+        print(f"{run_id:>6}  {started_at[:19]:<19}  {accounts:>8}  " + "  ".join(f"{counts.get(status, 0):>6}" for status in STATUSES))
+
+def print_diff(connection, since=None, until=None, **filters):
+    '''
+    Print what regressed, what was resolved and what otherwise changed between two points in time.
+    '''
+    result = diff(connection, since, until, **filters)
+    sections = (("regressed", "❌ Regressed"), ("resolved", "✔ Resolved"), ("changed", "👀 Changed"))
+    for name, heading in sections:
+        print(f"\n{heading}: {len(result[name])}")
+        for old, new in result[name]:
+            region = f" {new['region']}" if new["region"] else ""
+            print(f"    {new['profile']} ({new['account_id']}) {new['check_name']}{region}: {new['subject']}  {old['status']} -> {new['status']}")
+            print(f"        {old['timestamp'][:19]}: {old['message']}")
+            print(f"        {new['timestamp'][:19]}: {new['message']}")
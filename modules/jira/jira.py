@@ -0,0 +1,346 @@
+'''
+This module is responsible for reconciling assessment gaps with Jira issues.
+modules/jira/jira.py
+'''
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from modules.checks import TIERS
+
+LABEL = "aws-assess"
+# Per-issue labels carry everything needed to reconcile an issue without reading its description
+FINGERPRINT_LABEL = f"{LABEL}-fp-"
+ACCOUNT_LABEL = f"{LABEL}-account-"
+CHECK_LABEL = f"{LABEL}-check-"
+GAP_STATUSES = ("WARN", "ERROR")
+# A check that timed out, failed or hit an API error may not have seen every gap, so none of its issues are closed
+INCOMPLETE_STATUSES = ("TIMEOUT", "ERROR")
+BULK_CREATE_LIMIT = 50
+SEARCH_PAGE_SIZE = 100
+# Searches are limited to the accounts of a pass when there are at most this many, as in --daemon mode
+ACCOUNT_SEARCH_LIMIT = 20
+
+def fingerprint(finding):
+    '''
+    Identify a gap independently of its observed value, so the same gap maps to the same issue across runs.
+    The setting name drops counts and state words, so "Macie is Enabled in 3/17 regions" and
+    "Macie is Enabled in 4/17 regions" update the same issue.
+
+    Args:
+        finding (Finding): The finding to fingerprint.
+
+    Returns:
+        str: A short hex fingerprint.
+    '''
+    material = "|".join([finding.account_id or "", finding.check, finding.region or "", finding.setting])
+    return hashlib.sha1(material.encode("utf-8")).hexdigest()[:16]
+
+class JiraSink:
+    '''
+    Finding sink that keeps one Jira issue per outstanding gap.
+    Gaps are collected during the scan and reconciled once at the end against a local fingerprint to issue index
+    and the open issues loaded in bulk, so a re-scan only sends the differences. In --daemon mode every account
+    pass is reconciled on its own when the sink is flushed.
+    '''
+    # pylint: disable=R0902,R0913,R0917
+    def __init__(self, url, project, auth, issue_type="Task", index_file=".aws-assess-jira.json", done_transition="Done",
+                 search_path="/rest/api/2/search", workers=4, tier="deep"):
+        '''
+        Initialize the sink.
+
+        Args:
+            url (str): Base URL of the Jira instance.
+            project (str): Jira project key issues are created in.
+            auth (tuple or str): (email, api_token) for basic auth, or a personal access token.
+            issue_type (str): Issue type name for new issues.
+            index_file (str): Path of the local fingerprint to issue index.
+            done_transition (str): Name of the workflow transition used to close resolved gaps.
+            search_path (str): JQL search endpoint, "/rest/api/2/search/jql" on Jira Cloud.
+            workers (int): Concurrent requests used for updates and transitions.
+            tier (str): Tier of the scan. A gap is only closed by a scan of a tier that has reported it before.
+
+        Returns:
+            None
+        '''
+        self.url = url.rstrip("/")
+        self.project = project
+        self.issue_type = issue_type
+        self.index_file = index_file
+        self.done_transition = done_transition
+        self.search_path = search_path
+        self.workers = workers
+        self.tier = tier
+        self._gaps = {}
+        self._scanned = set()
+        self._incomplete = set()
+        self._transition_id = None
+
+        self._http = requests.Session()
+        self._http.mount(self.url, HTTPAdapter(pool_connections=1, pool_maxsize=workers))
+        self._http.headers.update({"Accept": "application/json", "Content-Type": "application/json"})
+        if isinstance(auth, tuple):
+            self._http.auth = auth
+        else:
+            self._http.headers["Authorization"] = f"Bearer {auth}"
+
+    def write(self, finding):
+        '''
+        Collect a finding. Only warnings and errors become issues.
+        '''
+        self._scanned.add((finding.account_id, finding.check))
+        if finding.status in INCOMPLETE_STATUSES:
+            self._incomplete.add((finding.account_id, finding.check))
+        if finding.status in GAP_STATUSES:
+            self._gaps[fingerprint(finding)] = finding
+
+    def flush(self):
+        '''
+        Reconcile the gaps collected since the last flush with Jira, save the index and start collecting afresh.
+
+        Args:
+            None
+
+        Returns:
+            dict: Counts of created, updated, closed and unchanged issues, or None if nothing was collected.
+        '''
+        if not self._scanned:
+            return None
+        try:
+            return self.reconcile()
+        except requests.RequestException as e:
+            print(f"❌ Jira error: {str(e)}")
+            return None
+        finally:
+            self._gaps, self._scanned, self._incomplete = {}, set(), set()
+
+    def close(self):
+        '''
+        Reconcile the collected gaps with Jira and save the index.
+        '''
+        try:
+            self.flush()
+        finally:
+            self._http.close()
+
+    def reconcile(self):
+        '''
+        Create issues for new gaps, update issues whose details changed and close issues whose gap is resolved.
+
+        Args:
+            None
+
+        Returns:
+            dict: Counts of created, updated, closed and unchanged issues.
+        '''
+        index = self._open_index()
+
+        to_create, to_update = [], []
+        for fp, finding in self._gaps.items():
+            fields = self._issue_fields(fp, finding)
+            digest = hashlib.sha1(json.dumps(fields, sort_keys=True).encode("utf-8")).hexdigest()
+            if fp not in index:
+                to_create.append((fp, finding, digest))
+                continue
+            # Remember the shallowest tier that reports the gap
+            index[fp]["tier"] = min(self.tier, index[fp]["tier"], key=TIERS.index)
+            if index[fp]["digest"] != digest:
+                to_update.append((fp, finding, digest))
+
+        # Only close gaps for checks that actually ran to completion in this scan, and only if this tier of
+        # scan reports the gap: an essential scan runs the same checks as a deep one but cannot see deep-only gaps.
+        completed = self._scanned - self._incomplete
+        to_close = [
+            fp for fp, entry in index.items()
+            if fp not in self._gaps and (entry["account_id"], entry["check"]) in completed
+            and TIERS.index(entry["tier"]) <= TIERS.index(self.tier)
+        ]
+
+        created = self._create_issues(to_create, index)
+        updated = self._update_issues(to_update, index)
+        closed = self._close_issues(to_close, index)
+        self._save_index(index)
+
+        counts = {
+            "created": created,
+            "updated": updated,
+            "closed": closed,
+            "unchanged": len(self._gaps) - len(to_create) - len(to_update)
+        }
+        print(f"✔ Jira: {counts['created']} created, {counts['updated']} updated, {counts['closed']} closed, {counts['unchanged']} unchanged")
+        return counts
+
+    def _open_index(self):
+        '''
+        Combine the local index with the issues open in Jira for the scanned accounts.
+        Issues closed or deleted in Jira are forgotten so a recurring gap gets a fresh issue. When only some
+        accounts were searched, the entries of the other accounts are kept as they are. An open issue missing from
+        the local index is refreshed by the next update and only closed by a deep scan, as its tier is unknown.
+        '''
+        previous = self._load_index()
+        accounts = {account_id for account_id, _ in self._scanned}
+        scoped = len(accounts) <= ACCOUNT_SEARCH_LIMIT
+        index = {fp: entry for fp, entry in previous.items() if scoped and entry.get("account_id") not in accounts}
+        unindexed = {"digest": None, "tier": "deep"}
+        index.update({
+            fp: dict(issue, digest=previous.get(fp, unindexed)["digest"], tier=previous.get(fp, unindexed)["tier"])
+            for fp, issue in self._load_open_issues(accounts if scoped else None).items()
+        })
+        return index
+
+    def _issue_fields(self, fp, finding):
+        details = "\n".join(f"* {line}" for line in finding.details)
+        description = (
+            f"*Account:* {finding.profile} ({finding.account_id})\n"
+            f"*Check:* {finding.check}\n"
+            f"*Region:* {finding.region or 'Global'}\n"
+            f"*Status:* {finding.status}\n\n"
+            f"{finding.message}\n{details}"
+        )
+        return {
+            "project": {"key": self.project},
+            "issuetype": {"name": self.issue_type},
+            "summary": f"[{finding.profile}] {finding.check}: {finding.message}"[:255],
+            "description": description,
+            "labels": [LABEL, f"{FINGERPRINT_LABEL}{fp}", f"{ACCOUNT_LABEL}{finding.account_id}", f"{CHECK_LABEL}{finding.check}"]
+        }
+
+    def _load_open_issues(self, accounts=None):
+        '''
+        Load every open issue created by this tool with paginated JQL searches.
+
+        Args:
+            accounts (set): Only load the issues of these account IDs. All issues are loaded if not given.
+
+        Returns:
+            dict: Fingerprint to issue key, account ID and check name.
+        '''
+        jql = f'project = "{self.project}" AND labels = "{LABEL}" AND statusCategory != Done'
+        if accounts is not None:
+            jql += " AND labels in (" + ", ".join(f'"{ACCOUNT_LABEL}{account}"' for account in sorted(accounts)) + ")"
+        query = {
+            "jql": jql,
+            "maxResults": SEARCH_PAGE_SIZE,
+            "fields": ["labels"]
+        }
+        open_issues = {}
+        fetched = 0
+        while True:
+            response = self._http.post(f"{self.url}{self.search_path}", json=query, timeout=30)
+            response.raise_for_status()
+            page = response.json()
+            issues = page.get("issues", [])
+            for issue in issues:
+                labels = issue.get("fields", {}).get("labels", [])
+                tags = {}
+                for prefix in (FINGERPRINT_LABEL, ACCOUNT_LABEL, CHECK_LABEL):
+                    tags[prefix] = next((label[len(prefix):] for label in labels if label.startswith(prefix)), None)
+                if tags[FINGERPRINT_LABEL]:
+                    open_issues[tags[FINGERPRINT_LABEL]] = {
+                        "key": issue["key"],
+                        "account_id": tags[ACCOUNT_LABEL],
+                        "check": tags[CHECK_LABEL]
+                    }
+            fetched += len(issues)
+
+            # Jira Cloud pages with a token, Jira Data Center with an offset
+            if page.get("nextPageToken"):
+                query["nextPageToken"] = page["nextPageToken"]
+            elif "total" in page and issues and fetched < page["total"]:
+                query["startAt"] = fetched
+            else:
+                return open_issues
+
+    def _create_issues(self, to_create, index):
+        created = 0
+        for start in range(0, len(to_create), BULK_CREATE_LIMIT):
+            batch = to_create[start:start + BULK_CREATE_LIMIT]
+            response = self._http.post(f"{self.url}/rest/api/2/issue/bulk", json={
+                "issueUpdates": [{"fields": self._issue_fields(fp, finding)} for fp, finding, _ in batch]
+            }, timeout=60)
+            # A 400 still carries the per-element results when only some issues were rejected
+            if response.status_code != 400:
+                response.raise_for_status()
+            result = response.json()
+            failed = {error.get("failedElementNumber") for error in result.get("errors", [])}
+            # Successful issues are returned in request order, skipping the failed elements
+            issues = iter(result.get("issues", []))
+            for position, (fp, finding, digest) in enumerate(batch):
+                if position in failed:
+                    continue
+                issue = next(issues, None)
+                if issue is None:
+                    break
+                index[fp] = {"key": issue["key"], "account_id": finding.account_id, "check": finding.check, "digest": digest, "tier": self.tier}
+                created += 1
+            if failed:
+                print(f"⚠ Jira rejected {len(failed)} issues in a bulk create")
+        return created
+
+    def _update_issues(self, to_update, index):
+        def update(item):
+            fp, finding, digest = item
+            fields = self._issue_fields(fp, finding)
+            editable = {name: value for name, value in fields.items() if name not in ("project", "issuetype")}
+            response = self._http.put(f"{self.url}/rest/api/2/issue/{index[fp]['key']}", json={"fields": editable}, timeout=30)
+            return fp, digest, response.status_code < 300
+
+        updated = 0
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for fp, digest, ok in executor.map(update, to_update):
+                if ok:
+                    index[fp]["digest"] = digest
+                    updated += 1
+        return updated
+
+    def _close_issues(self, to_close, index):
+        if not to_close:
+            return 0
+        transition_id = self._find_transition(index[to_close[0]]["key"])
+        if transition_id is None:
+            print(f"⚠ Jira transition '{self.done_transition}' not found, resolved gaps were left open")
+            return 0
+
+        def close(fp):
+            key = index[fp]["key"]
+            response = self._http.post(f"{self.url}/rest/api/2/issue/{key}/transitions", json={
+                "transition": {"id": transition_id}
+            }, timeout=30)
+            return fp, response.status_code < 300
+
+        closed = 0
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for fp, ok in executor.map(close, to_close):
+                if ok:
+                    del index[fp]
+                    closed += 1
+        return closed
+
+    def _find_transition(self, key):
+        if self._transition_id is None:
+            response = self._http.get(f"{self.url}/rest/api/2/issue/{key}/transitions", timeout=30)
+            response.raise_for_status()
+            for transition in response.json().get("transitions", []):
+                if transition.get("name", "").lower() == self.done_transition.lower():
+                    self._transition_id = transition["id"]
+        return self._transition_id
+
+    def _load_index(self):
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+        except json.JSONDecodeError as e:
+            print(f"⚠ Ignoring unreadable Jira index '{self.index_file}': {e}")
+            return {}
+
+    def _save_index(self, index):
+        temp_file = f"{self.index_file}.tmp"
+        with open(temp_file, "w", encoding="utf-8") as file:
+            json.dump(index, file, indent=2, sort_keys=True)
+        os.replace(temp_file, self.index_file)
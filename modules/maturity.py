@@ -0,0 +1,308 @@
+'''
+This module is responsible for scoring the maturity of every assessed account, OU and the organization as a whole.
+Findings are held in a compact account x check matrix so scores for thousands of accounts are computed in one pass.
+modules/maturity.py
+'''
+import datetime
+import html
+from dataclasses import dataclass
+
+import numpy as np
+
+# Cell values, ordered so that the worst result for a cell is the smallest
+NOT_ASSESSED = -1
+STATUS_CODES = {"ERROR": 0, "WARN": 1, "REVIEW": 2, "PASS": 3}
+# Cells at or below this value are gaps (NOT_ASSESSED wraps to 255 when viewed unsigned, so one comparison suffices)
+GAP_MAX_CODE = STATUS_CODES["WARN"]
+# Half points per cell value, indexed by cell value + 1: PASS earns 1 point, REVIEW half a point
+HALF_POINTS = np.array([0, 0, 0, 1, 2], dtype=np.int8)
+
+MATURITY_LEVELS = (
+    (0.9, "Optimized"),
+    (0.75, "Managed"),
+    (0.5, "Defined"),
+    (0.25, "Developing"),
+    (0.0, "Initial")
+)
+
+def maturity_level(score):
+    '''
+    Name the maturity level for a score between 0 and 1.
+    '''
+    if np.isnan(score):
+        return "Not assessed"
+    return next(name for threshold, name in MATURITY_LEVELS if score >= threshold)
+
+@dataclass
+class MaturityScores:
+    '''
+    Data class to hold the result of scoring a matrix.
+    '''
+    # pylint: disable=R0902
+    accounts: list
+    account_names: list
+    account_ous: list
+    checks: list
+    account_scores: np.ndarray
+    # Boolean account x check matrix of gaps
+    gaps: np.ndarray
+    ou_scores: dict
+    org_score: float
+    check_gap_counts: np.ndarray
+    check_assessed_counts: np.ndarray
+
+    def account_gaps(self, row):
+        '''
+        Names of the checks with a gap for the account at a row.
+        '''
+        return [self.checks[column] for column in np.flatnonzero(self.gaps[row]).tolist()]
+
+class MaturityMatrix:
+    '''
+    Finding sink storing the worst status seen for each account and check in an int8 matrix that grows as needed.
+    A check is identified by the check name and the setting name of the finding, which is the same whatever the
+    state of the setting and has region names dropped, so PASS and WARN land in the same cell and each cell
+    reflects the worst region.
+    '''
+    def __init__(self, accounts=64, checks=128):
+        '''
+        Initialize an empty matrix.
+
+        Args:
+            accounts (int): Initial account capacity.
+            checks (int): Initial check capacity.
+
+        Returns:
+            None
+        '''
+        self._cells = np.full((accounts, checks), NOT_ASSESSED, dtype=np.int8)
+        self.accounts = []
+        self.checks = []
+        self._account_index = {}
+        self._check_index = {}
+        self._account_names = {}
+        self._account_ous = {}
+
+    @staticmethod
+    def check_key(finding):
+        '''
+        Column key for a finding.
+        '''
+        return f"{finding.check}: {finding.setting}"
+
+    def _index(self, key, index, keys, axis):
+        position = index.get(key)
+        if position is None:
+            position = index[key] = len(keys)
+            keys.append(key)
+            if position >= self._cells.shape[axis]:
+                # Double the capacity along the full axis
+                pad = [(0, 0), (0, 0)]
+                pad[axis] = (0, self._cells.shape[axis])
+                self._cells = np.pad(self._cells, pad, constant_values=NOT_ASSESSED)
+        return position
+
+    def write(self, finding):
+        '''
+        Record a finding, keeping the worst status per cell.
+        '''
+        code = STATUS_CODES.get(finding.status)
+        if code is None:
+            return
+        row = self._index(finding.account_id, self._account_index, self.accounts, 0)
+        column = self._index(self.check_key(finding), self._check_index, self.checks, 1)
+        self._account_names.setdefault(finding.account_id, finding.profile)
+        current = self._cells[row, column]
+        if current == NOT_ASSESSED or code < current:
+            self._cells[row, column] = code
+
+    def close(self):
+        '''
+        Nothing to release, the matrix is read by score() once the scan completes.
+        '''
+
+    def set_account_ous(self, account_ous):
+        '''
+        Set the OU of each account.
+
+        Args:
+            account_ous (dict): Account ID to OU name.
+
+        Returns:
+            None
+        '''
+        self._account_ous.update(account_ous)
+
+    @property
+    def cells(self):
+        '''
+        The populated part of the matrix, one row per account and one column per check.
+        '''
+        return self._cells[:len(self.accounts), :len(self.checks)]
+
+    def score(self):
+        '''
+        Compute account, OU and organization scores and the gaps per account.
+        A score is the share of points earned over the checks assessed: PASS earns 1, REVIEW 0.5, WARN and ERROR 0.
+
+        Args:
+            None
+
+        Returns:
+            MaturityScores: The scores
+        '''
+        cells = self.cells
+        assessed = cells != NOT_ASSESSED
+        gaps = cells.view(np.uint8) <= GAP_MAX_CODE
+
+        earned = HALF_POINTS[cells + 1].sum(axis=1, dtype=np.int32) / 2
+        possible = assessed.sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            account_scores = np.where(possible > 0, earned / possible, np.nan)
+
+        ous = [self._account_ous.get(account, "Unassigned") for account in self.accounts]
+        total_possible = possible.sum()
+        org_score = float(earned.sum() / total_possible) if total_possible else float("nan")
+
+        return MaturityScores(
+            accounts=list(self.accounts),
+            account_names=[self._account_names.get(account, account) for account in self.accounts],
+            account_ous=ous,
+            checks=list(self.checks),
+            account_scores=account_scores,
+            gaps=gaps,
+            ou_scores=_ou_scores(ous, earned, possible),
+            org_score=org_score,
+            check_gap_counts=gaps.sum(axis=0),
+            check_assessed_counts=assessed.sum(axis=0)
+        )
+
+def _ou_scores(ous, earned, possible):
+    '''
+    Pool the points of the accounts in each OU, returning OU name to (score, account count).
+    '''
+    ou_positions = {}
+    ou_codes = np.fromiter((ou_positions.setdefault(ou, len(ou_positions)) for ou in ous), dtype=np.intp, count=len(ous))
+    ou_names = list(ou_positions)
+    ou_earned = np.bincount(ou_codes, weights=earned, minlength=len(ou_names))
+    ou_possible = np.bincount(ou_codes, weights=possible, minlength=len(ou_names))
+    ou_accounts = np.bincount(ou_codes, minlength=len(ou_names))
+    return {
+        name: (float(ou_earned[i] / ou_possible[i]) if ou_possible[i] else float("nan"), int(ou_accounts[i]))
+        for i, name in enumerate(ou_names)
+    }
+
+def _percent(score):
+    return "n/a" if np.isnan(score) else f"{score * 100:.0f}%"
+
+def _report_rows(scores, top_gaps=25):
+    '''
+    Shared table content for the Markdown and HTML reports.
+    '''
+    ou_rows = [
+        (name, count, _percent(score), maturity_level(score))
+        for name, (score, count) in sorted(scores.ou_scores.items(), key=lambda item: item[1][0])
+    ]
+    order = np.argsort(np.nan_to_num(scores.account_scores, nan=2.0), kind="stable")
+    account_rows = [
+        (scores.accounts[i], scores.account_names[i], scores.account_ous[i], _percent(scores.account_scores[i]),
+         maturity_level(scores.account_scores[i]), scores.account_gaps(i))
+        for i in order.tolist()
+    ]
+    gap_order = np.argsort(-scores.check_gap_counts, kind="stable")[:top_gaps]
+    gap_rows = [
+        (scores.checks[c], int(scores.check_gap_counts[c]), int(scores.check_assessed_counts[c]))
+        for c in gap_order.tolist() if scores.check_gap_counts[c] > 0
+    ]
+    return ou_rows, account_rows, gap_rows
+
+def render_markdown(scores):
+    '''
+    Render the scores as a Markdown report.
+
+    Args:
+        scores (MaturityScores): The scores to render
+
+    Returns:
+        str: The report
+    '''
+    ou_rows, account_rows, gap_rows = _report_rows(scores)
+    generated = datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%d %H:%M UTC")
+    lines = [
+        "# AWS Maturity Report",
+        "",
+        f"Generated {generated} for {len(scores.accounts)} accounts and {len(scores.checks)} checks.",
+        "",
+        f"**Organization score:** {_percent(scores.org_score)} ({maturity_level(scores.org_score)})",
+        "",
+        "## Organizational Units",
+        "",
+        "| OU | Accounts | Score | Level |",
+        "| --- | ---: | ---: | --- |"
+    ]
+    lines += [f"| {name} | {count} | {score} | {level} |" for name, count, score, level in ou_rows]
+    lines += ["", "## Most Common Gaps", "", "| Check | Accounts with gap | Accounts assessed |", "| --- | ---: | ---: |"]
+    lines += [f"| {check} | {count} | {assessed} |" for check, count, assessed in gap_rows]
+    lines += ["", "## Accounts", "", "| Account | Name | OU | Score | Level | Gaps |", "| --- | --- | --- | ---: | --- | ---: |"]
+    lines += [f"| {account} | {name} | {ou} | {score} | {level} | {len(gaps)} |" for account, name, ou, score, level, gaps in account_rows]
+    lines += ["", "## Gaps by Account", ""]
+    for account, name, _, _, _, gaps in account_rows:
+        if gaps:
+            lines.append(f"### {name} ({account})")
+            lines.append("")
+            lines += [f"- {gap}" for gap in gaps]
+            lines.append("")
+    return "\n".join(lines) + "\n"
+
+def render_html(scores):
+    '''
+    Render the scores as a self-contained HTML report.
+
+    Args:
+        scores (MaturityScores): The scores to render
+
+    Returns:
+        str: The report
+    '''
+    ou_rows, account_rows, gap_rows = _report_rows(scores)
+    esc = html.escape
+    generated = datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%d %H:%M UTC")
+
+    def table(headers, rows):
+        head = "".join(f"<th>{esc(str(header))}</th>" for header in headers)
+        body = "".join("<tr>" + "".join(f"<td>{esc(str(cell))}</td>" for cell in row) + "</tr>" for row in rows)
+        return f"<table><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>"
+
+    account_details = "".join(
+        f"<details><summary>{esc(name)} ({esc(account)}): {len(gaps)} gaps</summary><ul>"
+        + "".join(f"<li>{esc(gap)}</li>" for gap in gaps) + "</ul></details>"
+        for account, name, _, _, _, gaps in account_rows if gaps
+    )
+    return (
+        "<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>AWS Maturity Report</title><style>"
+        "body{font-family:sans-serif;margin:2em;color:#222}table{border-collapse:collapse;margin-bottom:2em}"
+        "th,td{border:1px solid #ccc;padding:4px 8px;text-align:left}th{background:#f3f3f3}"
+        "</style></head><body>"
+        f"<h1>AWS Maturity Report</h1><p>Generated {esc(generated)} for {len(scores.accounts)} accounts and {len(scores.checks)} checks.</p>"
+        f"<p><strong>Organization score:</strong> {_percent(scores.org_score)} ({maturity_level(scores.org_score)})</p>"
+        "<h2>Organizational Units</h2>" + table(("OU", "Accounts", "Score", "Level"), ou_rows)
+        + "<h2>Most Common Gaps</h2>" + table(("Check", "Accounts with gap", "Accounts assessed"), gap_rows)
+        + "<h2>Accounts</h2>" + table(("Account", "Name", "OU", "Score", "Level", "Gaps"), [row[:5] + (len(row[5]),) for row in account_rows])
+        + "<h2>Gaps by Account</h2>" + account_details
+        + "</body></html>\n"
+    )
+
+def write_report(scores, path):
+    '''
+    Write the report, as HTML if the file name ends in .html or .htm and as Markdown otherwise.
+
+    Args:
+        scores (MaturityScores): The scores to render
+        path (str): Output file
+
+    Returns:
+        None
+    '''
+    content = render_html(scores) if path.lower().endswith((".html", ".htm")) else render_markdown(scores)
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(content)
@@ -0,0 +1,48 @@
+'''
+This module is responsible for sending assessment findings to Microsoft Teams.
+modules/o365/teams.py
+'''
+from modules.dispatcher import DigestDispatcher
+
+STATUS_ICONS = {"PASS": "✔", "REVIEW": "👀", "WARN": "⚠", "ERROR": "❌", "TIMEOUT": "⏱"}
+
+class TeamsNotifier(DigestDispatcher):
+    '''
+    Posts digests of findings to a Microsoft Teams incoming webhook as Adaptive Cards.
+    '''
+    name = "Teams"
+    # Teams throttles webhooks sending more than 60 messages in 30 seconds
+    rate_limit = 2.0
+
+    def format_digest(self, title, findings):
+        '''
+        Build a Teams message containing an Adaptive Card with one line per finding.
+
+        Args:
+            title (str): The account or severity the findings are grouped by.
+            findings (list): Findings to include in the message.
+
+        Returns:
+            dict: Teams webhook payload
+        '''
+        body = [{"type": "TextBlock", "size": "Medium", "weight": "Bolder", "wrap": True, "text": f"AWS Assessment: {len(findings)} findings for {title}"}]
+        for f in findings:
+            source = f.check if self.group_by == "account" else f"{f.profile} ({f.account_id}) {f.check}"
+            body.append({
+                "type": "TextBlock",
+                "wrap": True,
+                "spacing": "None",
+                "text": f"{STATUS_ICONS.get(f.status, '')} **{source}**{f' ({f.region})' if f.region else ''}: {f.message}"
+            })
+        return {
+            "type": "message",
+            "attachments": [{
+                "contentType": "application/vnd.microsoft.card.adaptive",
+                "content": {
+                    "$schema": "http://adaptivecards.io/schemas/adaptive-card.json",
+                    "type": "AdaptiveCard",
+                    "version": "1.4",
+                    "body": body
+                }
+            }]
+        }
@@ -0,0 +1,39 @@
+'''
+This module is responsible for sending assessment findings to Slack.
+modules/slack/slack.py
+'''
+from modules.dispatcher import DigestDispatcher
+
+STATUS_ICONS = {"PASS": ":white_check_mark:", "REVIEW": ":eyes:", "WARN": ":warning:", "ERROR": ":x:", "TIMEOUT": ":stopwatch:"}
+
+class SlackNotifier(DigestDispatcher):
+    '''
+    Posts digests of findings to a Slack incoming webhook.
+    '''
+    name = "Slack"
+    # Slack allows one message per second per incoming webhook
+    rate_limit = 1.0
+
+    def format_digest(self, title, findings):
+        '''
+        Build a Slack message with one line per finding.
+
+        Args:
+            title (str): The account or severity the findings are grouped by.
+            findings (list): Findings to include in the message.
+
+        Returns:
+            dict: Slack webhook payload
+        '''
+        lines = []
+        for f in findings:
+            source = f.check if self.group_by == "account" else f"{f.profile} ({f.account_id}) {f.check}"
+            lines.append(f"{STATUS_ICONS.get(f.status, '')} *{source}*{f' ({f.region})' if f.region else ''}: {f.message}")
+        header = f"AWS Assessment: {len(findings)} findings for {title}"
+        return {
+            "text": header,
+            "blocks": [
+                {"type": "header", "text": {"type": "plain_text", "text": header[:150]}},
+                {"type": "section", "text": {"type": "mrkdwn", "text": "\n".join(lines)[:3000]}}
+            ]
+        }
@@ -0,0 +1,78 @@
+'''
+Shared test setup. Makes the repository root importable however pytest is started, and provides a local HTTP
+stand-in for the webhook and Jira endpoints.
+tests/conftest.py
+'''
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+class HttpStandIn:
+    '''
+    Serves requests on localhost with a handler(method, path, body) returning (status, headers, body),
+    and records every request as (method, path, body).
+    '''
+    def __init__(self, handler):
+        self.handler = handler
+        self.requests = []
+        self._lock = threading.Lock()
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            '''
+            Routes every method to the stand-in's handler.
+            '''
+            def _respond(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                body = json.loads(raw) if raw else None
+                with stand_in._lock:
+                    stand_in.requests.append((self.command, self.path, body))
+                status, headers, payload = stand_in.handler(self.command, self.path, body)
+                data = json.dumps(payload).encode("utf-8") if payload is not None else b""
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_PUT = _respond
+
+            def log_message(self, *_args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        '''
+        Stop serving.
+        '''
+        self._server.shutdown()
+        self._server.server_close()
+
+@pytest.fixture
+def http_stand_in():
+    '''
+    Factory for HTTP stand-ins, all stopped at the end of the test.
+    '''
+    stand_ins = []
+
+    def start(handler):
+        stand_in = HttpStandIn(handler)
+        stand_ins.append(stand_in)
+        return stand_in
+
+    yield start
+    for stand_in in stand_ins:
+        stand_in.close()
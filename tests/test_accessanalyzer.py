@@ -0,0 +1,31 @@
+'''
+Tests for the Access Analyzer summary across regions.
+tests/test_accessanalyzer.py
+'''
+import modules.aws.accessanalyzer as accessanalyzer
+
+class FakeSession:
+    '''
+    Session stand-in, clients are never called since region results are stubbed.
+    '''
+    def client(self, *_args, **_kwargs):
+        '''
+        Return a placeholder client.
+        '''
+        return None
+
+def _validate(monkeypatch, capsys, results):
+    monkeypatch.setattr(accessanalyzer, "get_enabled_regions", lambda _session: list(results))
+    monkeypatch.setattr(accessanalyzer, "get_region_analyzers", lambda _session, region, _deep: (region, *results[region]))
+    accessanalyzer.validate_access_analyzer(FakeSession(), deep=False, max_workers=1)
+    return capsys.readouterr().out.splitlines()
+
+def test_failed_regions_are_not_verified(monkeypatch, capsys):
+    lines = _validate(monkeypatch, capsys, {"us-east-1": ([], "User is not authorized to perform: access-analyzer:ListAnalyzers")})
+    assert lines[0] == "⚠ External Access monitoring enabled in 0/1 regions"
+    assert "  - Not verified: us-east-1" in lines
+
+def test_every_region_monitored_passes(monkeypatch, capsys):
+    analyzer = {"name": "org", "type": "ORGANIZATION", "status": "ACTIVE"}
+    lines = _validate(monkeypatch, capsys, {"us-east-1": ([analyzer], None), "eu-west-1": ([analyzer], None)})
+    assert lines[0] == "✔ External Access monitoring enabled in 2/2 regions"
@@ -0,0 +1,169 @@
+'''
+Tests for running checks against per-check, per-account and per-run time budgets.
+tests/test_assessment.py
+'''
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import modules.assessment as assessment
+from modules.assessment import AssessmentOptions, run_assessment, _run_with_deadline
+from modules.findings import route_stdout
+
+class FakeSession:
+    '''
+    Session stand-in that records renewals.
+    '''
+    def __init__(self, generation=0):
+        self.generation = generation
+        self.deadline = None
+        self.cancelled = False
+
+    def renew(self):
+        '''
+        Cancel this session and return the next one.
+        '''
+        self.cancelled = True
+        return FakeSession(self.generation + 1)
+
+class FakeEndpointHealth:
+    '''
+    Endpoint health stand-in reporting whatever the test puts in skipped.
+    '''
+    def __init__(self):
+        self.skipped = []
+
+    def drain_skipped(self, _profile):
+        '''
+        Return and forget the skipped calls.
+        '''
+        skipped, self.skipped = self.skipped, []
+        return skipped
+
+class ListSink:
+    '''
+    Keeps every finding written to it.
+    '''
+    def __init__(self):
+        self.findings = []
+
+    def write(self, finding):
+        '''
+        Keep the finding.
+        '''
+        self.findings.append(finding)
+
+    def close(self):
+        '''
+        Nothing to release.
+        '''
+
+def _check(name, func):
+    return SimpleNamespace(name=name, label=None, condition=None, arguments=("session",), load=lambda: func)
+
+@pytest.fixture
+def endpoint_health():
+    '''
+    The endpoint health tracker seen by run_assessment.
+    '''
+    return FakeEndpointHealth()
+
+@pytest.fixture
+def assess(monkeypatch, endpoint_health):
+    '''
+    Run checks through run_assessment with the given config values, returning the options and the findings.
+    '''
+    targets = {
+        "modules.aws.account:get_account_id": lambda _session: "111111111111",
+        "modules.aws.breaker:get_endpoint_health": lambda: endpoint_health
+    }
+    monkeypatch.setattr(assessment, "load_target", targets.__getitem__)
+
+    def run(checks, settings, run_deadline=None):
+        monkeypatch.setattr(assessment, "config", settings)
+        monkeypatch.setattr(assessment, "select_checks", lambda _names, _tier: checks)
+        sink = ListSink()
+        options = AssessmentOptions(session=FakeSession(), profile="prod", region="us-east-1", is_management=False,
+                                    sinks=[sink], run_deadline=run_deadline)
+        with route_stdout():
+            run_assessment(options)
+        return options, sink.findings
+
+    return run
+
+def test_run_with_deadline_abandons_slow_work():
+    release = threading.Event()
+    start = time.monotonic()
+    assert _run_with_deadline(release.wait, [5], time.monotonic() + 0.1) is False
+    assert time.monotonic() - start < 1
+    release.set()
+
+def test_run_with_deadline_waits_and_reraises():
+    assert _run_with_deadline(time.sleep, [0.05], None) is True
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError, match="boom"):
+        _run_with_deadline(fail, [], time.monotonic() + 5)
+
+def test_overrunning_check_times_out_and_the_next_one_runs(assess, endpoint_health):
+    release = threading.Event()
+    sessions = []
+
+    def slow(_session):
+        print("✔ Slow Setting: started")
+        endpoint_health.skipped.append(("securityhub", "us-east-1", "not subscribed", 3))
+        release.wait(5)
+
+    def fast(session):
+        sessions.append(session)
+        print("✔ Fast Setting: Enabled")
+
+    checks = [_check("slow", slow), _check("fast", fast)]
+    options, findings = assess(checks, {"deadlines.check": 10, "deadlines.checks": {"slow": 0.2}})
+    release.set()
+
+    assert [(finding.check, finding.status) for finding in findings] == [
+        ("slow", "PASS"), ("slow", "TIMEOUT"), ("slow", "SKIPPED"), ("fast", "PASS")
+    ]
+    assert findings[1].message.startswith("slow: timed out after")
+    assert findings[2].message == "Skipped securityhub in us-east-1: not subscribed, 3 calls not sent"
+    # The abandoned check keeps the cancelled session, later checks get a fresh one
+    assert sessions[0].generation == 1 and options.session is sessions[0]
+    assert options.session.deadline is None
+
+def test_spent_run_budget_skips_the_remaining_checks(assess):
+    ran = []
+    checks = [_check("fast", ran.append)]
+    _, findings = assess(checks, {}, run_deadline=time.monotonic() - 1)
+
+    assert not ran
+    assert [(finding.status, finding.message) for finding in findings] == [
+        ("TIMEOUT", "fast: not started, the account or run time budget is spent")
+    ]
+
+def test_failing_check_is_recorded_and_the_next_one_runs(assess):
+    def broken(_session):
+        print("✔ Broken Setting: started")
+        raise KeyError("Detectors")
+
+    def fast(_session):
+        print("✔ Fast Setting: Enabled")
+
+    _, findings = assess([_check("broken", broken), _check("fast", fast)], {})
+
+    assert [(finding.check, finding.status) for finding in findings] == [("broken", "PASS"), ("broken", "ERROR"), ("fast", "PASS")]
+    assert findings[1].message == "broken: failed with KeyError: 'Detectors'"
+
+def test_calls_skipped_before_the_first_check_belong_to_no_check(assess, endpoint_health, capsys):
+    endpoint_health.skipped.append(("organizations", "us-east-1", "circuit open", 1))
+
+    def iam(_session):
+        print("✔ Password Expiration: 90 days")
+
+    _, findings = assess([_check("iam", iam)], {})
+    assert [(finding.check, finding.status) for finding in findings] == [("iam", "PASS")]
+    assert "⏭ Skipped organizations in us-east-1: circuit open, 1 calls not sent" in capsys.readouterr().out
@@ -0,0 +1,118 @@
+'''
+Tests for the dead endpoint negative cache and circuit breaker, with HTTP responses served from before-send.
+tests/test_breaker.py
+'''
+import json
+
+import boto3
+import botocore.exceptions
+import pytest
+from botocore.awsrequest import AWSResponse
+from botocore.config import Config
+
+from modules.aws.breaker import EndpointHealth
+
+REGIONS_XML = (
+    '<DescribeRegionsResponse xmlns="http://ec2.amazonaws.com/doc/2016-11-15/"><requestId>1</requestId><regionInfo>'
+    '<item><regionName>us-east-1</regionName><optInStatus>opt-in-not-required</optInStatus></item>'
+    '<item><regionName>ap-east-1</regionName><optInStatus>{status}</optInStatus></item>'
+    '</regionInfo></DescribeRegionsResponse>'
+)
+
+class _Body:
+    def __init__(self, body):
+        self._body = body
+
+    def stream(self, **_kwargs):
+        yield self._body
+
+def _json_error(code, status=400):
+    return status, {"x-amzn-ErrorType": code}, json.dumps({"__type": code, "message": code})
+
+class FakeAws:
+    '''
+    Answers requests from a handler(service, region, operation) and counts what was sent.
+    '''
+    def __init__(self, handler, ap_east_status="not-opted-in"):
+        self.handler = handler
+        self.ap_east_status = ap_east_status
+        self.sent = []
+
+    def __call__(self, request, event_name, **_kwargs):
+        _, service, operation = event_name.split(".")
+        region = request.url.split(".")[1]
+        self.sent.append((service, region, operation))
+        if service == "ec2":
+            return AWSResponse(request.url, 200, {}, _Body(REGIONS_XML.format(status=self.ap_east_status).encode()))
+        result = self.handler(service, region, operation)
+        if isinstance(result, Exception):
+            raise result
+        status, headers, body = result
+        return AWSResponse(request.url, status, headers, _Body(body.encode()))
+
+@pytest.fixture
+def aws():
+    def start(handler, ap_east_status="not-opted-in", **health):
+        session = boto3.Session(aws_access_key_id="key", aws_secret_access_key="secret", region_name="us-east-1")
+        fake = FakeAws(handler, ap_east_status)
+        EndpointHealth(**health).attach(session, "prod")
+        session.events.register("before-send", fake)
+        config = Config(retries={"total_max_attempts": 1})
+        return fake, lambda service, region: session.client(service, region_name=region, config=config)
+    return start
+
+def test_disabled_region_is_cached_for_every_service(aws):
+    fake, client = aws(lambda service, region, operation: _json_error("UnrecognizedClientException", 403))
+    for _ in range(2):
+        with pytest.raises(botocore.exceptions.ClientError):
+            client("guardduty", "ap-east-1").list_detectors()
+    with pytest.raises(botocore.exceptions.ClientError):
+        client("securityhub", "ap-east-1").describe_hub()
+    assert fake.sent == [("guardduty", "ap-east-1", "ListDetectors"), ("ec2", "us-east-1", "DescribeRegions")]
+
+def test_bad_credentials_in_an_enabled_region_are_not_cached(aws):
+    fake, client = aws(lambda service, region, operation: _json_error("UnrecognizedClientException", 403), ap_east_status="opted-in")
+    for _ in range(3):
+        with pytest.raises(botocore.exceptions.ClientError):
+            client("guardduty", "ap-east-1").list_detectors()
+    assert [call for call in fake.sent if call[0] == "guardduty"] == [("guardduty", "ap-east-1", "ListDetectors")] * 3
+    # The opt-in status is looked up once
+    assert [call for call in fake.sent if call[0] == "ec2"] == [("ec2", "us-east-1", "DescribeRegions")]
+
+def test_unsubscribed_service_is_cached(aws):
+    fake, client = aws(lambda service, region, operation: _json_error("InvalidAccessException"))
+    for _ in range(3):
+        with pytest.raises(botocore.exceptions.ClientError) as error:
+            client("securityhub", "us-east-1").describe_hub()
+        assert error.value.response["Error"]["Code"] == "InvalidAccessException"
+    assert fake.sent == [("securityhub", "us-east-1", "DescribeHub")]
+
+def test_access_denied_opens_the_circuit_of_the_denied_operation_only(aws):
+    def handler(service, region, operation):
+        if operation == "ListAccounts":
+            return _json_error("AccessDeniedException")
+        return 200, {}, json.dumps({"Organization": {"Id": "o-example"}})
+
+    fake, client = aws(handler)
+    organizations = client("organizations", "us-east-1")
+    for _ in range(4):
+        with pytest.raises(botocore.exceptions.ClientError) as error:
+            organizations.list_accounts()
+        assert error.value.response["Error"]["Code"] == "AccessDeniedException"
+    for _ in range(2):
+        assert organizations.describe_organization()["Organization"]["Id"] == "o-example"
+    assert fake.sent.count(("organizations", "us-east-1", "ListAccounts")) == 3
+    assert fake.sent.count(("organizations", "us-east-1", "DescribeOrganization")) == 2
+
+def test_connection_errors_open_the_circuit_of_the_endpoint(aws):
+    def handler(service, region, operation):
+        return botocore.exceptions.EndpointConnectionError(endpoint_url=f"https://{service}.{region}.amazonaws.com")
+
+    fake, client = aws(handler)
+    guardduty = client("guardduty", "us-west-1")
+    for _ in range(3):
+        with pytest.raises(botocore.exceptions.EndpointConnectionError):
+            guardduty.list_detectors()
+    with pytest.raises(botocore.exceptions.EndpointConnectionError):
+        guardduty.list_organization_admin_accounts()
+    assert len(fake.sent) == 3
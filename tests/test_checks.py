@@ -0,0 +1,30 @@
+'''
+Tests for selecting checks by name and tier.
+tests/test_checks.py
+'''
+import pytest
+
+from modules.checks import CHECK_NAMES, select_checks
+
+def _names(checks):
+    return [check.name for check in checks]
+
+def test_deep_tier_selects_every_check():
+    assert _names(select_checks()) == list(CHECK_NAMES)
+    assert _names(select_checks(tier="deep")) == list(CHECK_NAMES)
+
+def test_essential_tier_leaves_out_deep_checks():
+    names = _names(select_checks(tier="essential"))
+    assert "securityhub" in names and "iam" in names
+    assert not {"billing", "spend", "linked_accounts", "policies"} & set(names)
+    # Registry order is kept
+    assert names == [name for name in CHECK_NAMES if name in names]
+
+def test_named_checks_run_whatever_their_tier():
+    assert _names(select_checks(["policies", "iam"], tier="essential")) == ["iam", "policies"]
+
+def test_unknown_tier_and_checks_are_rejected():
+    with pytest.raises(ValueError, match="Unknown tier"):
+        select_checks(tier="quick")
+    with pytest.raises(ValueError, match="Unknown checks: nope"):
+        select_checks(["iam", "nope"])
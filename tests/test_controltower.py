@@ -0,0 +1,35 @@
+'''
+Tests for Control Tower OU registration and account enrollment.
+tests/test_controltower.py
+'''
+import modules.aws.controltower as controltower
+
+def _node(node_id, name, *accounts):
+    return {"Id": node_id, "Arn": f"arn:aws:organizations::111111111111:ou/o-example/{node_id}", "Name": name,
+            "Accounts": [{"Id": account, "Status": "ACTIVE"} for account in accounts]}
+
+def test_root_accounts_are_not_counted_as_unenrolled(monkeypatch, capsys):
+    nodes = {
+        "r-root": _node("r-root", "Root", "111111111111"),
+        "ou-security": _node("ou-security", "Security", "222222222222", "333333333333"),
+        "ou-sandbox": _node("ou-sandbox", "Sandbox", "444444444444")
+    }
+    monkeypatch.setattr(controltower, "get_ou_tree", lambda _session: ("r-root", nodes))
+    monkeypatch.setattr(controltower, "get_registered_ous", lambda _client: {nodes["ou-security"]["Arn"], nodes["ou-sandbox"]["Arn"]})
+    monkeypatch.setattr(controltower, "get_enabled_controls", lambda _client, arns: {arn: [] for arn in arns})
+
+    controltower.validate_organizational_units(None, None)
+    assert "✔ Enrolled Accounts: 3/3" in capsys.readouterr().out.splitlines()
+
+def test_accounts_in_unregistered_ous_are_not_enrolled(monkeypatch, capsys):
+    nodes = {
+        "r-root": _node("r-root", "Root", "111111111111"),
+        "ou-security": _node("ou-security", "Security", "222222222222"),
+        "ou-sandbox": _node("ou-sandbox", "Sandbox", "444444444444")
+    }
+    monkeypatch.setattr(controltower, "get_ou_tree", lambda _session: ("r-root", nodes))
+    monkeypatch.setattr(controltower, "get_registered_ous", lambda _client: {nodes["ou-security"]["Arn"]})
+    monkeypatch.setattr(controltower, "get_enabled_controls", lambda _client, arns: {arn: [] for arn in arns})
+
+    controltower.validate_organizational_units(None, None)
+    assert "⚠ Enrolled Accounts: 1/2" in capsys.readouterr().out.splitlines()
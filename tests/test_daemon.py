@@ -0,0 +1,162 @@
+'''
+Tests for the continuous assessment daemon's scheduling, driven by a fake clock.
+tests/test_daemon.py
+'''
+from types import SimpleNamespace
+
+import botocore.exceptions
+import pytest
+
+import modules.daemon as daemon
+from modules.daemon import DISCOVERY_RETRY_SECONDS, AssessmentDaemon
+
+# The tests drive the scheduler one step at a time and inspect its state
+# pylint: disable=W0212
+
+CHECKS = [SimpleNamespace(name="iam"), SimpleNamespace(name="guardduty")]
+
+class FakeClock:
+    '''
+    Monotonic clock that only moves when the test moves it.
+    '''
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        '''
+        The current fake time.
+        '''
+        return self.now
+
+class FakeConfig:
+    '''
+    Config stand-in whose reload picks up the values in pending.
+    '''
+    def __init__(self, config_file, values):
+        self.config_file = config_file
+        self.values = dict(values)
+        self.pending = dict(values)
+
+    def get(self, key, default=None):
+        '''
+        Return a config value.
+        '''
+        return self.values.get(key, default)
+
+    def reload_config(self):
+        '''
+        Apply the pending values.
+        '''
+        self.values = dict(self.pending)
+
+@pytest.fixture
+def env(monkeypatch, tmp_path):
+    '''
+    A daemon following an organization of four accounts, with every AWS call and assessment stubbed.
+    '''
+    clock = FakeClock()
+    config_file = tmp_path / "config.yaml"
+    config_file.write_text("aws: {}\n", encoding="utf-8")
+    settings = FakeConfig(str(config_file), {"aws.profile": "mgmt", "aws.region": "us-east-1", "daemon.interval": 100,
+                                             "daemon.jitter": 0.1, "daemon.cadence": {"guardduty": 10}})
+    runs = []
+    organization = {"error": None, "members": ["a", "b", "c"]}
+
+    def get_organization_info(_session):
+        if organization["error"]:
+            raise organization["error"]
+        return "o-example", "mgmt"
+
+    monkeypatch.setattr(daemon, "time", SimpleNamespace(monotonic=clock.monotonic))
+    monkeypatch.setattr(daemon, "config", settings)
+    monkeypatch.setattr(daemon, "create_session", lambda profile, _region, _archive: SimpleNamespace(profile=profile))
+    monkeypatch.setattr(daemon, "get_organization_info", get_organization_info)
+    monkeypatch.setattr(daemon, "iter_member_accounts", lambda _session: iter(organization["members"]))
+    monkeypatch.setattr(daemon, "select_checks", lambda _names, _tier: CHECKS)
+    monkeypatch.setattr(daemon, "run_assessment", lambda options: runs.append((clock.now, options.profile, sorted(options.checks))))
+    return SimpleNamespace(clock=clock, config=settings, config_file=config_file, runs=runs, organization=organization,
+                           daemon=AssessmentDaemon(follow=True))
+
+def test_new_accounts_are_spread_across_the_interval(env, monkeypatch):
+    monkeypatch.setattr(daemon.random, "random", lambda: 0.5)
+    assert env.daemon._step() is None
+    due = {profile: state.next_due - env.clock.now for profile, state in env.daemon._accounts.items()}
+    assert due == {"a": 12.5, "b": 37.5, "c": 62.5, "mgmt": 87.5}
+
+def test_each_check_is_rescheduled_on_its_own_jittered_cadence(env):
+    env.daemon._step()
+    state = env.daemon._accounts["a"]
+    env.clock.now = state.next_due
+    env.daemon._step()
+
+    assert env.runs == [(env.clock.now, "a", ["guardduty", "iam"])]
+    assert 9 <= state.check_due["guardduty"] - env.clock.now <= 11
+    assert 90 <= state.check_due["iam"] - env.clock.now <= 110
+
+    # Only the check that is due runs next time
+    env.clock.now = state.check_due["guardduty"]
+    env.daemon._step()
+    assert env.runs[-1] == (env.clock.now, "a", ["guardduty"])
+
+def test_stale_heap_entries_are_skipped(env):
+    env.daemon._step()
+    state = env.daemon._accounts["a"]
+    stale = state.next_due
+    # Rescheduling leaves the old entry in the heap
+    state.check_due = {name: stale + 50 for name in state.check_due}
+    env.daemon._schedule(state)
+
+    env.clock.now = stale
+    env.daemon._step()
+    assert not [run for run in env.runs if run[1] == "a"]
+
+def test_failed_discovery_is_retried_with_backoff(env):
+    env.organization["error"] = botocore.exceptions.EndpointConnectionError(endpoint_url="https://organizations.us-east-1.amazonaws.com")
+    env.daemon._step()
+    assert env.daemon._next_discovery == env.clock.now + DISCOVERY_RETRY_SECONDS
+    assert env.daemon._step() == env.clock.now + 5
+
+    # The interval caps the backoff
+    env.clock.now = env.daemon._next_discovery
+    env.daemon._step()
+    assert env.daemon._next_discovery == env.clock.now + 100
+
+    env.organization["error"] = None
+    env.clock.now = env.daemon._next_discovery
+    env.daemon._step()
+    assert sorted(env.daemon._accounts) == ["a", "b", "c", "mgmt"]
+    assert env.daemon._next_discovery == env.clock.now + 100
+
+def test_removed_accounts_are_dropped_on_the_next_discovery(env):
+    env.daemon._step()
+    env.organization["members"] = ["a", "c"]
+    env.clock.now = env.daemon._next_discovery
+    env.daemon._step()
+    assert sorted(env.daemon._accounts) == ["a", "c", "mgmt"]
+
+def test_config_change_pulls_in_checks_beyond_their_new_cadence(env):
+    env.daemon._step()
+    env.config.pending["daemon.cadence"] = {"guardduty": 10, "iam": 5}
+    env.config_file.write_text("aws: {changed: true}\n", encoding="utf-8")
+    env.daemon._config_mtime = -1
+
+    env.daemon._step()
+    assert env.daemon.cadence_for("iam") == 5
+    for state in env.daemon._accounts.values():
+        assert state.check_due["iam"] - env.clock.now <= 5
+
+def test_sighup_reloads_without_a_file_change(env):
+    env.daemon._step()
+    env.config.pending["daemon.jitter"] = 0.3
+    env.daemon.request_reload()
+    env.daemon._step()
+    assert env.daemon.jitter == 0.3
+
+def test_changed_entry_point_starts_over(env):
+    env.daemon._step()
+    env.config.pending["aws.region"] = "eu-west-1"
+    env.daemon.request_reload()
+    env.daemon._step()
+    # Everything was cleared and the accounts rediscovered straight away
+    assert env.daemon.region == "eu-west-1"
+    assert sorted(env.daemon._accounts) == ["a", "b", "c", "mgmt"]
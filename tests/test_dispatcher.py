@@ -0,0 +1,127 @@
+'''
+Tests for the background digest dispatcher, against a local stand-in for a chat webhook.
+tests/test_dispatcher.py
+'''
+import time
+
+from modules.findings import Finding
+from modules.slack.slack import SlackNotifier
+
+class FastSlackNotifier(SlackNotifier):
+    '''
+    Slack notifier without the one message per second limit, so tests do not wait on it.
+    '''
+    rate_limit = 100.0
+
+def _finding(index, status="WARN", account_id="111111111111"):
+    return Finding(account_id, "prod", "config", status, f"Setting {index} is NOT Enabled")
+
+def _accept(_method, _path, _body):
+    return 200, None, {"ok": True}
+
+def test_findings_are_batched_per_account(http_stand_in):
+    webhook = http_stand_in(_accept)
+    notifier = FastSlackNotifier(webhook.url, max_batch=3, flush_interval=60)
+    for index in range(7):
+        notifier.write(_finding(index))
+    notifier.write(_finding(7, account_id="222222222222"))
+    notifier.write(_finding(8, status="PASS"))
+    notifier.close(timeout=10)
+
+    headers = sorted(body["text"] for _, _, body in webhook.requests)
+    assert headers == [
+        "AWS Assessment: 1 findings for prod (111111111111)",
+        "AWS Assessment: 1 findings for prod (222222222222)",
+        "AWS Assessment: 3 findings for prod (111111111111)",
+        "AWS Assessment: 3 findings for prod (111111111111)"
+    ]
+    assert notifier.sent == 4 and notifier.failed == 0
+
+def test_findings_are_batched_per_severity(http_stand_in):
+    webhook = http_stand_in(_accept)
+    notifier = FastSlackNotifier(webhook.url, group_by="severity", flush_interval=60)
+    notifier.write(_finding(1, account_id="111111111111"))
+    notifier.write(_finding(2, account_id="222222222222"))
+    notifier.write(_finding(3, status="ERROR"))
+    notifier.close(timeout=10)
+
+    assert sorted(body["text"] for _, _, body in webhook.requests) == [
+        "AWS Assessment: 1 findings for ERROR",
+        "AWS Assessment: 2 findings for WARN"
+    ]
+
+def test_partial_digest_is_sent_after_the_flush_interval(http_stand_in):
+    webhook = http_stand_in(_accept)
+    notifier = FastSlackNotifier(webhook.url, flush_interval=0.2)
+    notifier.write(_finding(1))
+    for _ in range(50):
+        if webhook.requests:
+            break
+        time.sleep(0.05)
+    assert len(webhook.requests) == 1
+    notifier.close(timeout=10)
+
+def test_close_flushes_pending_findings(http_stand_in):
+    webhook = http_stand_in(_accept)
+    notifier = FastSlackNotifier(webhook.url, flush_interval=60)
+    notifier.write(_finding(1))
+    notifier.write(_finding(2))
+
+    start = time.monotonic()
+    notifier.close(timeout=10)
+    assert time.monotonic() - start < 5
+    assert len(webhook.requests) == 1
+    assert notifier.sent == 1
+
+def test_throttled_post_waits_for_retry_after(http_stand_in):
+    attempts = []
+
+    def throttle_once(_method, _path, _body):
+        attempts.append(time.monotonic())
+        if len(attempts) == 1:
+            return 429, {"Retry-After": "0.5"}, {"ok": False}
+        return 200, None, {"ok": True}
+
+    webhook = http_stand_in(throttle_once)
+    notifier = FastSlackNotifier(webhook.url, flush_interval=60)
+    notifier.write(_finding(1))
+    notifier.close(timeout=10)
+
+    assert len(attempts) == 2
+    assert attempts[1] - attempts[0] >= 0.5
+    assert notifier.sent == 1 and notifier.failed == 0
+
+def test_rejected_payload_is_not_retried(http_stand_in):
+    webhook = http_stand_in(lambda *_: (400, None, {"ok": False}))
+    notifier = FastSlackNotifier(webhook.url, flush_interval=60)
+    notifier.write(_finding(1))
+    notifier.close(timeout=10)
+
+    assert len(webhook.requests) == 1
+    assert notifier.sent == 0 and notifier.failed == 1
+
+def test_full_queue_drops_findings_without_blocking(http_stand_in):
+    def slow(_method, _path, _body):
+        time.sleep(0.5)
+        return 200, None, {"ok": True}
+
+    # A batch of one keeps the worker busy posting while the queue fills up
+    webhook = http_stand_in(slow)
+    notifier = FastSlackNotifier(webhook.url, max_batch=1, flush_interval=60, queue_size=1)
+    start = time.monotonic()
+    for index in range(20):
+        notifier.write(_finding(index))
+    assert time.monotonic() - start < 0.5
+    assert notifier.dropped > 0
+    notifier.close(timeout=10)
+
+def test_timed_out_checks_rank_with_errors(http_stand_in):
+    webhook = http_stand_in(_accept)
+    notifier = FastSlackNotifier(webhook.url, min_status="ERROR", flush_interval=60)
+    notifier.write(_finding(1))
+    notifier.write(_finding(2, status="TIMEOUT"))
+    notifier.write(_finding(3, status="ERROR"))
+    notifier.close(timeout=10)
+
+    assert [body["text"] for _, _, body in webhook.requests] == ["AWS Assessment: 2 findings for prod (111111111111)"]
+    assert ":stopwatch:" in str(webhook.requests[0][2])
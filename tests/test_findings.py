@@ -0,0 +1,63 @@
+'''
+Tests for turning checker output into findings.
+tests/test_findings.py
+'''
+import pytest
+
+from modules.findings import capture_findings, route_stdout, set_region, setting_name
+
+@pytest.mark.parametrize("passed, failed", [
+    ("AWS Config is Enabled", "AWS Config is NOT Enabled"),
+    ("GuardDuty is Enabled in us-east-1", "GuardDuty is NOT Enabled in us-east-1: no detectors found"),
+    ("AWS Security Hub is Enabled in eu-west-1", "AWS Security Hub is not enabled in eu-west-1"),
+    ("Enabled Security Hub Integrations:", "No Security Hub Integrations found."),
+    ("Macie is Enabled in 17/17 regions", "Macie is Enabled in 3/17 regions"),
+    ("External Access monitoring enabled in 17/17 regions", "External Access monitoring enabled in 3/17 regions"),
+    ("SECURITY Contact Found: security@example.com", "No SECURITY contact configured."),
+    ("AWS Config Aggregator Found: org (Organization-level)", "No AWS Config Aggregator found: organization-level aggregation is not configured"),
+    ("Account Contact Information: Jane Doe", "Account Contact Information: not found"),
+    ("Password Expiration: 90 days", "Password Expiration: not enforced")
+])
+def test_setting_name_is_the_same_whatever_the_state(passed, failed):
+    assert setting_name(passed) == setting_name(failed)
+
+def test_setting_names_keep_settings_apart():
+    names = {setting_name(message) for message in (
+        "GuardDuty is Enabled in us-east-1",
+        "GuardDuty S3 Protection: ENABLED",
+        "GuardDuty EKS Protection: ENABLED",
+        "Macie is Enabled in 3/17 regions",
+        "Macie is Enabled in us-east-1 (ENABLED)"
+    )}
+    assert len(names) == 5
+
+class ListSink:
+    '''
+    Keeps every finding written to it.
+    '''
+    def __init__(self):
+        self.findings = []
+
+    def write(self, finding):
+        '''
+        Keep the finding.
+        '''
+        self.findings.append(finding)
+
+    def close(self):
+        '''
+        Nothing to release.
+        '''
+
+def test_region_comes_from_the_line_or_the_regional_pass():
+    sink = ListSink()
+    with route_stdout(), capture_findings("111111111111", "prod", "guardduty", [sink]):
+        print("⚠ Unable to list enabled regions, checking us-east-1 only: AccessDenied")
+        print("⚠ Macie is Enabled in 0/1 regions")
+        set_region("eu-west-1")
+        print("✔ GuardDuty is Enabled in eu-west-1")
+        print("✔ GuardDuty S3 Protection: ENABLED")
+        set_region(None)
+        print("✔ Consolidated summary: 1/1")
+
+    assert [finding.region for finding in sink.findings] == ["us-east-1", None, "eu-west-1", "eu-west-1", None]
@@ -0,0 +1,68 @@
+'''
+Tests for the SQLite findings history.
+tests/test_history.py
+'''
+import datetime
+
+from modules.findings import Finding
+from modules.history import HistoryStore, connect, diff
+
+def _at(minutes):
+    return (datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc) + datetime.timedelta(minutes=minutes)).isoformat()
+
+def _record(store, minutes, findings):
+    for check, status, message in findings:
+        store.write(Finding("111111111111", "prod", check, status, message, "us-east-1", timestamp=_at(minutes)))
+    return store.flush()
+
+def test_diff_reports_enabled_to_not_enabled_as_regressed(tmp_path):
+    path = str(tmp_path / "history.db")
+    store = HistoryStore(path)
+    _record(store, 0, [
+        ("config", "PASS", "AWS Config is Enabled"),
+        ("guardduty", "PASS", "GuardDuty is Enabled in us-east-1"),
+        ("guardduty", "PASS", "GuardDuty S3 Protection: ENABLED"),
+        ("iam", "WARN", "Password Expiration: not enforced")
+    ])
+    _record(store, 60, [
+        ("config", "WARN", "AWS Config is NOT Enabled"),
+        ("guardduty", "WARN", "GuardDuty is NOT Enabled in us-east-1: no detectors found"),
+        ("guardduty", "WARN", "GuardDuty S3 Protection: DISABLED"),
+        ("iam", "PASS", "Password Expiration: 90 days")
+    ])
+    store.close()
+
+    connection = connect(path)
+    result = diff(connection)
+    regressed = sorted((new["check_name"], new["setting"]) for _, new in result["regressed"])
+    assert regressed == [("config", "aws config"), ("guardduty", "guardduty"), ("guardduty", "guardduty s3 protection")]
+    assert [(old["status"], new["status"]) for old, new in result["resolved"]] == [("WARN", "PASS")]
+    assert not result["changed"]
+
+def test_subject_filter_finds_guardduty_protection(tmp_path):
+    path = str(tmp_path / "history.db")
+    store = HistoryStore(path)
+    _record(store, 0, [("guardduty", "PASS", "GuardDuty S3 Protection: ENABLED")])
+    _record(store, 60, [("guardduty", "WARN", "GuardDuty S3 Protection: DISABLED")])
+    store.close()
+
+    connection = connect(path)
+    result = diff(connection, check="guardduty", subject="S3 Protection")
+    assert [(old["status"], new["status"]) for old, new in result["regressed"]] == [("PASS", "WARN")]
+
+def test_run_is_inserted_in_batches_and_committed_once(tmp_path):
+    path = str(tmp_path / "history.db")
+    store = HistoryStore(path, batch_size=100)
+    reader = connect(path)
+    for position in range(1050):
+        store.write(Finding(f"{position % 7:012d}", "prod", "iam", "PASS", f"Setting {position}: value", timestamp=_at(position)))
+        assert len(store._rows) < 100  # pylint: disable=W0212
+    # Nothing is visible to readers until the run is committed
+    assert reader.execute("SELECT COUNT(*) FROM findings").fetchone()[0] == 0
+
+    run_id = store.flush()
+    run = reader.execute("SELECT accounts, findings FROM runs WHERE id = ?", (run_id,)).fetchone()
+    assert (run["accounts"], run["findings"]) == (7, 1050)
+    assert reader.execute("SELECT COUNT(*) FROM findings WHERE run_id = ?", (run_id,)).fetchone()[0] == 1050
+    assert store.flush() is None
+    store.close()
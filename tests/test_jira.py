@@ -0,0 +1,148 @@
+'''
+Tests for reconciling gaps with Jira, against a local stand-in for the Jira REST API.
+tests/test_jira.py
+'''
+import re
+
+import pytest
+
+from modules.findings import Finding
+from modules.jira.jira import fingerprint, JiraSink
+
+class FakeJira:
+    '''
+    In-memory Jira project serving search, bulk create, edit and transitions.
+    '''
+    def __init__(self):
+        self.issues = {}
+        self.searches = []
+
+    def __call__(self, method, path, body):
+        if method == "POST" and path == "/rest/api/2/search":
+            self.searches.append(body["jql"])
+            accounts = set(re.findall(r'"(aws-assess-account-\d+)"', body["jql"]))
+            issues = [
+                {"key": key, "fields": {"labels": issue["labels"]}}
+                for key, issue in sorted(self.issues.items())
+                if not issue["done"] and (not accounts or accounts & set(issue["labels"]))
+            ]
+            return 200, None, {"issues": issues, "total": len(issues)}
+        if method == "POST" and path == "/rest/api/2/issue/bulk":
+            created = []
+            for update in body["issueUpdates"]:
+                key = f"SEC-{len(self.issues) + 1}"
+                self.issues[key] = dict(update["fields"], done=False)
+                created.append({"key": key})
+            return 201, None, {"issues": created, "errors": []}
+        match = re.fullmatch(r"/rest/api/2/issue/([A-Z]+-\d+)(/transitions)?", path)
+        if match and method == "PUT":
+            self.issues[match.group(1)].update(body["fields"])
+            return 204, None, None
+        if match and method == "GET":
+            return 200, None, {"transitions": [{"id": "31", "name": "Done"}]}
+        if match and method == "POST":
+            self.issues[match.group(1)]["done"] = True
+            return 204, None, None
+        return 404, None, {"errorMessages": [path]}
+
+    def summaries(self, done=False):
+        '''
+        Summaries of the open (or closed) issues.
+        '''
+        return sorted(issue["summary"] for issue in self.issues.values() if issue["done"] == done)
+
+@pytest.fixture
+def jira(http_stand_in, tmp_path):
+    fake = FakeJira()
+    stand_in = http_stand_in(fake)
+
+    def scan(findings, tier="deep"):
+        sink = JiraSink(stand_in.url, "SEC", "token", index_file=str(tmp_path / "index.json"), tier=tier)
+        for check, status, message in findings:
+            sink.write(Finding("111111111111", "prod", check, status, message))
+        sink.close()
+
+    return fake, scan
+
+def _finding(message, status="WARN"):
+    return Finding("111111111111", "prod", "macie", status, message)
+
+def test_fingerprint_ignores_counts_and_state():
+    assert fingerprint(_finding("Macie is Enabled in 3/17 regions")) == fingerprint(_finding("Macie is Enabled in 4/17 regions"))
+    assert fingerprint(_finding("External Access monitoring enabled in 3/17 regions")) == fingerprint(
+        _finding("External Access monitoring enabled in 5/17 regions")
+    )
+
+def test_fingerprint_keeps_settings_apart():
+    assert fingerprint(_finding("Macie is Enabled in 3/17 regions")) != fingerprint(_finding("Automated sensitive data discovery: DISABLED"))
+
+def test_create_update_and_close(jira):
+    fake, scan = jira
+    scan([("macie", "WARN", "Macie is Enabled in 3/17 regions"), ("config", "WARN", "AWS Config is NOT Enabled")])
+    assert fake.summaries() == ["[prod] config: AWS Config is NOT Enabled", "[prod] macie: Macie is Enabled in 3/17 regions"]
+
+    # A changed count updates the issue, a resolved gap closes it
+    scan([("macie", "WARN", "Macie is Enabled in 4/17 regions"), ("config", "PASS", "AWS Config is Enabled")])
+    assert fake.summaries() == ["[prod] macie: Macie is Enabled in 4/17 regions"]
+    assert fake.summaries(done=True) == ["[prod] config: AWS Config is NOT Enabled"]
+    assert len(fake.issues) == 2
+
+def test_gap_of_a_check_that_did_not_run_stays_open(jira):
+    fake, scan = jira
+    scan([("config", "WARN", "AWS Config is NOT Enabled")])
+    scan([("macie", "PASS", "Macie is Enabled in 17/17 regions")])
+    assert fake.summaries() == ["[prod] config: AWS Config is NOT Enabled"]
+
+def test_gaps_of_a_failed_check_stay_open(jira):
+    fake, scan = jira
+    scan([("config", "WARN", "AWS Config is NOT Enabled")])
+    scan([("config", "ERROR", "config: failed with KeyError: 'ConfigurationRecorders'")])
+    assert "[prod] config: AWS Config is NOT Enabled" in fake.summaries()
+
+def test_essential_scan_does_not_close_deep_only_gaps(jira):
+    fake, scan = jira
+    scan([
+        ("securityhub", "PASS", "AWS Security Hub is Enabled in us-east-1"),
+        ("securityhub", "WARN", "No Security Hub Integrations found.")
+    ])
+    scan([("securityhub", "PASS", "AWS Security Hub is Enabled in us-east-1")], tier="essential")
+    assert fake.summaries() == ["[prod] securityhub: No Security Hub Integrations found."]
+
+    scan([("securityhub", "PASS", "Enabled Security Hub Integrations:")])
+    assert fake.summaries() == []
+
+def test_essential_scan_closes_gaps_it_reports(jira):
+    fake, scan = jira
+    scan([("securityhub", "WARN", "AWS Security Hub is not enabled in us-east-1")])
+    scan([("securityhub", "WARN", "AWS Security Hub is not enabled in us-east-1")], tier="essential")
+    scan([("securityhub", "PASS", "AWS Security Hub is Enabled in us-east-1")], tier="essential")
+    assert fake.summaries() == []
+
+def test_flush_reconciles_each_account_pass(http_stand_in, tmp_path):
+    fake = FakeJira()
+    stand_in = http_stand_in(fake)
+    sink = JiraSink(stand_in.url, "SEC", "token", index_file=str(tmp_path / "index.json"))
+
+    sink.write(Finding("111111111111", "prod", "config", "WARN", "AWS Config is NOT Enabled"))
+    sink.flush()
+    sink.write(Finding("222222222222", "dev", "config", "WARN", "AWS Config is NOT Enabled"))
+    sink.flush()
+    assert fake.summaries() == ["[dev] config: AWS Config is NOT Enabled", "[prod] config: AWS Config is NOT Enabled"]
+    # Each pass only searches the issues of its own account
+    assert all("aws-assess-account-" in jql for jql in fake.searches)
+
+    # The next pass of the first account closes its resolved gap and leaves the other account alone
+    sink.write(Finding("111111111111", "prod", "config", "PASS", "AWS Config is Enabled"))
+    sink.close()
+    assert fake.summaries() == ["[dev] config: AWS Config is NOT Enabled"]
+    assert not sink._gaps and not sink._scanned  # pylint: disable=W0212
+
+def test_issue_missing_from_the_index_is_only_closed_by_a_deep_scan(jira, tmp_path):
+    fake, scan = jira
+    scan([("securityhub", "WARN", "No Security Hub Integrations found.")])
+    (tmp_path / "index.json").unlink()
+
+    scan([("securityhub", "PASS", "AWS Security Hub is Enabled in us-east-1")], tier="essential")
+    assert fake.summaries() == ["[prod] securityhub: No Security Hub Integrations found."]
+    scan([("securityhub", "PASS", "Enabled Security Hub Integrations:")])
+    assert fake.summaries() == []
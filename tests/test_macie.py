@@ -0,0 +1,79 @@
+'''
+Tests for handing Macie member status from the delegated administrator to member account scans.
+tests/test_macie.py
+'''
+import pytest
+
+import modules.aws.macie as macie
+
+class FakeSession:
+    '''
+    Session stand-in for one account, clients are never called since region results are stubbed.
+    '''
+    def __init__(self, account_id):
+        self.account_id = account_id
+
+    def client(self, *_args, **_kwargs):
+        '''
+        Return a placeholder client.
+        '''
+        return None
+
+def _status(region, enabled=True, error=None, members=None):
+    return {"region": region, "enabled": enabled, "error": error, "status": "ENABLED", "auto_enable": True,
+            "discovery": None, "members": members, "member_discovery": None}
+
+@pytest.fixture
+def region_calls(monkeypatch):
+    '''
+    Stub Macie with 333333333333 as the administrator of 444444444444, recording the accounts queried.
+    '''
+    calls = []
+
+    def get_region_status(session, region, _deep):
+        calls.append(session.account_id)
+        members = {"444444444444": "Enabled"} if session.account_id == "333333333333" else None
+        return _status(region, members=members)
+
+    monkeypatch.setattr(macie, "get_enabled_regions", lambda _session: ["us-east-1"])
+    monkeypatch.setattr(macie, "get_region_status", get_region_status)
+    monkeypatch.setattr(macie, "get_delegated_admins", lambda _session, principal: ["333333333333"] if principal == macie.SERVICE_PRINCIPAL else [])
+    return calls
+
+def test_members_skip_macie_when_scanned_before_the_administrator(region_calls, capsys):
+    shared_state = {}
+    macie.prefetch_member_status(FakeSession("111111111111"), FakeSession, shared_state, deep=False)
+    assert region_calls == ["333333333333"]
+
+    # The member is scanned first and makes no Macie calls, the administrator reuses what was collected
+    macie.validate_macie(FakeSession("444444444444"), "444444444444", shared_state, deep=False)
+    macie.validate_macie(FakeSession("333333333333"), "333333333333", shared_state, deep=False)
+    assert region_calls == ["333333333333"]
+    output = capsys.readouterr().out
+    assert "✔ Macie in us-east-1: Enabled (from administrator account 333333333333)" in output
+    assert "✔ Macie Member Accounts Enabled in us-east-1: 1/1" in output
+
+    # Later scans of the administrator query Macie again
+    macie.validate_macie(FakeSession("333333333333"), "333333333333", shared_state, deep=False)
+    assert region_calls == ["333333333333", "333333333333"]
+
+def test_prefetch_skips_an_administrator_already_scanned(region_calls):
+    shared_state = {}
+    macie.validate_macie(FakeSession("333333333333"), "333333333333", shared_state, deep=False)
+    macie.prefetch_member_status(FakeSession("111111111111"), FakeSession, shared_state, deep=False)
+    assert region_calls == ["333333333333"]
+
+def test_failed_regions_are_reported_not_disabled(monkeypatch, capsys):
+    results = {"us-east-1": _status("us-east-1", enabled=False, error="User is not authorized to perform: macie2:GetMacieSession"),
+               "eu-west-1": _status("eu-west-1", enabled=False)}
+    monkeypatch.setattr(macie, "get_enabled_regions", lambda _session: list(results))
+    monkeypatch.setattr(macie, "get_region_status", lambda _session, region, _deep: results[region])
+
+    macie.validate_macie(FakeSession("111111111111"), "111111111111", {}, deep=False)
+    assert capsys.readouterr().out.splitlines() == [
+        "⚠ Macie is Enabled in 0/2 regions",
+        "  Macie is NOT Enabled in:",
+        "  - eu-west-1",
+        "  - Not verified: us-east-1",
+        "❌ AWS API error (Macie - us-east-1): User is not authorized to perform: macie2:GetMacieSession"
+    ]
@@ -0,0 +1,33 @@
+'''
+Tests for maturity scoring.
+tests/test_maturity.py
+'''
+from modules.findings import Finding
+from modules.maturity import MaturityMatrix
+
+def test_pass_and_warn_of_one_setting_share_a_column():
+    matrix = MaturityMatrix(accounts=1, checks=1)
+    matrix.write(Finding("111111111111", "prod", "config", "PASS", "AWS Config is Enabled"))
+    matrix.write(Finding("222222222222", "dev", "config", "WARN", "AWS Config is NOT Enabled"))
+    matrix.write(Finding("111111111111", "prod", "guardduty", "PASS", "GuardDuty is Enabled in us-east-1", "us-east-1"))
+    matrix.write(Finding("111111111111", "prod", "guardduty", "WARN", "GuardDuty is NOT Enabled in us-west-2: no detectors found", "us-west-2"))
+
+    scores = matrix.score()
+    assert scores.checks == ["config: aws config", "guardduty: guardduty"]
+    assert scores.check_assessed_counts.tolist() == [2, 1]
+    assert scores.check_gap_counts.tolist() == [1, 1]
+    # The worst region decides the cell
+    assert scores.account_gaps(0) == ["guardduty: guardduty"]
+    assert scores.account_gaps(1) == ["config: aws config"]
+
+def test_ou_scores_pool_the_points_of_their_accounts():
+    matrix = MaturityMatrix(accounts=1, checks=1)
+    matrix.write(Finding("111111111111", "prod", "config", "PASS", "AWS Config is Enabled"))
+    matrix.write(Finding("111111111111", "prod", "iam", "REVIEW", "IAM Roles trusting other accounts: 1"))
+    matrix.write(Finding("222222222222", "dev", "config", "WARN", "AWS Config is NOT Enabled"))
+    matrix.write(Finding("333333333333", "sandbox", "config", "PASS", "AWS Config is Enabled"))
+    matrix.set_account_ous({"111111111111": "Workloads", "222222222222": "Workloads"})
+
+    scores = matrix.score()
+    assert scores.ou_scores == {"Workloads": (0.5, 2), "Unassigned": (1.0, 1)}
+    assert scores.org_score == 0.625
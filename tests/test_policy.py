@@ -0,0 +1,67 @@
+'''
+Tests for IAM policy analysis.
+tests/test_policy.py
+'''
+import pytest
+
+from modules.aws.policy import analyze_account_policies, analyze_policy
+
+def _policy(*statements):
+    return {"Version": "2012-10-17", "Statement": list(statements)}
+
+@pytest.mark.parametrize("statement, expected", [
+    ({"Effect": "Allow", "Action": ["s3:GetObject", "ec2:Describe*"], "Resource": "*"}, ()),
+    ({"Effect": "Allow", "Action": ["s3:GetObject", "s3:DeleteBucket"], "Resource": "*"}, ("s3:DeleteBucket",)),
+    ({"Effect": "Allow", "Action": "iam:AttachRolePolicy", "Resource": "*"}, ("iam:AttachRolePolicy",)),
+    ({"Effect": "Allow", "Action": "ec2:*", "Resource": "*"}, ("ec2:*",)),
+    ({"Effect": "Allow", "Action": "s3:PutObject", "NotResource": "arn:aws:s3:::logs/*"}, ("s3:PutObject",)),
+    ({"Effect": "Allow", "NotAction": "iam:*", "Resource": "*"}, ("NotAction iam:*",)),
+    ({"Effect": "Allow", "Action": "s3:PutObject", "Resource": "arn:aws:s3:::bucket/*"}, ()),
+    ({"Effect": "Allow", "Action": "ec2:TerminateInstances", "Resource": "*",
+      "Condition": {"StringEquals": {"aws:ResourceTag/team": "web"}}}, ()),
+    ({"Effect": "Deny", "Action": "s3:DeleteBucket", "Resource": "*"}, ()),
+])
+def test_unscoped_writes(statement, expected):
+    assert analyze_policy(_policy(statement)).unscoped_writes == expected
+
+def test_actions_match_case_insensitively():
+    risk = analyze_policy(_policy({"Effect": "Allow", "Action": "IAM:putRolePolicy", "Resource": "*"}))
+    assert risk.escalation_actions == ("iam:PutRolePolicy",)
+
+def test_account_reports_customer_policies_only():
+    write_everywhere = _policy({"Effect": "Allow", "Action": "ec2:TerminateInstances", "Resource": "*"})
+    details = {
+        "UserDetailList": [], "GroupDetailList": [],
+        "RoleDetailList": [{"RoleName": "app", "Path": "/", "RolePolicyList": [{"PolicyName": "ops", "PolicyDocument": write_everywhere}]}],
+        "Policies": [
+            {"Arn": f"arn:aws:iam::{owner}:policy/{name}", "PolicyName": name, "DefaultVersionId": "v1",
+             "PolicyVersionList": [{"Document": write_everywhere, "VersionId": "v1", "IsDefaultVersion": True}]}
+            for owner, name in (("aws", "AmazonEC2FullAccess"), ("111111111111", "Cleanup"))
+        ]
+    }
+    result = analyze_account_policies(details, "111111111111")
+    assert result["unscoped_write_policies"] == [("Cleanup", "ec2:TerminateInstances"), ("app/ops", "ec2:TerminateInstances")]
+
+DENY_WITHOUT_MFA = {"Effect": "Deny", "Action": "*", "Resource": "*",
+                    "Condition": {"BoolIfExists": {"aws:MultiFactorAuthPresent": "false"}}}
+
+def test_only_an_unconditional_deny_cancels_escalation():
+    allow = {"Effect": "Allow", "Action": "iam:PutRolePolicy", "Resource": "*"}
+    denied = analyze_policy(_policy(allow, {"Effect": "Deny", "Action": "iam:*", "Resource": "*"}))
+    assert denied.escalation_actions == () and denied.conditionally_denied == ()
+
+    risk = analyze_policy(_policy(allow, DENY_WITHOUT_MFA))
+    assert risk.escalation_actions == () and risk.conditionally_denied == ("iam:PutRolePolicy",)
+
+def test_admin_under_a_conditional_deny_is_left_for_review():
+    mfa_admin = _policy({"Effect": "Allow", "Action": "*", "Resource": "*"}, DENY_WITHOUT_MFA)
+    risk = analyze_policy(mfa_admin)
+    assert not risk.admin_equivalent and risk.conditionally_denied == ("*",)
+
+    details = {
+        "UserDetailList": [{"UserName": "alice", "UserPolicyList": [{"PolicyName": "mfa-admin", "PolicyDocument": mfa_admin}]}],
+        "GroupDetailList": [], "RoleDetailList": [], "Policies": []
+    }
+    result = analyze_account_policies(details, "111111111111")
+    assert result["admin_users"] == []
+    assert result["conditional_admin"] == [("alice", "user, via mfa-admin")]
@@ -0,0 +1,71 @@
+'''
+Tests for recording AWS API responses to an archive and replaying them with no network access.
+tests/test_replay.py
+'''
+import json
+
+import boto3
+import pytest
+from botocore.awsrequest import AWSResponse
+
+from modules.aws.replay import ReplayMissError, ResponseArchive
+
+CALLER_IDENTITY_XML = (
+    '<GetCallerIdentityResponse xmlns="https://sts.amazonaws.com/doc/2011-06-15/"><GetCallerIdentityResult>'
+    '<Account>111111111111</Account><Arn>arn:aws:iam::111111111111:user/audit</Arn><UserId>AIDA</UserId>'
+    '</GetCallerIdentityResult><ResponseMetadata><RequestId>1</RequestId></ResponseMetadata></GetCallerIdentityResponse>'
+)
+
+class _Body:
+    def __init__(self, body):
+        self._body = body
+
+    def stream(self, **_kwargs):
+        yield self._body
+
+def _session(archive, before_send):
+    session = boto3.Session(aws_access_key_id="key", aws_secret_access_key="secret", region_name="us-east-1")
+    archive.attach(session, "prod")
+    session.events.register("before-send", before_send)
+    return session
+
+def _stub(request, event_name, **_kwargs):
+    operation = event_name.split(".")[-1]
+    if operation == "GetCallerIdentity":
+        return AWSResponse(request.url, 200, {}, _Body(CALLER_IDENTITY_XML.encode()))
+    if operation == "ListDetectors":
+        return AWSResponse(request.url, 200, {"Content-Type": "application/json"}, _Body(json.dumps({"detectorIds": ["first"]}).encode()))
+    raise AssertionError(f"unexpected request {operation}")
+
+def _offline(request, **_kwargs):
+    raise AssertionError(f"network request while replaying: {request.url}")
+
+def test_record_save_and_replay(tmp_path):
+    path = str(tmp_path / "responses.jsonl.gz")
+    recorder = ResponseArchive(path, "record")
+    session = _session(recorder, _stub)
+    recorded = (session.client("sts").get_caller_identity()["Account"], session.client("guardduty").list_detectors()["DetectorIds"])
+    assert recorder.save() == 2
+
+    session = _session(ResponseArchive(path, "replay"), _offline)
+    replayed = (session.client("sts").get_caller_identity()["Account"], session.client("guardduty").list_detectors()["DetectorIds"])
+    assert replayed == recorded == ("111111111111", ["first"])
+
+def test_request_never_recorded_raises_replay_miss(tmp_path):
+    path = str(tmp_path / "responses.jsonl.gz")
+    recorder = ResponseArchive(path, "record")
+    _session(recorder, _stub).client("sts").get_caller_identity()
+    recorder.save()
+
+    session = _session(ResponseArchive(path, "replay"), _offline)
+    with pytest.raises(ReplayMissError, match="ListDetectors"):
+        session.client("guardduty").list_detectors()
+
+def test_changed_parameters_fall_back_to_the_same_operation(tmp_path):
+    path = str(tmp_path / "responses.jsonl.gz")
+    recorder = ResponseArchive(path, "record")
+    _session(recorder, _stub).client("guardduty").list_detectors(MaxResults=10)
+    recorder.save()
+
+    session = _session(ResponseArchive(path, "replay"), _offline)
+    assert session.client("guardduty").list_detectors(MaxResults=20)["DetectorIds"] == ["first"]
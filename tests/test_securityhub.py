@@ -0,0 +1,51 @@
+'''
+Tests for the essential and deep Security Hub checks.
+tests/test_securityhub.py
+'''
+from modules.aws.securityhub import validate_security_hub
+
+class FakeClient:
+    '''
+    Security Hub client stand-in that is enabled everywhere and records the operations called.
+    '''
+    def __init__(self, calls):
+        self.calls = calls
+
+    def __getattr__(self, operation):
+        def call(**_kwargs):
+            self.calls.append(operation)
+            if operation == "describe_hub":
+                return {"AutoEnableControls": True, "ControlFindingGenerator": "SECURITY_CONTROL"}
+            return {}
+        return call
+
+class FakeSession:
+    '''
+    Session stand-in handing out recording Security Hub clients.
+    '''
+    region_name = "us-east-1"
+
+    def __init__(self):
+        self.calls = []
+
+    def client(self, *_args, **_kwargs):
+        '''
+        Return a recording client.
+        '''
+        return FakeClient(self.calls)
+
+def test_essential_scan_stops_at_the_hub_settings(capsys):
+    session = FakeSession()
+    validate_security_hub(session, deep=False)
+    assert set(session.calls) == {"describe_hub"}
+    assert session.calls.count("describe_hub") == 4
+    output = capsys.readouterr().out
+    assert "✔ AWS Security Hub is Enabled in us-west-2" in output
+    assert "✔ Auto-enable new controls: True" in output
+    assert "Standards" not in output and "Integrations" not in output
+
+def test_deep_scan_reports_standards_integrations_and_aggregation():
+    session = FakeSession()
+    validate_security_hub(session, deep=True)
+    assert {"get_enabled_standards", "list_enabled_products_for_import", "list_automation_rules",
+            "list_finding_aggregators"} <= set(session.calls)